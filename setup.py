@@ -47,6 +47,9 @@ setup(
     ),
     package_dir={"": "src"},
     install_requires=REQUIREMENTS,
+    extras_require={
+        "columnar": ["numpy"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Programming Language :: Python",
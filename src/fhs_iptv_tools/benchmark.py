@@ -0,0 +1,597 @@
+"""Benchmarks for m3u loading, filtering and saving."""
+
+import contextlib
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def generate_m3u_lines(count, reordered=False):
+    """Generate m3u lines for a test playlist.
+
+    Every second entry is a vod entry, every fourth entry is an episode.
+
+    Args:
+        count: amount of channels
+        reordered: use a tvg-chno attribute and another attribute order
+
+    Yields:
+        m3u lines
+    """
+    yield "#EXTM3U\n"
+    for i in range(count):
+        group = f"NL| Group {i % 250}"
+        if i % 2 == 0:
+            name = f"NL: Channel {i}"
+            source = f"http://provider.example:8080/live/user/pass/{i}.ts"
+        elif i % 4 == 1:
+            name = f"NL: Serie {i % 5000} S{i % 12:02d} E{i % 24:02d}"
+            source = f"http://provider.example:8080/series/user/pass/{i}.mkv"
+        else:
+            name = f"NL: Movie {i}"
+            source = f"http://provider.example:8080/movie/user/pass/{i}.mp4"
+        if reordered:
+            yield (f'#EXTINF:-1 tvg-chno="{i}" group-title="{group}" tvg-id="id{i}.nl" tvg-name="{name}" '
+                   f'tvg-logo="http://logo.example/{i % 1000}.png",{name}\n')
+        else:
+            yield (f'#EXTINF:-1 tvg-id="id{i}.nl" tvg-name="{name}" tvg-logo="http://logo.example/{i % 1000}.png" '
+                   f'group-title="{group}",{name}\n')
+        yield f"{source}\n"
+
+
+def write_m3u_file(m3u_file, count):
+    """Write a test playlist to disk.
+
+    Args:
+        m3u_file: path to write to
+        count: amount of channels
+    """
+    with open(m3u_file, "w") as output_stream:
+        output_stream.writelines(generate_m3u_lines(count))
+
+
+def measure(func, *args, **kwargs):
+    """Measure time and peak memory of a function.
+
+    Args:
+        func: function to run
+        args: positional arguments for func
+        kwargs: keyword arguments for func
+
+    Returns:
+        (result, seconds, peak memory in bytes)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (result, seconds, peak)
+
+
+def print_result(name, seconds, peak=None):
+    """Print a benchmark result line.
+
+    Args:
+        name: name of the measurement
+        seconds: time used
+        peak: peak memory in bytes
+    """
+    if peak is None:
+        print(f"{name:40}: {seconds:8.3f}s")
+    else:
+        print(f"{name:40}: {seconds:8.3f}s  peak memory: {peak / 1024 / 1024:9.1f} MiB")
+
+
+def bench_stream(count):
+    """Compare memory of load -> filter -> save with the list and the streaming parser.
+
+    Args:
+        count: amount of channels
+    """
+    from .import_m3u import import_m3u_file, iter_m3u_file, export_m3u_file
+    from .probe_list import LoadType, filter_load_type, select_channels
+
+    def list_pipeline(m3u_file, out_file):
+        channels = import_m3u_file(m3u_file)
+        channels = list(filter_load_type(channels, LoadType.VOD))
+        channels = [ch for ch in select_channels(channels, tvg_name="NL:")]
+        export_m3u_file(out_file, channels)
+
+    def stream_pipeline(m3u_file, out_file):
+        channels = filter_load_type(iter_m3u_file(m3u_file), LoadType.VOD)
+        export_m3u_file(out_file, select_channels(channels, tvg_name="NL:"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        out_file = os.path.join(tmp_dir, "out.m3u")
+        write_m3u_file(m3u_file, count)
+        print(f"load -> filter vod -> select -> save with {count} channels")
+        (_, seconds, peak) = measure(list_pipeline, m3u_file, out_file)
+        print_result("import_m3u_file (list)", seconds, peak)
+        (_, seconds, peak) = measure(stream_pipeline, m3u_file, out_file)
+        print_result("iter_m3u_file (stream)", seconds, peak)
+
+
+def regex_parse_lines(lines):
+    """Parse lines with the regex used before parse_extinf, as reference.
+
+    Args:
+        lines: list of m3u lines
+
+    Returns:
+        amount of #EXTINF lines found
+    """
+    import re
+
+    infopattern = re.compile('(?i)#EXTINF:-1 tvg-id="(.*?)" tvg-name="(.*?)" tvg-logo="(.*?)" group-title="(.*?)",(.*?)')  # noqa: E501,BLK100
+    count = 0
+    for line in lines:
+        m = infopattern.findall(line.rstrip())
+        if len(m) > 0:
+            count += 1
+    return count
+
+
+def tokenizer_parse_lines(lines):
+    """Parse lines with parse_extinf.
+
+    Args:
+        lines: list of m3u lines
+
+    Returns:
+        amount of #EXTINF lines found
+    """
+    from .import_m3u import parse_extinf
+
+    count = 0
+    for line in lines:
+        if line[:1] != '#':
+            continue
+        if parse_extinf(line.rstrip()) is not None:
+            count += 1
+    return count
+
+
+def bench_parse(count):
+    """Compare #EXTINF parse throughput of the regex and the tokenizer.
+
+    Args:
+        count: amount of channels, the input has two lines per channel
+    """
+    from .import_m3u import iter_m3u_stream
+
+    for reordered in (False, True):
+        lines = list(generate_m3u_lines(count, reordered=reordered))
+        layout = "reordered attributes with tvg-chno" if reordered else "standard attribute order"
+        print(f"parse #EXTINF lines, {len(lines)} lines, {layout}")
+        for (name, func) in (("regex findall", regex_parse_lines), ("parse_extinf tokenizer", tokenizer_parse_lines)):
+            start = time.perf_counter()
+            found = func(lines)
+            seconds = time.perf_counter() - start
+            print_result(f"{name} ({found} found)", seconds)
+            print(f"{'':40}  {len(lines) / seconds / 1000000:8.2f}M lines/s")
+        start = time.perf_counter()
+        for _ in iter_m3u_stream(lines):
+            pass
+        print_result("iter_m3u_stream (full parse)", time.perf_counter() - start)
+
+
+def bench_parallel(count):
+    """Compare loading a m3u file with one process and with a process pool.
+
+    Args:
+        count: amount of channels
+    """
+    from .import_m3u import import_m3u_file, import_m3u_file_parallel
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        size = os.path.getsize(m3u_file) / 1024 / 1024
+        print(f"load m3u file with {count} channels, {size:.1f} MiB, {os.cpu_count()} cpus")
+        start = time.perf_counter()
+        single = import_m3u_file(m3u_file)
+        print_result("import_m3u_file", time.perf_counter() - start)
+        start = time.perf_counter()
+        parallel = import_m3u_file_parallel(m3u_file)
+        print_result("import_m3u_file_parallel", time.perf_counter() - start)
+        if single != parallel:
+            print("ERROR: parallel result differs from single process result")
+
+
+def bench_snapshot(count):
+    """Compare loading a store snapshot with parsing the m3u file.
+
+    Args:
+        count: amount of channels
+    """
+    from .import_m3u import import_m3u_file
+    from .snapshot import load_snapshot, save_snapshot
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        snapshot_file = os.path.join(tmp_dir, "bench.snapshot")
+        write_m3u_file(m3u_file, count)
+        print(f"load {count} channels, m3u {os.path.getsize(m3u_file) / 1024 / 1024:.1f} MiB")
+        start = time.perf_counter()
+        channels = import_m3u_file(m3u_file)
+        print_result("import_m3u_file", time.perf_counter() - start)
+        for (pos, ch) in enumerate(channels[::10]):
+            ch.add_tag("keep")
+            ch.fhs_info = f"video: h264 bit_rate: {pos}"
+            ch.fhs_dict = {'video': {'codec': 'h264', 'bit_rate': pos}}
+        start = time.perf_counter()
+        save_snapshot(snapshot_file, channels)
+        print_result("save_snapshot", time.perf_counter() - start)
+        print(f"{'':40}  snapshot {os.path.getsize(snapshot_file) / 1024 / 1024:.1f} MiB")
+        start = time.perf_counter()
+        loaded = load_snapshot(snapshot_file)
+        print_result("load_snapshot", time.perf_counter() - start)
+        if loaded != channels:
+            print("ERROR: snapshot differs from the saved channels")
+
+
+def bench_memory(count):
+    """Measure the memory used by the channels of a loaded m3u file.
+
+    Args:
+        count: amount of channels
+    """
+    from .import_m3u import import_m3u_file
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        tracemalloc.start()
+        start = time.perf_counter()
+        channels = import_m3u_file(m3u_file)
+        seconds = time.perf_counter() - start
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"memory of {len(channels)} loaded channels")
+        print_result("import_m3u_file (traced)", seconds)
+        print(f"{'':40}  {current / 1024 / 1024:.1f} MiB, {current / len(channels):.0f} bytes per channel")
+
+
+def print_export(m3u_file, m3u_channels):
+    """Export channels with a print call per line, as reference.
+
+    Args:
+        m3u_file: path to m3u file to write
+        m3u_channels: channels to save to file
+    """
+    with open(m3u_file, "w") as output_stream:
+        print("#EXTM3U", file=output_stream)
+        for ch in m3u_channels:
+            print(f'#EXTINF:-1 tvg-id="{ch.tvg_id}" tvg-name="{ch.tvg_name}" tvg-logo="{ch.tvg_logo}" group-title="{ch.tvg_group_title}",{ch.tvg_name}', file=output_stream)  # noqa: E501
+            for source in ch.tvg_sources:
+                print(source, file=output_stream)
+
+
+def bench_index(count):
+    """Compare id lookups with a linear scan and with the hash indexes of a store.
+
+    Args:
+        count: amount of channels
+    """
+    from .probe_list import ProbeInfoList
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        store = ProbeInfoList()
+        store.load_m3u_file(m3u_file)
+    channels = list(store.get_channels())
+    ids = [f"id{i}.nl" for i in range(0, count, max(1, count // 1000))]
+    print(f"{len(ids)} id lookups, modifies and deletes on a store with {count} channels")
+    start = time.perf_counter()
+    for tvg_id in ids[:100]:
+        [ch for ch in channels if ch.tvg_id == tvg_id]
+    print_result("100x linear scan (reference)", time.perf_counter() - start)
+    start = time.perf_counter()
+    store.list_groups()
+    print_result("build indexes (list_groups)", time.perf_counter() - start)
+    start = time.perf_counter()
+    for tvg_id in ids:
+        list(store.get_channels(with_id=tvg_id))
+    print_result(f"{len(ids)}x get_channels with_id", time.perf_counter() - start)
+    start = time.perf_counter()
+    for tvg_id in ids:
+        store.modify_channels(with_id=tvg_id, set_group_title="Modified")
+    print_result(f"{len(ids)}x modify_channels with_id", time.perf_counter() - start)
+    start = time.perf_counter()
+    for tvg_id in ids:
+        store.delete_channels(with_id=tvg_id)
+    print_result(f"{len(ids)}x delete_channels with_id", time.perf_counter() - start)
+
+
+def bench_tags(count):
+    """Measure tag filters of a store with the tag bitmaps.
+
+    Args:
+        count: amount of channels
+    """
+    from .probe_list import ProbeInfoList
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        store = ProbeInfoList()
+        store.load_m3u_file(m3u_file)
+    channels = list(store.get_channels())
+    for ch in channels[::3]:
+        ch.add_tag("keep")
+    print(f"tag filters on a store with {count} channels")
+    start = time.perf_counter()
+    [ch for ch in channels if ch.has_tag("keep") and not ch.has_tag("tmp")]
+    print_result("scan with_tag/without_tag (reference)", time.perf_counter() - start)
+    start = time.perf_counter()
+    store.select(tvg_id="id1", set_tag="tmp", quiet=True)
+    print_result("select set_tag (builds bitmaps)", time.perf_counter() - start)
+    start = time.perf_counter()
+    found = sum(1 for _ in store.get_channels(with_tag="keep", without_tag="tmp"))
+    print_result(f"get_channels with/without tag ({found})", time.perf_counter() - start)
+    start = time.perf_counter()
+    found = sum(1 for _ in store.get_channels(with_tag="tmp"))
+    print_result(f"get_channels with_tag ({found})", time.perf_counter() - start)
+    start = time.perf_counter()
+    store.clear_tag(tag="tmp")
+    print_result("clear_tag", time.perf_counter() - start)
+    start = time.perf_counter()
+    store.delete_channels(without_tag="keep")
+    print_result("delete_channels without_tag", time.perf_counter() - start)
+
+
+def bench_delete(count):
+    """Measure deleting and moving 90% of a store.
+
+    Args:
+        count: amount of channels
+    """
+    from .probe_list import ProbeInfoList
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        stores = [ProbeInfoList(trigram=True) for _ in range(3)]
+        for store in stores:
+            store.load_m3u_file(m3u_file)
+    for store in stores:
+        for ch in list(store.get_channels())[::10]:
+            ch.add_tag("keep")
+        # build the indexes, so they are updated by the delete
+        store.list_groups()
+        store.select(tvg_name="Movie 1", set_tag="tmp", quiet=True)
+    print(f"delete and move 90% of a store with {count} channels")
+    channels = list(stores[0].get_channels())
+    if count <= 200000:
+        start = time.perf_counter()
+        for p in range(len(channels) - 1, -1, -1):
+            if not channels[p].has_tag("keep"):
+                del channels[p]
+        print_result("del per channel (reference)", time.perf_counter() - start)
+    else:
+        print(f"{'del per channel (reference)':40}  skipped, quadratic above 200000 channels")
+    start = time.perf_counter()
+    deleted = stores[0].delete_channels(without_tag="keep")
+    print_result(f"delete_channels without_tag ({deleted})", time.perf_counter() - start)
+    target = ProbeInfoList()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        stores[1].copy_channels(without_tag="keep", to_store=target)
+    stores[1].delete_channels(without_tag="keep")
+    print_result("copy + delete (reference)", time.perf_counter() - start)
+    target = ProbeInfoList()
+    start = time.perf_counter()
+    moved = stores[2].move_channels(without_tag="keep", to_store=target)
+    print_result(f"move_channels without_tag ({moved})", time.perf_counter() - start)
+    start = time.perf_counter()
+    found = sum(1 for _ in stores[2].get_channels(with_name="NL: Channel 10"))
+    print_result(f"get_channels with_name after move ({found})", time.perf_counter() - start)
+
+
+def bench_fanout(count):
+    """Measure copying a master store to 10 stores with shared channels.
+
+    Args:
+        count: amount of channels
+    """
+    import copy
+    from .probe_list import ProbeInfoList
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        master = ProbeInfoList()
+        master.load_m3u_file(m3u_file)
+    print(f"copy a store with {count} channels to 10 stores")
+    channels = list(master.get_channels())
+    start = time.perf_counter()
+    copies = [copy.copy(ch) for ch in channels]
+    print_result("copy.copy per channel, 1 store (reference)", time.perf_counter() - start)
+    del copies
+    stores = [ProbeInfoList() for _ in range(10)]
+    start = time.perf_counter()
+    for store in stores:
+        master.copy_channels(to_store=store, quiet=True)
+    print_result("copy_channels to 10 stores", time.perf_counter() - start)
+    # tracemalloc slows down every allocation, measure the memory in a second run
+    (_, seconds, peak) = measure(lambda: [master.copy_channels(to_store=ProbeInfoList(), quiet=True)
+                                          for _ in range(10)])
+    print_result("copy_channels to 10 stores (traced)", seconds, peak)
+    start = time.perf_counter()
+    tagged = stores[0].select(tvg_name="Movie 1", set_tag="customer", quiet=True)
+    print_result(f"select set_tag in 1 store ({tagged} cloned)", time.perf_counter() - start)
+    if sum(1 for _ in master.get_channels(with_tag="customer")) != 0:
+        print("ERROR: tag of a copied store is set in the master store")
+
+
+def bench_trigram(count):
+    """Compare select on name with and without the trigram index.
+
+    Args:
+        count: amount of channels
+    """
+    from .probe_list import ProbeInfoList
+
+    searches = [f"Movie {i}" for i in range(1000, 1100)] + [f"Serie {i} S0" for i in range(100)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        stores = [ProbeInfoList(trigram=trigram) for trigram in (False, True)]
+        for store in stores:
+            store.load_m3u_file(m3u_file)
+    print(f"{len(searches)} selects on name on a store with {count} channels")
+    results = []
+    for store in stores:
+        label = "trigram" if store.is_trigram() else "scan"
+        start = time.perf_counter()
+        store.select(tvg_name="Movie 1", set_tag="first", quiet=True)
+        print_result(f"{label} first select (builds index)", time.perf_counter() - start)
+        start = time.perf_counter()
+        results.append([store.select(tvg_name=search, set_tag="found", quiet=True) for search in searches])
+        seconds = time.perf_counter() - start
+        print_result(f"{label} {len(searches)}x select on name", seconds)
+        print(f"{'':40}  {seconds / len(searches) * 1000:8.2f} ms per select")
+    if results[0] != results[1]:
+        print("ERROR: trigram select differs from scan")
+
+
+def bench_export(count):
+    """Compare exporting with a print per line and the buffered atomic writer.
+
+    Args:
+        count: amount of channels
+    """
+    from .import_m3u import export_m3u_file, import_m3u_file
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        out_file = os.path.join(tmp_dir, "out.m3u")
+        write_m3u_file(m3u_file, count)
+        channels = import_m3u_file(m3u_file)
+        print(f"export {count} channels")
+        start = time.perf_counter()
+        print_export(out_file, channels)
+        print_result("print per line", time.perf_counter() - start)
+        os.remove(out_file)
+        start = time.perf_counter()
+        result = export_m3u_file(out_file, channels)
+        print_result("export_m3u_file (new file)", time.perf_counter() - start)
+        start = time.perf_counter()
+        result = export_m3u_file(out_file, channels)
+        print_result(f"export_m3u_file (unchanged, skipped: {result['skipped']})", time.perf_counter() - start)
+        channels = import_m3u_file(m3u_file, keep_raw=True)
+        os.remove(out_file)
+        start = time.perf_counter()
+        export_m3u_file(out_file, channels)
+        print_result("export_m3u_file (keep_raw, verbatim)", time.perf_counter() - start)
+
+    from .probe_list import ProbeInfoList
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        store = ProbeInfoList()
+        store.load_m3u_file(m3u_file)
+        for (pos, ch) in enumerate(store.get_channels()):
+            ch.add_tag(f"customer{pos % 20}")
+        outputs = [{'file': os.path.join(tmp_dir, f"customer{i}.m3u"), 'with_tag': f"customer{i}"} for i in range(20)]
+        print(f"export 20 tagged playlists from {count} channels")
+        start = time.perf_counter()
+        for output in outputs:
+            export_m3u_file(output['file'], store.get_channels(with_tag=output['with_tag']))
+        print_result("20x export_m3u_file", time.perf_counter() - start)
+        for output in outputs:
+            os.remove(output['file'])
+        start = time.perf_counter()
+        store.save_m3u_files(outputs)
+        print_result("save_m3u_files (one pass)", time.perf_counter() - start)
+
+
+def bench_columnar(count):
+    """Compare the filters of a store with and without the columnar table.
+
+    Args:
+        count: amount of channels
+    """
+    from .channel_table import columnar_available
+    from .probe_list import LoadType, ProbeInfoList
+
+    if not columnar_available():
+        print("columnar benchmark needs numpy, skipped")
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m3u_file = os.path.join(tmp_dir, "bench.m3u")
+        write_m3u_file(m3u_file, count)
+        stores = [ProbeInfoList(columnar=columnar) for columnar in (False, True)]
+        for store in stores:
+            store.load_m3u_file(m3u_file)
+    print(f"filters on a store with {count} channels")
+    for store in stores:
+        columnar = store.is_columnar()
+        label = "columnar" if columnar else "list"
+        start = time.perf_counter()
+        store.list_groups(vod_only=True)
+        print_result(f"{label} list_groups (builds the table)", time.perf_counter() - start)
+        start = time.perf_counter()
+        for i in range(10):
+            store.select(tvg_group_title=f"Group {i}", tvg_name="Serie 1", set_tag="serie", quiet=True)
+        print_result(f"{label} 10x select group and name", time.perf_counter() - start)
+        start = time.perf_counter()
+        for i in range(10):
+            list(store.get_channels(with_id=f"id{i * 1000}.nl"))
+        print_result(f"{label} 10x get_channels with_id", time.perf_counter() - start)
+        start = time.perf_counter()
+        for i in range(10):
+            store.group_channels(f"NL| Group {i}")
+        print_result(f"{label} 10x group_channels", time.perf_counter() - start)
+        start = time.perf_counter()
+        for i in range(10):
+            store.select(tvg_name=f"Serie {i}1", set_tag="drop", quiet=True)
+            store.delete_channels(with_tag="drop")
+        print_result(f"{label} 10x select and delete", time.perf_counter() - start)
+        start = time.perf_counter()
+        store.filter_lijst(LoadType.VOD)
+        print_result(f"{label} filter vod", time.perf_counter() - start)
+
+
+BENCHMARKS = {
+    "stream": bench_stream,
+    "parse": bench_parse,
+    "parallel": bench_parallel,
+    "snapshot": bench_snapshot,
+    "memory": bench_memory,
+    "columnar": bench_columnar,
+    "export": bench_export,
+    "index": bench_index,
+    "tags": bench_tags,
+    "trigram": bench_trigram,
+    "delete": bench_delete,
+    "fanout": bench_fanout,
+}
+
+
+def run_benchmark(name, count):
+    """Run a benchmark.
+
+    Args:
+        name: name of the benchmark, or all
+        count: amount of channels to use
+
+    Returns:
+        Good: boolean
+    """
+    if name == "all":
+        names = list(BENCHMARKS)
+    elif name in BENCHMARKS:
+        names = [name]
+    else:
+        print(f"ERROR: unknown benchmark {name}, use one of: all, {', '.join(BENCHMARKS)}")
+        return False
+    for bench_name in names:
+        BENCHMARKS[bench_name](count)
+    return True
@@ -0,0 +1,204 @@
+"""Hash indexes on tvg_id, tvg_name and group title of the channels in a store.
+
+Every channel gets a sequence number when it is indexed, the numbers keep the
+order of the channels in the store but are not changed when channels before
+them are deleted. The indexes map a value to the sequence numbers of the
+channels with that value, a single number for a unique value and a list for
+repeated values. The sequence numbers in store order are kept in an array
+next to the list of channels, a position is found with a bisect on it.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from itertools import compress
+
+KEYS = ('tvg_id', 'tvg_name', 'tvg_group_title')
+
+
+def add_seq(index, value, seq):
+    """Add sequence number to the entry of value.
+
+    Args:
+        index: dict value -> seq or list of seqs
+        value: key in the index
+        seq: sequence number
+    """
+    found = index.get(value)
+    if found is None:
+        index[value] = seq
+    elif found.__class__ is int:
+        index[value] = [found, seq] if found < seq else [seq, found]
+    elif seq > found[-1]:
+        found.append(seq)
+    else:
+        insort(found, seq)
+
+
+def remove_seq(index, value, seq):
+    """Remove sequence number from the entry of value.
+
+    Args:
+        index: dict value -> seq or list of seqs
+        value: key in the index
+        seq: sequence number
+    """
+    found = index.get(value)
+    if found is None:
+        return
+    if found.__class__ is int:
+        if found == seq:
+            del index[value]
+        return
+    pos = bisect_left(found, seq)
+    if pos < len(found) and found[pos] == seq:
+        del found[pos]
+        if len(found) == 1:
+            index[value] = found[0]
+
+
+class ChannelIndex:
+    def __init__(self, m3u_channels):
+        """Initiate class, index all channels.
+
+        Args:
+            m3u_channels: list of m3uchannels of the store
+        """
+        self._seqs = array('q', range(len(m3u_channels)))
+        self._next = len(m3u_channels)
+        self._indexes = {key: {} for key in KEYS}
+        for (seq, ch) in enumerate(m3u_channels):
+            self._add(seq, ch)
+
+    def _add(self, seq, ch):
+        """Add channel to the indexes.
+
+        Args:
+            seq: sequence number of the channel
+            ch: m3uchannel
+        """
+        for key in KEYS:
+            add_seq(self._indexes[key], getattr(ch, key), seq)
+
+    def _remove(self, seq, values):
+        """Remove channel from the indexes.
+
+        Args:
+            seq: sequence number of the channel
+            values: dict with the indexed values of the channel
+        """
+        for key in KEYS:
+            remove_seq(self._indexes[key], values[key], seq)
+
+    def append(self, ch):
+        """Index a channel added at the end of the store.
+
+        Args:
+            ch: m3uchannel
+        """
+        seq = self._next
+        self._next += 1
+        self._seqs.append(seq)
+        self._add(seq, ch)
+
+    def delete(self, pos, ch):
+        """Remove the channel at position pos, call this before it is deleted from the store.
+
+        Args:
+            pos: position of the channel in the store
+            ch: m3uchannel
+        """
+        seq = self._seqs[pos]
+        self._remove(seq, {key: getattr(ch, key) for key in KEYS})
+        del self._seqs[pos]
+
+    def delete_many(self, positions, removed):
+        """Remove many channels in one pass, call this before they are deleted from the store.
+
+        The sequence numbers to remove are grouped per value, so a large
+        entry is filtered once instead of once per channel.
+
+        Args:
+            positions: sorted list of positions in the store
+            removed: the channels at those positions
+        """
+        seqs = self._seqs
+        for key in KEYS:
+            index = self._indexes[key]
+            by_value = {}
+            for (pos, ch) in zip(positions, removed):
+                by_value.setdefault(getattr(ch, key), []).append(seqs[pos])
+            for (value, drop) in by_value.items():
+                found = index.get(value)
+                if found is None or found.__class__ is int or len(drop) == 1:
+                    for seq in drop:
+                        remove_seq(index, value, seq)
+                    continue
+                drop = set(drop)
+                rest = [seq for seq in found if seq not in drop]
+                if not rest:
+                    del index[value]
+                else:
+                    index[value] = rest[0] if len(rest) == 1 else rest
+        keep = bytearray(b'\x01') * len(seqs)
+        for pos in positions:
+            keep[pos] = 0
+        self._seqs = array('q', compress(seqs, keep))
+
+    def update(self, pos, old_values, ch):
+        """Move a changed channel to the entries of its new values.
+
+        Args:
+            pos: position of the channel in the store
+            old_values: dict with the indexed values before the change
+            ch: m3uchannel with the new values
+        """
+        seq = self._seqs[pos]
+        for key in KEYS:
+            new_value = getattr(ch, key)
+            if new_value != old_values[key]:
+                remove_seq(self._indexes[key], old_values[key], seq)
+                add_seq(self._indexes[key], new_value, seq)
+
+    def positions(self, key, value):
+        """Get the positions of the channels with a value.
+
+        Args:
+            key: tvg_id, tvg_name or tvg_group_title
+            value: value to look up
+
+        Returns:
+            list of positions in store order
+        """
+        found = self._indexes[key].get(value)
+        if found is None:
+            return []
+        seqs = self._seqs
+        if found.__class__ is int:
+            return [bisect_left(seqs, found)]
+        return [bisect_left(seqs, seq) for seq in found]
+
+    def count(self, key, value):
+        """Count the channels with a value.
+
+        Args:
+            key: tvg_id, tvg_name or tvg_group_title
+            value: value to look up
+
+        Returns:
+            count
+        """
+        found = self._indexes[key].get(value)
+        if found is None:
+            return 0
+        return 1 if found.__class__ is int else len(found)
+
+    def values(self, key):
+        """Get the distinct values of a key.
+
+        Args:
+            key: tvg_id, tvg_name or tvg_group_title
+
+        Returns:
+            dict keys view with the values
+        """
+        return self._indexes[key].keys()
@@ -0,0 +1,406 @@
+"""Columnar table of channels for vectorized filters.
+
+Optional, needs numpy. Group titles are stored as categorical codes, vod and
+the channel type as arrays. Names, ids and the first source are stored per
+column as one utf-8 byte buffer with the start and end offset of every row,
+so a long value only costs its own bytes. A substring search narrows the
+hits of the first bytes in the buffer with numpy and maps them to rows with a
+searchsorted on the row starts, without a Python loop over the rows or the
+hits. A substring of the utf-8 bytes is the utf-8 of a substring, so the
+result is the same as a search in the strings.
+
+The store keeps the table in sync: added channels are appended, deleted
+rows are dropped with a numpy mask and modified rows are updated, so the
+table is only built once. The arrays grow geometrically, so adding the
+channels one by one stays linear.
+"""
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+def columnar_available():
+    """Check if the columnar table can be used.
+
+    Returns:
+        boolean, numpy is installed
+    """
+    return numpy is not None
+
+
+def get_keep_mask(count, positions):
+    """Get the mask of the rows that stay after a delete.
+
+    Args:
+        count: amount of rows
+        positions: sorted list of deleted rows
+
+    Returns:
+        numpy boolean array
+    """
+    keep = numpy.ones(count, dtype=bool)
+    keep[numpy.array(positions, dtype=numpy.int64)] = False
+    return keep
+
+
+def reserve(array, size):
+    """Get an array with room for size items, grown geometrically.
+
+    Args:
+        array: numpy array, its items are kept
+        size: amount of items needed
+
+    Returns:
+        the array itself when it is big enough, otherwise a copy of at least twice its size
+    """
+    if size <= len(array):
+        return array
+    grown = numpy.empty(max(size, 2 * len(array), 16), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class StringColumn:
+    def __init__(self, values):
+        """Initiate class.
+
+        Args:
+            values: list of strings
+        """
+        self._data = numpy.zeros(0, dtype=numpy.uint8)
+        self._used = 0
+        self._starts = numpy.zeros(0, dtype=numpy.int64)
+        self._ends = numpy.zeros(0, dtype=numpy.int64)
+        self._count = 0
+        self._live = 0
+        self._ordered = True
+        self.append(values)
+
+    def __len__(self):
+        """Get the amount of rows.
+
+        Returns:
+            amount of rows
+        """
+        return self._count
+
+    def _add_bytes(self, data):
+        """Add bytes at the end of the buffer.
+
+        Args:
+            data: bytes
+
+        Returns:
+            offset of the bytes in the buffer
+        """
+        offset = self._used
+        self._data = reserve(self._data, offset + len(data))
+        self._data[offset:offset + len(data)] = numpy.frombuffer(data, dtype=numpy.uint8)
+        self._used += len(data)
+        return offset
+
+    def _compact(self):
+        """Copy the rows in row order to a new buffer, without the bytes of deleted or replaced values."""
+        starts = self._starts[:self._count]
+        lengths = self._ends[:self._count] - starts
+        offsets = numpy.zeros(self._count, dtype=numpy.int64)
+        if self._count > 1:
+            numpy.cumsum(lengths[:-1], out=offsets[1:])
+        # for every byte of the new buffer the position in the old buffer
+        positions = numpy.arange(self._live, dtype=numpy.int64) + numpy.repeat(starts - offsets, lengths)
+        self._data = self._data[positions]
+        self._used = self._live
+        self._starts = offsets
+        self._ends = offsets + lengths
+        self._ordered = True
+
+    def _compact_if_wasted(self):
+        """Compact when more than half of the buffer is no longer used."""
+        if self._used > 4096 and self._live * 2 < self._used:
+            self._compact()
+
+    def append(self, values):
+        """Add rows at the end.
+
+        Args:
+            values: list of strings
+        """
+        encoded = [value.encode('utf-8') for value in values]
+        if not encoded:
+            return
+        lengths = numpy.fromiter(map(len, encoded), dtype=numpy.int64, count=len(encoded))
+        offset = self._add_bytes(b''.join(encoded))
+        count = self._count + len(encoded)
+        self._starts = reserve(self._starts, count)
+        self._ends = reserve(self._ends, count)
+        ends = numpy.cumsum(lengths) + offset
+        self._ends[self._count:count] = ends
+        self._starts[self._count:count] = ends - lengths
+        self._count = count
+        self._live += int(lengths.sum())
+
+    def delete(self, keep):
+        """Drop rows.
+
+        Args:
+            keep: numpy boolean array, the rows that stay
+        """
+        starts = self._starts[:self._count][keep]
+        ends = self._ends[:self._count][keep]
+        self._live = int((ends - starts).sum())
+        (self._starts, self._ends, self._count) = (starts, ends, len(starts))
+        self._compact_if_wasted()
+
+    def update(self, row, value):
+        """Change a row.
+
+        A value that fits is written over the old one, a longer one is added
+        at the end of the buffer.
+
+        Args:
+            row: row number
+            value: new string
+        """
+        value = value.encode('utf-8')
+        start = int(self._starts[row])
+        self._live += len(value) - int(self._ends[row] - start)
+        if len(value) <= self._ends[row] - start:
+            self._data[start:start + len(value)] = numpy.frombuffer(value, dtype=numpy.uint8)
+        else:
+            start = self._add_bytes(value)
+            self._starts[row] = start
+            # the rows are no longer in buffer order, see mask_contains
+            self._ordered = False
+        self._ends[row] = start + len(value)
+        self._compact_if_wasted()
+
+    def find_rows(self, text):
+        """Get rows with text in it.
+
+        Args:
+            text: substring to find
+
+        Returns:
+            numpy array of rows, sorted, all rows for an empty text
+        """
+        return numpy.flatnonzero(self.mask_contains(text))
+
+    def mask_contains(self, text):
+        """Get mask of rows with text in it.
+
+        The buffer is searched for the first two bytes of text, the hits are
+        narrowed on the next bytes and mapped to their row with a
+        searchsorted on the row starts, a hit that runs past the end of its
+        row is dropped.
+
+        Args:
+            text: substring to find
+
+        Returns:
+            numpy boolean array
+        """
+        needle = numpy.frombuffer(text.encode('utf-8'), dtype=numpy.uint8)
+        if len(needle) == 0:
+            return numpy.ones(self._count, dtype=bool)
+        mask = numpy.zeros(self._count, dtype=bool)
+        if self._used < len(needle):
+            return mask
+        if not self._ordered:
+            self._compact()
+        data = self._data
+        size = self._used - len(needle) + 1
+        first = data[:size] == needle[0]
+        if len(needle) > 1:
+            # a single byte like / is in every url, two bytes leave far less hits
+            first &= data[1:size + 1] == needle[1]
+        hits = numpy.flatnonzero(first)
+        for (k, byte) in enumerate(needle[2:], 2):
+            hits = hits[data[hits + k] == byte]
+        starts = self._starts[:self._count]
+        rows = numpy.searchsorted(starts, hits, side='right') - 1
+        found = rows >= 0
+        (hits, rows) = (hits[found], rows[found])
+        mask[rows[hits + len(needle) <= self._ends[rows]]] = True
+        return mask
+
+    def mask_equals(self, text):
+        """Get mask of rows equal to text.
+
+        Args:
+            text: string to compare with
+
+        Returns:
+            numpy boolean array
+        """
+        needle = numpy.frombuffer(text.encode('utf-8'), dtype=numpy.uint8)
+        starts = self._starts[:self._count]
+        rows = numpy.flatnonzero(self._ends[:self._count] - starts == len(needle))
+        for (k, byte) in enumerate(needle):
+            rows = rows[self._data[starts[rows] + k] == byte]
+        mask = numpy.zeros(self._count, dtype=bool)
+        mask[rows] = True
+        return mask
+
+
+def first_source(ch):
+    """Get the first source of a channel.
+
+    Args:
+        ch: m3uchannel
+
+    Returns:
+        source url or '' without sources
+    """
+    return ch.tvg_sources[0] if ch.tvg_sources else ''
+
+
+class ChannelTable:
+    def __init__(self, channels):
+        """Initiate class, build the columns from a list of channels.
+
+        Args:
+            channels: list of m3uchannels
+        """
+        self._group_codes = {}
+        self.groups = []
+        self._group = numpy.array([self._group_code(ch.tvg_group_title) for ch in channels], dtype=numpy.int32)
+        self._vod = numpy.fromiter((ch.vod for ch in channels), dtype=bool, count=len(channels))
+        self._type = numpy.fromiter((ch.tvg_type.value for ch in channels), dtype=numpy.int8, count=len(channels))
+        self.name = StringColumn([ch.tvg_name for ch in channels])
+        self.id = StringColumn([ch.tvg_id for ch in channels])
+        self.source = StringColumn([first_source(ch) for ch in channels])
+        self.count = len(channels)
+        self._set_views()
+
+    def _set_views(self):
+        """Point group, vod and type at the rows in use of their arrays, the arrays have room to grow."""
+        self.group = self._group[:self.count]
+        self.vod = self._vod[:self.count]
+        self.type = self._type[:self.count]
+
+    def _group_code(self, group):
+        """Get the code of a group title, add it when it is new.
+
+        Args:
+            group: group title
+
+        Returns:
+            code
+        """
+        code = self._group_codes.get(group)
+        if code is None:
+            code = len(self.groups)
+            self._group_codes[group] = code
+            self.groups.append(group)
+        return code
+
+    def append(self, channels):
+        """Add channels added at the end of the store.
+
+        Args:
+            channels: list of m3uchannels
+        """
+        if not channels:
+            return
+        count = self.count + len(channels)
+        self._group = reserve(self._group, count)
+        self._vod = reserve(self._vod, count)
+        self._type = reserve(self._type, count)
+        self._group[self.count:count] = [self._group_code(ch.tvg_group_title) for ch in channels]
+        self._vod[self.count:count] = [ch.vod for ch in channels]
+        self._type[self.count:count] = [ch.tvg_type.value for ch in channels]
+        self.name.append([ch.tvg_name for ch in channels])
+        self.id.append([ch.tvg_id for ch in channels])
+        self.source.append([first_source(ch) for ch in channels])
+        self.count = count
+        self._set_views()
+
+    def delete(self, positions):
+        """Drop the rows of deleted channels.
+
+        Args:
+            positions: sorted list of deleted positions
+        """
+        if not positions:
+            return
+        keep = get_keep_mask(self.count, positions)
+        self._group = self.group[keep]
+        self._vod = self.vod[keep]
+        self._type = self.type[keep]
+        self.name.delete(keep)
+        self.id.delete(keep)
+        self.source.delete(keep)
+        self.count -= len(positions)
+        self._set_views()
+
+    def update(self, row, ch):
+        """Update the row of a modified channel.
+
+        Args:
+            row: row number
+            ch: m3uchannel
+        """
+        self.group[row] = self._group_code(ch.tvg_group_title)
+        self.vod[row] = ch.vod
+        self.type[row] = ch.tvg_type.value
+        self.name.update(row, ch.tvg_name)
+        self.id.update(row, ch.tvg_id)
+        self.source.update(row, first_source(ch))
+
+    def mask_all(self):
+        """Get mask with every row.
+
+        Returns:
+            numpy boolean array
+        """
+        return numpy.ones(self.count, dtype=bool)
+
+    def mask_vod(self, include_vod):
+        """Get mask of vod or not vod rows.
+
+        Args:
+            include_vod: boolean
+
+        Returns:
+            numpy boolean array
+        """
+        return self.vod if include_vod else ~self.vod
+
+    def mask_type(self, channel_type):
+        """Get mask of rows of a channel type.
+
+        Args:
+            channel_type: ChannelType
+
+        Returns:
+            numpy boolean array
+        """
+        return self.type == channel_type.value
+
+    def mask_group_contains(self, text):
+        """Get mask of rows with text in the group title.
+
+        Only the distinct group titles are searched.
+
+        Args:
+            text: substring to find
+
+        Returns:
+            numpy boolean array
+        """
+        codes = [code for (code, group) in enumerate(self.groups) if text in group]
+        return numpy.isin(self.group, codes)
+
+    @staticmethod
+    def rows(mask):
+        """Get the rows of a mask.
+
+        Args:
+            mask: numpy boolean array
+
+        Returns:
+            list of row numbers
+        """
+        return numpy.flatnonzero(mask).tolist()
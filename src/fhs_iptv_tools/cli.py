@@ -97,6 +97,47 @@ def run_tasks(
     play(yaml_command, include_tag, exclude_tag)
 
 
+@main.command()
+def benchmark(
+    name: str = typer.Argument("all", help="benchmark to run"),  # noqa: B008
+    channels: int = typer.Option(600000, help="amount of channels in test playlist"),  # noqa: B008
+):
+    """Run benchmarks on a generated m3u playlist.
+
+    Args:
+        name: benchmark to run, or all
+        channels: amount of channels in test playlist
+    """
+    from .benchmark import run_benchmark
+
+    if run_benchmark(name, channels) is False:
+        sys.exit(1)
+
+
+@main.command()
+def migrate_probe_cache(
+    probe_dir: Optional[str] = typer.Option(  # noqa: B008
+        None, help="directory of the json probe cache, default ffprobe_data"
+    ),
+    cache_file: Optional[str] = typer.Option(  # noqa: B008
+        None, help="probe cache database, default in the data directory"
+    ),
+):
+    """Import the json files of the old probe cache in the probe cache database.
+
+    Args:
+        probe_dir: directory of the json probe cache
+        cache_file: probe cache database
+    """
+    from .directories import get_probe_dir, get_probe_db
+    from .probe_cache import ProbeCache, import_json_dir
+
+    cache = ProbeCache(cache_file or get_probe_db())
+    (imported, skipped) = import_json_dir(cache, probe_dir or get_probe_dir())
+    print(f"imported {imported} probes, skipped {skipped} invalid files, {cache.count()} probes in the cache.")
+    cache.close()
+
+
 @main.command()
 def interactive():
     """Run tasks interactive.
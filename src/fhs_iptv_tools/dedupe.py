@@ -0,0 +1,191 @@
+"""Find duplicate channels in one or more stores and merge them.
+
+Every channel gets a key of its normalized name and tvg_id, the channels
+are grouped on that key in a dict, so it is one pass over all stores. The
+channels of a group are merged into the one picked by the keep policy, it
+gets the sources of all of them, the others are removed from their store.
+"""
+
+import re
+
+# words that differ between the copies of a channel, not part of the channel name
+QUALITY_WORDS = frozenset((
+    'sd', 'hd', 'fhd', 'uhd', '4k', '8k', 'hevc', 'h264', 'h265', '720p', '1080p', '2160p', 'backup', 'raw'
+))
+SPLIT_REGEX = re.compile(r'[\W_]+')
+
+MATCH_ON = ("name_id", "name", "id")
+KEEP_POLICIES = ("first", "last", "best_probe", "most_sources")
+
+
+def normalize_name(name):
+    """Normalize a channel name for duplicate detection.
+
+    Lowercase, punctuation and quality words removed, so 'NL: RTL 4 HD',
+    'NL | RTL 4' and '[NL] RTL 4 FHD' all become 'nl rtl 4'.
+
+    Args:
+        name: tvg_name
+
+    Returns:
+        normalized name
+    """
+    return " ".join(word for word in SPLIT_REGEX.split(name.lower()) if word and word not in QUALITY_WORDS)
+
+
+def get_key(ch, match_on="name_id"):
+    """Get the duplicate key of a channel.
+
+    Args:
+        ch: m3uchannel
+        match_on: name_id, name or id
+
+    Returns:
+        key, None if the channel has no value to match on
+    """
+    if match_on == "id":
+        return ch.tvg_id.lower() or None
+    name = normalize_name(ch.tvg_name)
+    if match_on == "name":
+        return name or None
+    tvg_id = ch.tvg_id.lower()
+    if name == "" and tvg_id == "":
+        return None
+    return (name, tvg_id)
+
+
+def probe_score(ch):
+    """Get the quality of a channel from its probe info.
+
+    Args:
+        ch: m3uchannel
+
+    Returns:
+        tuple to compare, higher is better, channels without probe info are lowest
+    """
+    probe = ch.get_probe_dict()
+    video = probe.get('video', {})
+    audio = probe.get('audio', {})
+    return (bool(probe), video.get('height', -1), video.get('bit_rate', -1), audio.get('bit_rate', -1))
+
+
+def pick_survivor(members, keep="first"):
+    """Pick the channel that is kept of a group of duplicates.
+
+    Args:
+        members: list of (store name, m3uchannel) in store order
+        keep: first, last, best_probe or most_sources
+
+    Returns:
+        index in members
+    """
+    if keep == "last":
+        return len(members) - 1
+    if keep == "best_probe":
+        # max returns the first of equal scores, so without probe info this is first
+        return max(range(len(members)), key=lambda i: probe_score(members[i][1]))
+    if keep == "most_sources":
+        return max(range(len(members)), key=lambda i: len(members[i][1].tvg_sources))
+    return 0
+
+
+def merge_sources(channels):
+    """Get the sources of channels without doubles, in order.
+
+    Args:
+        channels: list of m3uchannels, the kept channel first
+
+    Returns:
+        list of sources
+    """
+    sources = []
+    seen = set()
+    for ch in channels:
+        for source in ch.tvg_sources:
+            if source not in seen:
+                seen.add(source)
+                sources.append(source)
+    return sources
+
+
+def find_duplicates(stores, *, match_on="name_id", with_tag="", without_tag="", where=""):
+    """Group the channels of stores on their duplicate key.
+
+    Args:
+        stores: dict store name -> ProbeInfoList
+        match_on: name_id, name or id
+        with_tag: only channels with this tag
+        without_tag: only channels without this tag
+        where: filter expression
+
+    Returns:
+        list of groups with more than one channel, a group is a list of (store name, m3uchannel)
+
+    Raises:
+        FilterError: syntax error in where
+    """
+    groups = {}
+    for (store_name, store) in stores.items():
+        for ch in store.get_channels(with_tag=with_tag, without_tag=without_tag, where=where):
+            key = get_key(ch, match_on)
+            if key is None:
+                continue
+            members = groups.get(key)
+            if members is None:
+                groups[key] = [(store_name, ch)]
+            else:
+                members.append((store_name, ch))
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def dedupe_stores(stores, *, match_on="name_id", keep="first", with_tag="", without_tag="", where=""):
+    """Merge the duplicate channels of stores.
+
+    The kept channel gets the sources of all its duplicates, its own
+    sources first, the duplicates are removed from their stores. A kept
+    channel shared with another store is cloned first.
+
+    Args:
+        stores: dict store name -> ProbeInfoList
+        match_on: name_id, name or id
+        keep: first, last, best_probe or most_sources
+        with_tag: only channels with this tag
+        without_tag: only channels without this tag
+        where: filter expression
+
+    Returns:
+        list of merges, dicts with store, channel, merged (list of (store name, tvg_name)) and sources
+
+    Raises:
+        FilterError: syntax error in where
+    """
+    merges = []
+    removed = {store_name: [] for store_name in stores}
+    kept = {store_name: [] for store_name in stores}
+    for members in find_duplicates(stores, match_on=match_on, with_tag=with_tag, without_tag=without_tag, where=where):
+        survivor = pick_survivor(members, keep)
+        (store_name, ch) = members[survivor]
+        others = members[:survivor] + members[survivor + 1:]
+        merges.append((store_name, len(kept[store_name]), ch, others))
+        kept[store_name].append(ch)
+        for (other_store, other) in others:
+            removed[other_store].append(other)
+    # the kept channels get new sources, channels shared with other stores are cloned first
+    owned = {store_name: stores[store_name].own_channels(channels)
+             for (store_name, channels) in kept.items() if channels}
+    report = []
+    for (store_name, pos, ch, others) in merges:
+        sources = merge_sources([ch] + [other for (_, other) in others])
+        ch = owned[store_name][pos]
+        added = len(sources) - len(ch.tvg_sources)
+        ch.tvg_sources = sources
+        report.append({
+            'store': store_name,
+            'channel': ch,
+            'merged': [(other_store, other.tvg_name) for (other_store, other) in others],
+            'sources': added,
+        })
+    for (store_name, channels) in removed.items():
+        if channels:
+            stores[store_name].remove_channels(channels)
+    return report
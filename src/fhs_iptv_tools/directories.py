@@ -37,4 +37,24 @@ def get_probe_dir():
     return probe_dir
 
 
+def get_probe_db():
+    """Get probe cache database path.
 
+    Returns:
+        probe_db
+    """
+    data_dir = get_data_dir()
+    os.makedirs(data_dir, mode=0o750, exist_ok=True)
+    return os.path.join(data_dir, "probe_cache.sqlite3")
+
+
+def get_m3u_cache_dir():
+    """Get m3u cache dir for downloaded m3u files.
+
+    Returns:
+        m3u_cache_dir
+    """
+    data_dir = get_data_dir()
+    m3u_cache_dir = os.path.join(data_dir, "m3u_cache")
+    os.makedirs(m3u_cache_dir, mode=0o750, exist_ok=True)
+    return m3u_cache_dir
@@ -0,0 +1,186 @@
+"""Download m3u files over http(s) with a conditional-GET cache."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import requests
+
+from .directories import get_m3u_cache_dir
+from .import_m3u import iter_m3u_stream
+from .snapshot import SnapshotError, SnapshotWriter, iter_snapshot
+
+SESSION = None
+
+
+class DownloadError(Exception):
+    """Download of a m3u url or the read of its cache failed, after channels may have been read."""
+
+
+def is_url(m3u_file):
+    """Check if m3u_file is a http(s) url.
+
+    Args:
+        m3u_file: path or url
+
+    Returns:
+        url: boolean
+    """
+    return str(m3u_file)[:8].lower().startswith(('http://', 'https://'))
+
+
+def get_session():
+    """Get the shared requests session, so connections are pooled.
+
+    Returns:
+        requests.Session
+    """
+    global SESSION
+    if SESSION is None:
+        SESSION = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        SESSION.mount('http://', adapter)
+        SESSION.mount('https://', adapter)
+    return SESSION
+
+
+def get_cache_paths(url, cache_dir=None, keep_raw=False):
+    """Get the paths of the cache files for an url.
+
+    Args:
+        url: url of the m3u file
+        cache_dir: directory for the cache, default directories.get_m3u_cache_dir()
+        keep_raw: the cache has the original #EXTINF lines
+
+    Returns:
+        (meta_file, snapshot_file)
+    """
+    if cache_dir is None:
+        cache_dir = get_m3u_cache_dir()
+    hash_object = hashlib.sha1(f"{url}\nraw".encode() if keep_raw else url.encode())
+    base = os.path.join(cache_dir, hash_object.hexdigest())
+    return (f"{base}.json", f"{base}.snapshot")
+
+
+def load_cache_meta(meta_file, snapshot_file):
+    """Load the ETag and Last-Modified of the cached snapshot.
+
+    Args:
+        meta_file: json file with the headers
+        snapshot_file: snapshot with the parsed channels
+
+    Returns:
+        dict with etag and last_modified, empty if there is no usable cache
+    """
+    if not os.path.exists(snapshot_file):
+        return {}
+    try:
+        with Path(meta_file).open(encoding="UTF-8") as source:
+            return json.load(source)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache_meta(meta_file, meta):
+    """Save the ETag and Last-Modified of the cached snapshot.
+
+    The json is written to a temporary file and renamed in place, like
+    M3uWriter, so a reader never sees a partly written file.
+
+    Args:
+        meta_file: json file for the headers
+        meta: dict with the headers
+    """
+    (fd, tmp_file) = tempfile.mkstemp(dir=os.path.dirname(meta_file) or ".",
+                                      prefix=f".{os.path.basename(meta_file)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="UTF-8") as target:
+            json.dump(meta, target)
+        os.replace(tmp_file, meta_file)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def iter_m3u_url(url, cache_dir=None, session=None, timeout=(10, 60), keep_raw=False, header=None):
+    """Iterate over the channels of a m3u url.
+
+    The response is parsed while it is downloaded. The ETag and Last-Modified
+    headers are saved with a snapshot of the parsed channels, if the server
+    answers the next request with 304 Not Modified the snapshot is used and
+    nothing is downloaded or parsed. The #EXTM3U line is saved with the
+    headers.
+
+    Args:
+        url: http(s) url of the m3u file
+        cache_dir: directory for the cache, default directories.get_m3u_cache_dir()
+        session: requests session, default the shared session
+        timeout: requests timeout
+        keep_raw: keep the original #EXTINF line in raw_extinf
+        header: optional list, the #EXTM3U line is added to it
+
+    Yields:
+        m3uchannel
+
+    Raises:
+        DownloadError: the download or the cache failed partway, the channels yielded are only a part of the list
+    """
+    if session is None:
+        session = get_session()
+    (meta_file, snapshot_file) = get_cache_paths(url, cache_dir, keep_raw)
+    meta = load_cache_meta(meta_file, snapshot_file)
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = session.get(url, headers=headers, stream=True, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"ERROR: download of {url} failed: {e}")
+        return
+    with response:
+        if response.status_code == 304:
+            print(f"m3u url {url} not modified, using cache.")
+            if header is not None and meta.get('header'):
+                header.append(meta['header'])
+            try:
+                yield from iter_snapshot(snapshot_file)
+            except (OSError, SnapshotError) as e:
+                raise DownloadError(f"cache of {url} can't be read: {e}") from e
+            return
+        if response.status_code != 200:
+            print(f"ERROR: download of {url} failed with status {response.status_code}")
+            return
+        if 'charset' not in response.headers.get('content-type', '').lower():
+            response.encoding = 'utf-8'
+
+        writer = SnapshotWriter(snapshot_file)
+        m3u_header = []
+        completed = False
+        try:
+            for ch in iter_m3u_stream(response.iter_lines(decode_unicode=True), keep_raw, m3u_header):
+                if header is not None and m3u_header and not header:
+                    header.append(m3u_header[0])
+                writer.add(ch)
+                yield ch
+            completed = True
+        except requests.RequestException as e:
+            raise DownloadError(f"download of {url} failed: {e}") from e
+        finally:
+            if completed:
+                writer.close()
+                save_cache_meta(meta_file, {
+                    'url': url,
+                    'etag': response.headers.get('ETag', ''),
+                    'last_modified': response.headers.get('Last-Modified', ''),
+                    'header': m3u_header[0] if m3u_header else '',
+                })
+            else:
+                writer.abort()
@@ -0,0 +1,402 @@
+r"""Filter expressions for the where argument of the channel tasks.
+
+An expression is parsed and compiled once into a predicate on a channel,
+for example:
+
+    group == "NL Films" and not tag == keep
+    (name ~* "nl:" or name =~ "^\[NL\]") and probe.video.height >= 720
+    type == episode and season > 2
+
+Comparisons are field op value, combined with and, or, not and brackets.
+Operators are == != < <= > >=, ~ (contains), ~* (contains, case
+insensitive) and =~ (regex). A bool field (vod, probed) can be used on its
+own. tag == x is true when the channel has tag x. probe.<type>.<key> reads
+the probe info, like probe.video.codec or probe.audio.bit_rate. A
+comparison with a value the channel doesn't have is false.
+
+The store gets the candidate positions of the comparisons it has an index
+for, the predicate is then only run on those channels.
+"""
+
+import re
+from functools import lru_cache
+from operator import attrgetter, eq, ne, lt, le, gt, ge
+
+from .utils import get_matcher
+
+STRING_FIELDS = {
+    'id': attrgetter('tvg_id'),
+    'name': attrgetter('tvg_name'),
+    'group': attrgetter('tvg_group_title'),
+    'group_title': attrgetter('tvg_group_title'),
+    'logo': attrgetter('tvg_logo'),
+    'source': lambda ch: ch.tvg_sources[0] if ch.tvg_sources else "",
+    'info': attrgetter('fhs_info'),
+    'type': lambda ch: ch.classify().name.lower(),
+    'serie': attrgetter('serie_title'),
+}
+NUMBER_FIELDS = {
+    'season': attrgetter('season'),
+    'episode': attrgetter('episode'),
+}
+BOOL_FIELDS = {
+    'vod': attrgetter('vod'),
+    'probed': lambda ch: bool(ch.get_probe_dict()),
+}
+# fields the store can look up in its indexes, source and type only in its columnar table
+INDEX_FIELDS = {'id': 'tvg_id', 'name': 'tvg_name', 'group': 'tvg_group_title', 'group_title': 'tvg_group_title',
+                'source': 'tvg_source', 'type': 'tvg_type'}
+# the probe info uses 'with' for the width of the video
+PROBE_ALIASES = {'width': 'with'}
+
+COMPARE_OPERATORS = {'==': eq, '!=': ne, '<': lt, '<=': le, '>': gt, '>=': ge}
+MATCH_OPERATORS = {'~': 'substring', '~*': 'icase', '=~': 'regex'}
+
+TOKEN_REGEX = re.compile(r"""
+    \s*(?:
+        (?P<bracket>[()])
+      | (?P<op>==|!=|<=|>=|=~|~\*|~|<|>)
+      | "(?P<dquote>(?:[^"\\]|\\.)*)"
+      | '(?P<squote>(?:[^'\\]|\\.)*)'
+      | (?P<word>[^\s()"'=!<>~]+)
+    )""", re.VERBOSE)
+
+
+class FilterError(ValueError):
+    """Error in a filter expression."""
+
+
+def tokenize(text):
+    """Split a filter expression in tokens.
+
+    Args:
+        text: filter expression
+
+    Returns:
+        list of (kind, value), kind is bracket, op, string or word
+
+    Raises:
+        FilterError: unknown character
+    """
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = TOKEN_REGEX.match(text, pos)
+        if m is None or m.end() == pos:
+            raise FilterError(f"unexpected character at position {pos}: {text[pos:pos + 10]}")
+        pos = m.end()
+        if m.group('bracket') is not None:
+            tokens.append(('bracket', m.group('bracket')))
+        elif m.group('op') is not None:
+            tokens.append(('op', m.group('op')))
+        elif m.group('dquote') is not None:
+            tokens.append(('string', re.sub(r'\\(.)', r'\1', m.group('dquote'))))
+        elif m.group('squote') is not None:
+            tokens.append(('string', re.sub(r'\\(.)', r'\1', m.group('squote'))))
+        else:
+            tokens.append(('word', m.group('word')))
+    return tokens
+
+
+class Parser:
+    def __init__(self, text):
+        """Initiate class.
+
+        Args:
+            text: filter expression
+        """
+        self._text = text
+        self._tokens = tokenize(text)
+        self._pos = 0
+
+    def _peek(self):
+        """Get the next token without using it.
+
+        Returns:
+            (kind, value) or (None, None) at the end
+        """
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return (None, None)
+
+    def _next(self):
+        """Use the next token.
+
+        Returns:
+            (kind, value)
+
+        Raises:
+            FilterError: end of the expression
+        """
+        token = self._peek()
+        if token[0] is None:
+            raise FilterError(f"unexpected end of filter: {self._text}")
+        self._pos += 1
+        return token
+
+    def _keyword(self, keyword):
+        """Use the next token if it is a keyword.
+
+        Args:
+            keyword: and, or or not
+
+        Returns:
+            boolean, keyword found
+        """
+        (kind, value) = self._peek()
+        if kind == 'word' and value.lower() == keyword:
+            self._pos += 1
+            return True
+        return False
+
+    def parse(self):
+        """Parse the expression.
+
+        Returns:
+            tree of tuples: ('and', [nodes]), ('or', [nodes]), ('not', node),
+            ('cmp', field, op, value) or ('bool', field)
+
+        Raises:
+            FilterError: syntax error
+        """
+        node = self._parse_or()
+        if self._peek()[0] is not None:
+            raise FilterError(f"unexpected {self._peek()[1]} in filter: {self._text}")
+        return node
+
+    def _parse_or(self):
+        nodes = [self._parse_and()]
+        while self._keyword('or'):
+            nodes.append(self._parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def _parse_and(self):
+        nodes = [self._parse_not()]
+        while self._keyword('and'):
+            nodes.append(self._parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def _parse_not(self):
+        if self._keyword('not'):
+            return ('not', self._parse_not())
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        (kind, value) = self._next()
+        if kind == 'bracket' and value == '(':
+            node = self._parse_or()
+            if self._next() != ('bracket', ')'):
+                raise FilterError(f"missing ) in filter: {self._text}")
+            return node
+        if kind != 'word':
+            raise FilterError(f"expected a field and not {value} in filter: {self._text}")
+        field = value.lower()
+        if self._peek()[0] != 'op':
+            if field not in BOOL_FIELDS:
+                raise FilterError(f"expected an operator after {value} in filter: {self._text}")
+            return ('bool', field)
+        op = self._next()[1]
+        (kind, value) = self._next()
+        if kind not in ('word', 'string'):
+            raise FilterError(f"expected a value after {op} in filter: {self._text}")
+        return ('cmp', field, op, convert_value(field, op, kind, value))
+
+
+def convert_value(field, op, kind, value):
+    """Convert the value of a comparison to the type of the field.
+
+    Args:
+        field: field name
+        op: operator
+        kind: word or string, a quoted string is never converted
+        value: value as text
+
+    Returns:
+        value
+
+    Raises:
+        FilterError: unknown field or invalid value
+    """
+    if op in MATCH_OPERATORS or field in STRING_FIELDS or field == 'tag':
+        if field not in STRING_FIELDS and field != 'tag' and not field.startswith('probe.'):
+            raise FilterError(f"{op} is only for text fields and not for {field}")
+        return value
+    if field in BOOL_FIELDS:
+        if value.lower() not in ('true', 'false', 'yes', 'no'):
+            raise FilterError(f"{field} can only be compared with true or false")
+        return value.lower() in ('true', 'yes')
+    if field in NUMBER_FIELDS and kind == 'string':
+        raise FilterError(f"{field} can only be compared with a number")
+    if field not in NUMBER_FIELDS and not field.startswith('probe.'):
+        raise FilterError(f"unknown field {field}")
+    if kind == 'string':
+        return value
+    for number_type in (int, float):
+        try:
+            return number_type(value)
+        except ValueError:
+            pass
+    if field in NUMBER_FIELDS:
+        raise FilterError(f"{field} can only be compared with a number")
+    return value
+
+
+def probe_getter(field):
+    """Get a function that reads a value from the probe info.
+
+    Args:
+        field: probe.<codec type>.<key>
+
+    Returns:
+        function channel -> value or None
+    """
+    path = [PROBE_ALIASES.get(part, part) for part in field.split('.')[1:]]
+
+    def getter(ch):
+        value = ch.get_probe_dict()
+        for part in path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+        return value
+    return getter
+
+
+def compile_compare(field, op, value):
+    """Compile a comparison.
+
+    Args:
+        field: field name
+        op: operator
+        value: value, converted to the type of the field
+
+    Returns:
+        function channel -> boolean
+    """
+    if field == 'tag':
+        if op == '==':
+            return lambda ch: ch.has_tag(value)
+        if op == '!=':
+            return lambda ch: not ch.has_tag(value)
+        raise FilterError("tag can only be compared with == or !=")
+    if field.startswith('probe.'):
+        getter = probe_getter(field)
+    else:
+        getter = STRING_FIELDS.get(field) or NUMBER_FIELDS.get(field) or BOOL_FIELDS[field]
+    if op in MATCH_OPERATORS:
+        try:
+            matcher = get_matcher(value, MATCH_OPERATORS[op])
+        except re.error as error:
+            raise FilterError(f"invalid regex {value}: {error}") from error
+
+        def match(ch):
+            found = getter(ch)
+            return found is not None and bool(matcher(str(found)))
+        return match
+    compare = COMPARE_OPERATORS[op]
+
+    def test(ch):
+        found = getter(ch)
+        if found is None:
+            return False
+        try:
+            return compare(found, value)
+        except TypeError:
+            return False
+    return test
+
+
+def compile_node(node):
+    """Compile a parsed expression.
+
+    Args:
+        node: tree from Parser.parse
+
+    Returns:
+        function channel -> boolean
+    """
+    kind = node[0]
+    if kind == 'cmp':
+        return compile_compare(node[1], node[2], node[3])
+    if kind == 'bool':
+        return BOOL_FIELDS[node[1]]
+    if kind == 'not':
+        inner = compile_node(node[1])
+        return lambda ch: not inner(ch)
+    predicates = [compile_node(child) for child in node[1]]
+    predicate = predicates[0]
+    for other in predicates[1:]:
+        if kind == 'and':
+            predicate = (lambda a, b: lambda ch: a(ch) and b(ch))(predicate, other)
+        else:
+            predicate = (lambda a, b: lambda ch: a(ch) or b(ch))(predicate, other)
+    return predicate
+
+
+class ChannelFilter:
+    def __init__(self, text):
+        """Initiate class, parse and compile the expression.
+
+        Args:
+            text: filter expression
+
+        Raises:
+            FilterError: syntax error
+        """
+        self.text = text
+        self.tree = Parser(text).parse()
+        self.match = compile_node(self.tree)
+
+    def candidates(self, lookup, node=None):
+        """Get the positions of the channels that can match, from the indexes of the store.
+
+        Args:
+            lookup: function (field, op, value) -> sorted list of positions, or None without index
+            node: part of the tree, None for the whole expression
+
+        Returns:
+            sorted list of positions, or None for all channels
+        """
+        if node is None:
+            node = self.tree
+        kind = node[0]
+        if kind == 'cmp':
+            (_, field, op, value) = node
+            if field == 'tag' and op == '==':
+                return lookup('tag', op, value)
+            if field in INDEX_FIELDS and op in ('==', '~', '~*'):
+                return lookup(INDEX_FIELDS[field], op, value)
+            return None
+        if kind == 'and':
+            found = None
+            for child in node[1]:
+                positions = self.candidates(lookup, child)
+                if positions is not None:
+                    found = set(positions) if found is None else found.intersection(positions)
+            return sorted(found) if found is not None else None
+        if kind == 'or':
+            found = set()
+            for child in node[1]:
+                positions = self.candidates(lookup, child)
+                if positions is None:
+                    return None
+                found.update(positions)
+            return sorted(found)
+        return None
+
+
+@lru_cache(maxsize=128)
+def compile_where(text):
+    """Get the compiled filter of an expression, cached for all tasks of a playbook.
+
+    Args:
+        text: filter expression
+
+    Returns:
+        ChannelFilter
+
+    Raises:
+        FilterError: syntax error
+    """
+    return ChannelFilter(text)
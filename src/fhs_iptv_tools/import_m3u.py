@@ -1,7 +1,15 @@
 """Import m3u files."""
 
+import hashlib
+import mmap
+import os
 import re
-from dataclasses import dataclass, field
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from sys import intern
+from types import MappingProxyType
 from .subgroup import subgroup_vod_only
 from enum import Enum
 
@@ -15,97 +23,898 @@ class ChannelType(Enum):
     MOVIE = 3
 
 
-@dataclass
+EMPTY_TAGS = frozenset()
+EMPTY_DICT = MappingProxyType({})
+
+
 class M3uChannel:
-    """Class for M3uChannel."""
+    """Class for M3uChannel.
 
-    tvg_id: str
-    tvg_name: str
-    tvg_logo: str
-    tvg_group_title: str
-    vod: bool = False
-    tvg_sources: list = field(default_factory=list)
-    tvg_type: ChannelType = ChannelType.UNKNOWN
-    fhs_selected: bool = False
-    fhs_tags: set = field(default_factory=set)
-    fhs_dict: dict = field(default_factory=dict)
+    Uses __slots__ instead of a __dict__ per channel, and tvg_sources, fhs_tags
+    and fhs_dict are only allocated the first time they are used. Use has_tag,
+    add_tag, remove_tag, get_tags and get_probe_dict to check or read them
+    without allocating.
 
+    raw_extinf is the original #EXTINF line when the m3u file is loaded with
+    keep_raw, dirty is set when tvg_id, tvg_name, tvg_logo or tvg_group_title
+    are changed after loading, see mark_dirty.
 
-def import_m3u_stream(input_str):
-    """Import m3u stream.
+    The channel type and the serie title, season and episode of an episode are
+    determined once by classify and cached on the channel, call clear_type
+    after changing tvg_name or vod.
+
+    copy_channels shares a channel between stores instead of copying it, the
+    store that changes or tags a shared channel first replaces it with a
+    private clone, see share, release and clone.
+    """
+
+    FIELDS = (
+        'tvg_id', 'tvg_name', 'tvg_logo', 'tvg_group_title', 'vod', 'tvg_sources', 'tvg_type',
+        'fhs_selected', 'fhs_tags', 'fhs_dict', 'fhs_info', 'raw_extinf', 'dirty'
+    )
+    __slots__ = (
+        'tvg_id', 'tvg_name', 'tvg_logo', 'tvg_group_title', 'vod', '_tvg_sources', 'tvg_type',
+        'fhs_selected', '_fhs_tags', '_fhs_dict', 'fhs_info', 'raw_extinf', 'dirty', '_serie', '_shared'
+    )
+
+    def __init__(self, tvg_id, tvg_name, tvg_logo, tvg_group_title, vod=False, tvg_sources=None,
+                 tvg_type=ChannelType.UNKNOWN, fhs_selected=False, fhs_tags=None, fhs_dict=None, fhs_info="",
+                 raw_extinf="", dirty=False):
+        """Initiate class.
+
+        Args:
+            tvg_id: channel id
+            tvg_name: channel name
+            tvg_logo: url to channel logo
+            tvg_group_title: channel group
+            vod: vod or channel
+            tvg_sources: list of sources
+            tvg_type: ChannelType
+            fhs_selected: selected
+            fhs_tags: set of tags
+            fhs_dict: probe info dict
+            fhs_info: probe info string
+            raw_extinf: original #EXTINF line
+            dirty: changed after loading
+        """
+        self.tvg_id = tvg_id
+        self.tvg_name = tvg_name
+        self.tvg_logo = tvg_logo
+        self.tvg_group_title = tvg_group_title
+        self.vod = vod
+        self._tvg_sources = tvg_sources or None
+        self.tvg_type = tvg_type
+        self.fhs_selected = fhs_selected
+        self._fhs_tags = fhs_tags or None
+        self._fhs_dict = fhs_dict or None
+        self.fhs_info = fhs_info
+        self.raw_extinf = raw_extinf
+        self.dirty = dirty
+        self._serie = None
+        self._shared = 0
+
+    @property
+    def tvg_sources(self):
+        """Get list of sources.
+
+        Returns:
+            list of sources
+        """
+        if self._tvg_sources is None:
+            self._tvg_sources = []
+        return self._tvg_sources
+
+    @tvg_sources.setter
+    def tvg_sources(self, value):
+        self._tvg_sources = value
+
+    @property
+    def fhs_tags(self):
+        """Get set of tags.
+
+        Returns:
+            set of tags
+        """
+        if self._fhs_tags is None:
+            self._fhs_tags = set()
+        return self._fhs_tags
+
+    @fhs_tags.setter
+    def fhs_tags(self, value):
+        self._fhs_tags = value
+
+    @property
+    def fhs_dict(self):
+        """Get probe info dict.
+
+        Returns:
+            dict with probe info
+        """
+        if self._fhs_dict is None:
+            self._fhs_dict = {}
+        return self._fhs_dict
+
+    @fhs_dict.setter
+    def fhs_dict(self, value):
+        self._fhs_dict = value
+
+    def has_tag(self, tag):
+        """Check if tag is set.
+
+        Args:
+            tag: tag to check
+
+        Returns:
+            boolean
+        """
+        return self._fhs_tags is not None and tag in self._fhs_tags
+
+    def add_tag(self, tag):
+        """Set tag.
+
+        Args:
+            tag: tag to set
+        """
+        self.fhs_tags.add(tag)
+
+    def remove_tag(self, tag):
+        """Remove tag.
+
+        Args:
+            tag: tag to remove
+
+        Returns:
+            boolean, True if the tag was set
+        """
+        if self._fhs_tags is None or tag not in self._fhs_tags:
+            return False
+        self._fhs_tags.remove(tag)
+        return True
+
+    def get_tags(self):
+        """Get the tags to read, without allocating a set.
+
+        Returns:
+            set of tags, or an empty frozenset
+        """
+        return self._fhs_tags or EMPTY_TAGS
+
+    def get_probe_dict(self):
+        """Get the probe info dict to read, without allocating a dict.
+
+        Returns:
+            dict with probe info, or an empty read only dict
+        """
+        return self._fhs_dict or EMPTY_DICT
+
+    def mark_dirty(self):
+        """Mark the channel as changed, raw_extinf no longer matches the fields."""
+        self.dirty = True
+
+    def classify(self, compiled_regex=None):
+        """Get the channel type, determine it the first time.
+
+        Args:
+            compiled_regex: optional re.compile regex, default SERIE_REGEX
+
+        Returns:
+            ChannelType value
+        """
+        if self.tvg_type is ChannelType.UNKNOWN:
+            self.tvg_type = check_type_channel(self, compiled_regex)
+        return self.tvg_type
+
+    def get_serie(self):
+        """Get serie title, season and episode, determine them the first time.
+
+        Returns:
+            (serie_title, season, episode) or None if this is no episode
+        """
+        if self._serie is None:
+            self._serie = False
+            if self.vod is True:
+                m = SERIE_REGEX.search(self.tvg_name)
+                if m is not None:
+                    self._serie = (intern(m.group(1).strip()), int(m.group(2)), int(m.group(3)))
+        return self._serie or None
+
+    @property
+    def serie_title(self):
+        """Get serie title.
+
+        Returns:
+            serie title or None if this is no episode
+        """
+        serie = self.get_serie()
+        return serie[0] if serie else None
+
+    @property
+    def season(self):
+        """Get season number.
+
+        Returns:
+            season or None if this is no episode
+        """
+        serie = self.get_serie()
+        return serie[1] if serie else None
+
+    @property
+    def episode(self):
+        """Get episode number.
+
+        Returns:
+            episode or None if this is no episode
+        """
+        serie = self.get_serie()
+        return serie[2] if serie else None
+
+    def clear_type(self):
+        """Forget the channel type and serie info, after tvg_name or vod changed."""
+        self.tvg_type = ChannelType.UNKNOWN
+        self._serie = None
+
+    def share(self):
+        """Share the channel with one more store.
+
+        Returns:
+            the channel itself
+        """
+        self._shared += 1
+        return self
+
+    def release(self):
+        """Release the channel by one of the stores that share it."""
+        if self._shared > 0:
+            self._shared -= 1
+
+    def is_shared(self):
+        """Check if more than one store has the channel.
+
+        Returns:
+            boolean
+        """
+        return self._shared > 0
+
+    def clone(self):
+        """Get a private copy, with its own sources, tags and probe info.
+
+        Returns:
+            m3uchannel
+        """
+        new = M3uChannel.__new__(M3uChannel)
+        new.tvg_id = self.tvg_id
+        new.tvg_name = self.tvg_name
+        new.tvg_logo = self.tvg_logo
+        new.tvg_group_title = self.tvg_group_title
+        new.vod = self.vod
+        new._tvg_sources = list(self._tvg_sources) if self._tvg_sources else None
+        new.tvg_type = self.tvg_type
+        new.fhs_selected = self.fhs_selected
+        new._fhs_tags = set(self._fhs_tags) if self._fhs_tags else None
+        new._fhs_dict = dict(self._fhs_dict) if self._fhs_dict else None
+        new.fhs_info = self.fhs_info
+        new.raw_extinf = self.raw_extinf
+        new.dirty = self.dirty
+        new._serie = self._serie
+        new._shared = 0
+        return new
+
+    def field_values(self):
+        """Get the values of all fields, without allocating.
+
+        Returns:
+            tuple with the values in the order of FIELDS
+        """
+        return (
+            self.tvg_id, self.tvg_name, self.tvg_logo, self.tvg_group_title, self.vod, self._tvg_sources or [],
+            self.tvg_type, self.fhs_selected, self._fhs_tags or set(), self._fhs_dict or {}, self.fhs_info,
+            self.raw_extinf, self.dirty
+        )
+
+    def __repr__(self):
+        """Represent channel like a dataclass.
+
+        Returns:
+            string
+        """
+        values = ", ".join(f"{name}={value!r}" for (name, value) in zip(self.FIELDS, self.field_values()))
+        return f"{self.__class__.__name__}({values})"
+
+    def __eq__(self, other):
+        """Compare channels on all fields.
+
+        Args:
+            other: other channel
+
+        Returns:
+            boolean
+        """
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.field_values() == other.field_values()
+
+
+# the layout most providers use, [^"]* can't backtrack so this is a single linear match.
+STANDARD_EXTINF = re.compile('#EXTINF:-1 tvg-id="([^"]*)" tvg-name="([^"]*)" tvg-logo="([^"]*)" group-title="([^"]*)",(.*)', re.IGNORECASE)  # noqa: E501
+
+
+def parse_extinf_tokens(segment, attributes, keep_case=False):
+    """Add unquoted key=value tokens to attributes.
 
     Args:
-        input_str: file handler to read
+        segment: part of a #EXTINF line outside quotes
+        attributes: dict to add the attributes to
+        keep_case: keep the case of the keys, default lowercase
+    """
+    for token in segment.split():
+        (key, equal, value) = token.partition('=')
+        if equal != '' and value != '':
+            attributes[key if keep_case else key.lower()] = value
+
+
+def parse_extinf(line, keep_case=False):
+    """Parse a #EXTINF line.
+
+    Tokenize the key="value" attributes in a single scan, attributes can be in
+    any order and unknown attributes (tvg-chno, catchup, ...) are returned as well.
+    Splitting on the quotes gives the text outside the quotes on the even
+    positions (ending with the key=) and the values on the odd positions, the
+    title starts at the first comma outside the quotes.
+    The most common layout is matched first with an anchored pattern that
+    can't backtrack.
+
+    Args:
+        line: line to parse
+        keep_case: keep the case of the keys, default lowercase
 
     Returns:
-        list of m3uchannel
+        (dict with attributes, title) or None if this is no #EXTINF line
     """
-    m3uchannels = []
-    # regex found on iptv-filter
-    infopattern = re.compile('(?i)#EXTINF:-1 tvg-id="(.*?)" tvg-name="(.*?)" tvg-logo="(.*?)" group-title="(.*?)",(.*?)')  # noqa: E501,BLK100
-    urlpattern = re.compile('(?i)^http')
-    for line in input_str:
-        clean_line = line.rstrip()
-        m = infopattern.findall(clean_line)
-        if len(m) > 0:
-            # #EXTINF line
-            tvg_id = m[0][0]
-            tvg_name = m[0][1]
-            tvg_logo = m[0][2]
-            tvg_group_title = m[0][3]
-            m3uchannels.append(M3uChannel(tvg_id=tvg_id, tvg_name=tvg_name.strip(), tvg_logo=tvg_logo, tvg_group_title=tvg_group_title.strip()))  # noqa: E501
+    if line[:8].upper() != '#EXTINF:':
+        return None
+    m = None if keep_case else STANDARD_EXTINF.match(line)
+    if m is not None:
+        (tvg_id, tvg_name, tvg_logo, group_title, title) = m.groups()
+        attributes = {'tvg-id': tvg_id, 'tvg-name': tvg_name, 'tvg-logo': tvg_logo, 'group-title': group_title}
+        return (attributes, title.strip())
+
+    parts = line.split('"')
+    keys = parts[0:-1:2]
+    # fast path, every text outside the quotes ends with key= and the title is after the last value
+    key_text = '"'.join(keys) + '"'
+    tail = parts[-1]
+    comma = tail.find(',')
+    if (comma != -1 and ',' not in key_text and '=' not in tail[:comma]
+            and key_text.count('=') == len(keys) == key_text.count('="')):
+        if keys:
+            keys[0] = keys[0][8:]
+        if keep_case:
+            attributes = {k[k.rfind(' ') + 1:-1]: v for (k, v) in zip(keys, parts[1::2])}
         else:
-            if urlpattern.match(clean_line):
+            attributes = {k[k.rfind(' ') + 1:-1].lower(): v for (k, v) in zip(keys, parts[1::2])}
+        return (attributes, tail[comma + 1:].strip())
+
+    attributes = {}
+    last = len(parts) - 1
+    start = 8
+    for i in range(0, len(parts), 2):
+        part = parts[i]
+        comma = part.find(',', start)
+        if comma != -1:
+            if '=' in part[start:comma]:
+                parse_extinf_tokens(part[start:comma], attributes, keep_case)
+            parts[i] = part[comma + 1:]
+            return (attributes, '"'.join(parts[i:]).strip())
+        if i == last:
+            break
+        if part[-1:] == '=':
+            space = part.rfind(' ', start)
+            if space == -1:
+                space = start - 1
+            elif '=' in part[start:space]:
+                parse_extinf_tokens(part[start:space], attributes, keep_case)
+            key = part[space + 1:-1]
+            attributes[key if keep_case else key.lower()] = parts[i + 1]
+        start = 0
+    return (attributes, '')
+
+
+def iter_m3u_stream(input_str, keep_raw=False, header=None):
+    """Iterate over a m3u stream.
+
+    A channel is yielded as soon as its entry is complete, that is when the
+    next #EXTINF line or the end of the stream is reached, so the whole
+    playlist never has to be in memory. The #EXTM3U line comes before the
+    first #EXTINF line, so it is in header before the first channel is
+    yielded.
+
+    Args:
+        input_str: file handler (or any iterable of lines) to read
+        keep_raw: keep the original #EXTINF line in raw_extinf
+        header: optional list, the #EXTM3U line (with attributes like url-tvg) is added to it
+
+    Yields:
+        m3uchannel
+    """
+    channel = None
+    for line in input_str:
+        if line[:1] != '#':
+            if channel is not None and line[:4].lower() == 'http':
                 # This is the URL Line
-                m3uchannels[-1].tvg_sources.append(clean_line)
+                clean_line = line.rstrip()
+                channel.tvg_sources.append(clean_line)
                 if clean_line.endswith(('.mkv', '.avi', '.mp4')) is True:
-                    m3uchannels[-1].vod = True
+                    channel.vod = True
+            continue
+        extinf = line.rstrip()
+        info = parse_extinf(extinf)
+        if info is None:
+            # other directive like #EXTM3U or #EXTGRP
+            if header is not None and not header and extinf[:7].upper() == '#EXTM3U':
+                header.append(extinf)
+            continue
+        if channel is not None:
+            yield channel
+        (attributes, title) = info
+        tvg_name = attributes.get('tvg-name', '').strip()
+        if tvg_name == '':
+            tvg_name = title
+        # group titles and logos are repeated a lot, intern them so they are stored once
+        channel = M3uChannel(
+            attributes.get('tvg-id', ''),
+            tvg_name,
+            intern(attributes.get('tvg-logo', '')),
+            intern(attributes.get('group-title', '').strip()),
+            raw_extinf=extinf if keep_raw else ""
+        )
+    if channel is not None:
+        yield channel
+
+
+def import_m3u_stream(input_str, keep_raw=False):
+    """Import m3u stream.
+
+    Args:
+        input_str: file handler to read
+        keep_raw: keep the original #EXTINF line in raw_extinf
+
+    Returns:
+        list of m3uchannel
+    """
+    m3uchannels = list(iter_m3u_stream(input_str, keep_raw))
     if len(m3uchannels) == 0:
         return None
     return m3uchannels
 
 
-def import_m3u_file(m3u_file):
+def iter_m3u_file(m3u_file, keep_raw=False, header=None):
+    """Iterate over the channels in a m3u_file.
+
+    Args:
+        m3u_file: path or http(s) url to m3u file with channels/vod
+        keep_raw: keep the original #EXTINF line in raw_extinf
+        header: optional list, the #EXTM3U line is added to it
+
+    Yields:
+        m3uchannel
+    """
+    from .download_m3u import is_url, iter_m3u_url
+
+    if is_url(m3u_file):
+        yield from iter_m3u_url(m3u_file, keep_raw=keep_raw, header=header)
+        return
+    try:
+        with open(m3u_file, 'r') as input_stream:
+            yield from iter_m3u_stream(input_stream, keep_raw, header)
+    except FileNotFoundError:
+        print(f"file {m3u_file} not found.")
+
+
+def import_m3u_file(m3u_file, keep_raw=False):
     """Import m3u_file.
 
+    Args:
+        m3u_file: path or http(s) url to m3u file with channels/vod
+        keep_raw: keep the original #EXTINF line in raw_extinf
+
+    Returns:
+        returns list op channnels/vods
+    """
+    m3uchannels = list(iter_m3u_file(m3u_file, keep_raw))
+    if len(m3uchannels) == 0:
+        return None
+    return m3uchannels
+
+
+# the start of an #EXTINF line, in any case like parse_extinf
+EXTINF_LINE = re.compile(rb'\n#extinf:', re.IGNORECASE)
+
+
+def split_m3u_ranges(mm, chunks):
+    """Split a m3u file in byte ranges that start on a #EXTINF line.
+
+    The #EXTINF tag is matched in any case, like the line parser does.
+
+    Args:
+        mm: mmap (or bytes) of the m3u file
+        chunks: amount of ranges wanted
+
+    Returns:
+        list of (start, end) tuples
+    """
+    size = len(mm)
+    bounds = [0]
+    for i in range(1, chunks):
+        found = EXTINF_LINE.search(mm, max(size * i // chunks, bounds[-1]))
+        if found is None:
+            break
+        pos = found.start()
+        if pos + 1 > bounds[-1]:
+            bounds.append(pos + 1)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def channels_to_columns(m3u_channels):
+    """Convert channels to columns of strings.
+
+    A few lists of strings are much cheaper to pickle between processes
+    than a list of M3uChannel objects.
+
+    Args:
+        m3u_channels: list of m3uchannels
+
+    Returns:
+        tuple of columns
+    """
+    return (
+        [ch.tvg_id for ch in m3u_channels],
+        [ch.tvg_name for ch in m3u_channels],
+        [ch.tvg_logo for ch in m3u_channels],
+        [ch.tvg_group_title for ch in m3u_channels],
+        bytes(ch.vod for ch in m3u_channels),
+        ['\n'.join(ch.tvg_sources) for ch in m3u_channels],
+        [ch.raw_extinf for ch in m3u_channels],
+    )
+
+
+def channels_from_columns(columns):
+    """Convert columns from channels_to_columns back to channels.
+
+    Args:
+        columns: tuple of columns
+
+    Returns:
+        list of m3uchannels
+    """
+    return [
+        M3uChannel(tvg_id, tvg_name, intern(tvg_logo), intern(tvg_group_title), vod == 1,
+                   sources.split('\n') if sources else None, raw_extinf=raw_extinf)
+        for (tvg_id, tvg_name, tvg_logo, tvg_group_title, vod, sources, raw_extinf) in zip(*columns)
+    ]
+
+
+def parse_m3u_range(m3u_file, start, end, channel_filter=None, keep_raw=False):
+    """Parse a byte range of a m3u file, used by the worker processes.
+
+    Args:
+        m3u_file: path to m3u file
+        start: first byte of the range
+        end: end of the range
+        channel_filter: optional function to filter an iterable of channels
+        keep_raw: keep the original #EXTINF line in raw_extinf
+
+    Returns:
+        columns of the m3uchannels, see channels_to_columns
+    """
+    with open(m3u_file, 'rb') as input_stream:
+        with mmap.mmap(input_stream.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode('utf-8', errors='replace')
+    channels = iter_m3u_stream(text.split('\n'), keep_raw)
+    if channel_filter is not None:
+        channels = channel_filter(channels)
+    return channels_to_columns(list(channels))
+
+
+def import_m3u_file_parallel(m3u_file, workers=None, channel_filter=None, keep_raw=False, header=None):
+    """Import a large m3u_file with a pool of processes.
+
+    The file is memory mapped and split in ranges on #EXTINF boundaries, every
+    range is parsed in a worker process and the results are merged in the
+    original order.
+
     Args:
         m3u_file: path to m3u file with channels/vod
+        workers: amount of processes, default amount of cpus
+        channel_filter: optional picklable function to filter an iterable of channels in the workers
+        keep_raw: keep the original #EXTINF line in raw_extinf
+        header: optional list, the #EXTM3U line is added to it
 
     Returns:
         returns list op channnels/vods
     """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 2:
+        channels = iter_m3u_file(m3u_file, keep_raw, header)
+        if channel_filter is not None:
+            channels = channel_filter(channels)
+        return list(channels) or None
     try:
-        with open(m3u_file, 'r') as input_stream:
-            return (import_m3u_stream(input_stream))
+        with open(m3u_file, 'rb') as input_stream:
+            if os.fstat(input_stream.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(input_stream.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                ranges = split_m3u_ranges(mm, workers * 4)
+                if header is not None:
+                    # the workers skip the #EXTM3U line, it is read here
+                    first_line = mm[:mm.find(b'\n')].decode('utf-8', errors='replace').rstrip()
+                    if first_line[:7].upper() == '#EXTM3U':
+                        header.append(first_line)
     except FileNotFoundError:
         print(f"file {m3u_file} not found.")
-    return None
+        return None
+
+    m3uchannels = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(parse_m3u_range, m3u_file, start, end, channel_filter, keep_raw)
+                   for (start, end) in ranges]
+        for future in futures:
+            m3uchannels.extend(channels_from_columns(future.result()))
+    if len(m3uchannels) == 0:
+        return None
+    return m3uchannels
+
+
+EXPORT_BUFFER_SIZE = 1024 * 1024
+M3U_HEADER = "#EXTM3U"
+
+
+def update_extinf(ch):
+    """Render the #EXTINF line of a changed channel from its raw_extinf.
+
+    The duration and the other attributes of the original line are kept,
+    with the case of their keys, tvg-id, tvg-name, tvg-logo and group-title
+    get the values of the channel.
+
+    Args:
+        ch: m3uchannel with raw_extinf
+
+    Returns:
+        str: #EXTINF line without newline
+    """
+    raw = ch.raw_extinf
+    (attributes, _) = parse_extinf(raw, keep_case=True)
+    duration = raw[8:].split(' ', 1)[0].split(',', 1)[0] or '-1'
+    keys = {key.lower(): key for key in attributes}
+    for (key, value) in (('tvg-id', ch.tvg_id), ('tvg-name', ch.tvg_name), ('tvg-logo', ch.tvg_logo),
+                         ('group-title', ch.tvg_group_title)):
+        attributes[keys.get(key, key)] = value
+    values = " ".join(f'{key}="{value}"' for (key, value) in attributes.items())
+    return f"#EXTINF:{duration} {values},{ch.tvg_name}"
+
 
+def render_channel(ch):
+    """Render the m3u lines of a channel.
 
-def export_m3u_file(m3u_file, m3u_channels):
+    A channel with a raw_extinf that is not changed is written verbatim.
+
+    Args:
+        ch: m3uchannel
+
+    Returns:
+        str: #EXTINF line and source lines, each ending with a newline
+    """
+    sources = ch.tvg_sources
+    if len(sources) == 1:
+        sources = f"{sources[0]}\n"
+    else:
+        sources = "".join([f"{source}\n" for source in sources])
+    if ch.raw_extinf:
+        if not ch.dirty:
+            return f"{ch.raw_extinf}\n{sources}"
+        return f"{update_extinf(ch)}\n{sources}"
+    return f'#EXTINF:-1 tvg-id="{ch.tvg_id}" tvg-name="{ch.tvg_name}" tvg-logo="{ch.tvg_logo}" group-title="{ch.tvg_group_title}",{ch.tvg_name}\n{sources}'  # noqa: E501
+
+
+def file_sha256(file, size=EXPORT_BUFFER_SIZE):
+    """Get the sha256 of a file.
+
+    Args:
+        file: file to hash
+        size: size of the chunks to read
+
+    Returns:
+        hexdigest or None if the file can't be read
+    """
+    file_hash = hashlib.sha256()
+    try:
+        with open(file, "rb") as source:
+            for chunk in iter(partial(source.read, size), b""):
+                file_hash.update(chunk)
+    except OSError:
+        return None
+    return file_hash.hexdigest()
+
+
+def get_umask():
+    """Get the umask of the process.
+
+    Returns:
+        umask
+    """
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+class M3uWriter:
+    def __init__(self, m3u_file, buffer_size=EXPORT_BUFFER_SIZE, header=""):
+        """Initiate class.
+
+        Channels are rendered in a buffer that is written in chunks of
+        buffer_size bytes to a temporary file. On close the temporary file is
+        fsynced and renamed over m3u_file, unless m3u_file already has the
+        same content, then m3u_file is left alone so the mtime doesn't change.
+
+        Args:
+            m3u_file: path to m3u file to write
+            buffer_size: size of the chunks to write
+            header: the #EXTM3U line of the loaded m3u file, default a plain #EXTM3U
+        """
+        self._m3u_file = m3u_file
+        # a unique temporary file in the same directory, so writers of the same file don't collide
+        (fd, self._tmp_file) = tempfile.mkstemp(dir=os.path.dirname(m3u_file) or ".",
+                                                prefix=f".{os.path.basename(m3u_file)}.", suffix=".tmp")
+        self._buffer_size = buffer_size
+        self._target = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self._parts = []
+        self._pending = 0
+        self.bytes_written = 0
+        self.count = 0
+        self.skipped = False
+        self.write_lines(f"{header or M3U_HEADER}\n")
+
+    def __enter__(self):
+        """Enter context.
+
+        Returns:
+            self
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Exit context, only replace the m3u file if there was no exception.
+
+        Args:
+            exc_type: exception type
+            exc_value: exception
+            traceback: traceback
+        """
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write_lines(self, lines):
+        """Add lines to the buffer, write the buffer when it is full.
+
+        Args:
+            lines: str with lines ending with a newline
+        """
+        self._parts.append(lines)
+        self._pending += len(lines)
+        if self._pending >= self._buffer_size:
+            self.flush()
+
+    def write(self, ch, lines=None):
+        """Add channel to the m3u file.
+
+        Args:
+            ch: m3uchannel
+            lines: the rendered channel, when it is already rendered for another file
+        """
+        self.write_lines(render_channel(ch) if lines is None else lines)
+        self.count += 1
+
+    def write_channels(self, m3u_channels):
+        """Add channels to the m3u file.
+
+        Args:
+            m3u_channels: iterable of m3uchannels
+        """
+        parts = self._parts
+        buffer_size = self._buffer_size
+        pending = self._pending
+        count = 0
+        for ch in m3u_channels:
+            lines = render_channel(ch)
+            parts.append(lines)
+            pending += len(lines)
+            count += 1
+            if pending >= buffer_size:
+                self.flush()
+                parts = self._parts
+                pending = 0
+        self._pending = pending
+        self.count += count
+
+    def flush(self):
+        """Write the buffer to the temporary file."""
+        if not self._parts:
+            return
+        data = "".join(self._parts).encode("utf-8")
+        self._parts = []
+        self._pending = 0
+        self._hash.update(data)
+        self._target.write(data)
+        self.bytes_written += len(data)
+
+    def close(self):
+        """Write the buffer, and replace the m3u file if the content changed.
+
+        Returns:
+            dict with file, bytes and channels written and if the replace was skipped
+        """
+        try:
+            self.flush()
+            self._target.flush()
+            os.fsync(self._target.fileno())
+            self._target.close()
+            try:
+                same_size = os.path.getsize(self._m3u_file) == self.bytes_written
+            except OSError:
+                same_size = False
+            if same_size and file_sha256(self._m3u_file) == self._hash.hexdigest():
+                os.remove(self._tmp_file)
+                self.skipped = True
+            else:
+                if os.path.exists(self._m3u_file):
+                    shutil.copymode(self._m3u_file, self._tmp_file)
+                else:
+                    # mkstemp creates the file only readable by the owner
+                    os.chmod(self._tmp_file, 0o666 & ~get_umask())
+                os.replace(self._tmp_file, self._m3u_file)
+        except BaseException:
+            self.abort()
+            raise
+        return {'file': self._m3u_file, 'bytes': self.bytes_written, 'count': self.count, 'skipped': self.skipped}
+
+    def abort(self):
+        """Stop writing and remove the temporary file."""
+        self._target.close()
+        try:
+            os.remove(self._tmp_file)
+        except FileNotFoundError:
+            pass
+
+
+def export_m3u_file(m3u_file, m3u_channels, header=""):
     """Export to m3u file from channels.
 
+    The file is written to a temporary file and renamed in place, so a reader
+    never sees a half written m3u file. If the m3u file already has the same
+    content it is not replaced.
+
     Args:
         m3u_file: path to m3u file to write
         m3u_channels: channels to save to file.
+        header: the #EXTM3U line, default a plain #EXTM3U
 
     Returns:
-        Result
+        Result: dict with file, bytes, count and skipped, or False on error
     """
     try:
-        with open(m3u_file, "w") as output_stream:
-            print("#EXTM3U", file=output_stream)
-            for ch in m3u_channels:
-                print(f'#EXTINF:-1 tvg-id="{ch.tvg_id}" tvg-name="{ch.tvg_name}" tvg-logo="{ch.tvg_logo}" group-title="{ch.tvg_group_title}",{ch.tvg_name}', file=output_stream)  # noqa: E501
-                for source in ch.tvg_sources:
-                    print(source, file=output_stream)
+        with M3uWriter(m3u_file, header=header) as writer:
+            writer.write_channels(m3u_channels)
     except PermissionError:
         print('ERROR: no permission.')
         return False
     except OSError as e:
         print(f"ERROR: oserror {e}")
         return False
-    return True
+    return {'file': m3u_file, 'bytes': writer.bytes_written, 'count': writer.count, 'skipped': writer.skipped}
 
 
 def return_tvg_group_titles(m3u_channels, vod_only=False):
@@ -137,6 +946,9 @@ def serie_regex():
     return re.compile('(.*?) S(\d+) {0,1}E(\d+)')  # noqa: W291,W605
 
 
+SERIE_REGEX = serie_regex()
+
+
 def check_type_channel(m3u_channel, compiled_regex=None):
     """Check the channel type.
 
@@ -148,12 +960,12 @@ def check_type_channel(m3u_channel, compiled_regex=None):
         ChannelType value
 
     """
-    if compiled_regex is None:
-        compiled_regex = serie_regex()
-
     if m3u_channel.vod is False:
         return ChannelType.CHANNEL
-    if compiled_regex.findall(m3u_channel.tvg_name):
+    if compiled_regex is None:
+        # the serie info of the channel uses the same regex, so it is cached as well
+        return ChannelType.EPISODE if m3u_channel.get_serie() else ChannelType.MOVIE
+    if compiled_regex.search(m3u_channel.tvg_name):
         return ChannelType.EPISODE
     return ChannelType.MOVIE
 
@@ -161,20 +973,19 @@ def check_type_channel(m3u_channel, compiled_regex=None):
 def get_channel_types(m3u_channels):
     """Check types of channels.
 
+    The type is determined once per channel and cached, see M3uChannel.classify.
+
     Args:
         m3u_channels: List of M3uChannel dataclass
 
     Returns:
         list of m3u_channels
     """
-    compiled_regex = serie_regex()
     result = []
     for i in m3u_channels:
-        if i.tvg_sources == []:
+        if not i.tvg_sources:
             continue
-        value = check_type_channel(i, compiled_regex)
-        i.tvg_type = value
-        # print(f"{i.tvg_name}: {i.tvg_sources[0]} / {i.tvg_type}")
+        i.classify()
         result.append(i)
     return result
 
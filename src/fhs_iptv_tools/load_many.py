@@ -0,0 +1,101 @@
+"""Load several m3u files or urls at the same time with a pool of processes.
+
+Every source is parsed in a worker process, the channels come back as
+columns (see channels_to_columns) which are much cheaper to pickle than the
+channel objects.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .import_m3u import iter_m3u_file, iter_m3u_stream, channels_to_columns, channels_from_columns
+
+
+def iter_m3u_source(m3u_file, keep_raw=False, header=None):
+    """Iterate over the channels of a m3u file or url.
+
+    Unlike iter_m3u_file a file that can't be opened raises the error, so
+    a missing source isn't mistaken for an empty one.
+
+    Args:
+        m3u_file: path or http(s) url to m3u file
+        keep_raw: keep the original #EXTINF line in raw_extinf
+        header: optional list, the #EXTM3U line is added to it
+
+    Yields:
+        m3uchannel
+
+    Raises:
+        OSError: the file can't be read
+    """
+    from .download_m3u import is_url
+
+    if is_url(m3u_file):
+        yield from iter_m3u_file(m3u_file, keep_raw, header)
+        return
+    with open(m3u_file, 'r') as input_stream:
+        yield from iter_m3u_stream(input_stream, keep_raw, header)
+
+
+def load_m3u_columns(m3u_file, filter_type, keep_raw=False):
+    """Load a m3u file or url, used by the worker processes.
+
+    Args:
+        m3u_file: path or http(s) url to m3u file
+        filter_type: type of LoadType to keep
+        keep_raw: keep the original #EXTINF line in raw_extinf
+
+    Returns:
+        (columns of the m3uchannels, #EXTM3U line with keep_raw or "", seconds)
+    """
+    from .probe_list import filter_load_type
+
+    start = time.perf_counter()
+    header = [] if keep_raw else None
+    channels = list(filter_load_type(iter_m3u_source(m3u_file, keep_raw, header), filter_type))
+    return (channels_to_columns(channels), header[0] if header else "", time.perf_counter() - start)
+
+
+def load_m3u_many(sources, workers=None):
+    """Load m3u files or urls in parallel.
+
+    Args:
+        sources: list of dicts with file, filter_type and keep_raw
+        workers: amount of processes, default amount of cpus
+
+    Returns:
+        list of dicts with file, channels (list or None on error), header (the #EXTM3U line with keep_raw),
+        seconds and error, in the order of sources
+    """
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(sources))
+    results = []
+    if workers < 2:
+        from .probe_list import filter_load_type
+
+        for source in sources:
+            start = time.perf_counter()
+            try:
+                header = [] if source['keep_raw'] else None
+                channels = list(filter_load_type(iter_m3u_source(source['file'], source['keep_raw'], header),
+                                                 source['filter_type']))
+                results.append({'file': source['file'], 'channels': channels, 'header': header[0] if header else "",
+                                'seconds': time.perf_counter() - start, 'error': None})
+            except Exception as e:  # noqa:B902
+                results.append({'file': source['file'], 'channels': None, 'header': "",
+                                'seconds': time.perf_counter() - start, 'error': str(e)})
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(load_m3u_columns, source['file'], source['filter_type'], source['keep_raw'])
+                   for source in sources]
+        for (source, future) in zip(sources, futures):
+            try:
+                (columns, header, seconds) = future.result()
+                results.append({'file': source['file'], 'channels': channels_from_columns(columns), 'header': header,
+                                'seconds': seconds, 'error': None})
+            except Exception as e:  # noqa:B902
+                results.append({'file': source['file'], 'channels': None, 'header': "", 'seconds': 0.0,
+                                'error': str(e)})
+    return results
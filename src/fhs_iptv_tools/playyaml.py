@@ -27,6 +27,51 @@ def play_command_run_tasks(task):
     play(task_file, include_tag, exclude_tag)
     return True
 
+
+def get_load_type(task_type):
+    """Get LoadType from task type string.
+
+    Args:
+        task_type: all, channels or vod
+
+    Returns:
+        LoadType or None if unknown
+    """
+    from .probe_list import LoadType
+
+    load_types = {'all': LoadType.ALL, 'channels': LoadType.CHANNELS, 'vod': LoadType.VOD}
+    return load_types.get(task_type, None)
+
+
+def get_number_argument(task, name, number_type=int, *, minimum=None, maximum=None):
+    """Get a number argument of a task.
+
+    Args:
+        task: task array
+        name: argument name
+        number_type: int or float
+        minimum: lowest allowed value, None for no limit
+        maximum: highest allowed value, None for no limit
+
+    Returns:
+        number, None when the argument is not a number or out of range, the error is written
+    """
+    try:
+        value = number_type(task[name])
+    except (TypeError, ValueError):
+        value = None
+    if value != value:
+        # nan
+        value = None
+    if value is None or (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        limits = f" from {minimum}" if minimum is not None else ""
+        limits += f" up to {maximum}" if maximum is not None else ""
+        kind = "a whole number" if number_type is int else "a number"
+        sys.stderr.write(f"ERROR: {name} must be {kind}{limits} and not '{task[name]}'\n")
+        return None
+    return value
+
+
 def play_command_load_m3u_file(task):
     """Play command load_m3u_file.
 
@@ -40,10 +85,174 @@ def play_command_load_m3u_file(task):
 
     task_store = task["store"]
     task_file = task["file"]
+    load_type = get_load_type(task['type'])
+    if load_type is None:
+        sys.stderr.write(f"ERROR: unknown load type '{task['type']}' and not all, channels or vod")
+        return False
+    parallel_mb = get_number_argument(task, 'parallel_mb', minimum=0)
+    if parallel_mb is None:
+        return False
     if task_store not in config.STORE:
         config.STORE[task_store] = ProbeInfoList()
+    parallel_size = parallel_mb * 1024 * 1024
     with config.CONSOLE.status(f"Loading m3u file: {task_file}  to store: {task_store}", spinner="dots"):
-        config.STORE[task_store].load_m3u_file(task_file)
+        config.STORE[task_store].load_m3u_file(task_file, filter_type=load_type, parallel_size=parallel_size,
+                                               keep_raw=task['keep_raw'] == 'yes')
+    return True
+
+
+def get_m3u_sources(sources):
+    """Get the sources of load_m3u_many.
+
+    Args:
+        sources: list of dicts with file, store, type and keep_raw, or a
+            string with store=file entries separated by commas
+
+    Returns:
+        list of dicts with file, store, type and keep_raw, None on error
+    """
+    if isinstance(sources, str):
+        sources = [dict(zip(('store', 'file'), entry.strip().split('=', 1))) for entry in sources.split(',')]
+    result = []
+    for source in sources:
+        if not isinstance(source, dict) or source.get('file', "") == "":
+            return None
+        result.append({'file': source['file'], 'store': source.get('store', 'default'),
+                       'type': source.get('type', 'all'), 'keep_raw': source.get('keep_raw', 'no')})
+    return result
+
+
+def play_command_load_m3u_many(task):
+    """Play command load_m3u_many.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    import time
+    from .probe_list import ProbeInfoList
+    from .load_many import load_m3u_many
+
+    sources = get_m3u_sources(task['sources'])
+    if not sources:
+        sys.stderr.write(f"ERROR: sources needs a list of file and store and not '{task['sources']}'")
+        return True
+    for source in sources:
+        source['filter_type'] = get_load_type(source['type'])
+        if source['filter_type'] is None:
+            sys.stderr.write(f"ERROR: unknown load type '{source['type']}' and not all, channels or vod")
+            return True
+        source['keep_raw'] = source['keep_raw'] == 'yes'
+    workers = get_number_argument(task, 'workers', minimum=0)
+    if workers is None:
+        return False
+    start = time.perf_counter()
+    with config.CONSOLE.status(f"Loading {len(sources)} m3u files", spinner="dots"):
+        results = load_m3u_many(sources, workers=workers)
+    filled = set()
+    for (source, result) in zip(sources, results):
+        task_store = source['store']
+        if result['channels'] is None:
+            print(f"ERROR: can't load m3u_file: {source['file']}: {result['error']}")
+            continue
+        if not result['channels']:
+            # a failed download is empty as well, the store is left as it is
+            print(f"ERROR: no channels in m3u_file: {source['file']}")
+            continue
+        if task_store not in config.STORE:
+            config.STORE[task_store] = ProbeInfoList()
+        if task_store in filled:
+            # more sources for the same store are added after each other
+            config.STORE[task_store].add_channels(result['channels'])
+        else:
+            config.STORE[task_store].set_channels(result['channels'], result['header'])
+            filled.add(task_store)
+        print(f"{task_store}: {source['file']}: {len(result['channels'])} channels in {result['seconds']:.2f}s")
+    total = sum(result['seconds'] for result in results)
+    print(f"loaded {len(sources)} m3u files in {time.perf_counter() - start:.2f}s, {total:.2f}s one after another.")
+    return True
+
+
+def play_command_reload_m3u_file(task):
+    """Play command reload_m3u_file.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from .probe_list import ProbeInfoList
+
+    task_store = task["store"]
+    task_file = task["file"]
+    load_type = get_load_type(task['type'])
+    if load_type is None:
+        sys.stderr.write(f"ERROR: unknown load type '{task['type']}' and not all, channels or vod")
+        return True
+    if task_store not in config.STORE:
+        config.STORE[task_store] = ProbeInfoList()
+    with config.CONSOLE.status(f"Reloading m3u file: {task_file}  to store: {task_store}", spinner="dots"):
+        result = config.STORE[task_store].reload_m3u_file(task_file, filter_type=load_type,
+                                                          keep_raw=task['keep_raw'] == 'yes')
+    if result is not None:
+        print(f"reloaded m3u file {task_file}: {result['added']} added, {result['removed']} removed, "
+              f"{result['changed']} changed, {result['unchanged']} unchanged.")
+    return True
+
+
+def play_command_stream_m3u_file(task):
+    """Play command stream_m3u_file.
+
+    Filter a m3u file straight into a new m3u file, without loading it in a store,
+    so this runs in constant memory for any size of m3u file.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from itertools import chain
+    from .download_m3u import DownloadError
+    from .import_m3u import iter_m3u_file, export_m3u_file
+    from .probe_list import filter_load_type, select_channels
+    from .filter_expr import compile_where, FilterError
+
+    task_file = task["file"]
+    to_file = task["to_file"]
+    load_type = get_load_type(task['type'])
+    if load_type is None:
+        sys.stderr.write(f"ERROR: unknown load type '{task['type']}' and not all, channels or vod")
+        return True
+    if task['where'] != "":
+        try:
+            compile_where(task['where'])
+        except FilterError as error:
+            sys.stderr.write(f"ERROR: invalid where: {error}")
+            return True
+    header = [] if task['keep_raw'] == 'yes' else None
+    channels = iter_m3u_file(task_file, task['keep_raw'] == 'yes', header)
+    try:
+        # the #EXTM3U line is read with the first channel, before the writer needs it
+        first = next(channels, None)
+        channels = chain(() if first is None else (first,), channels)
+        channels = filter_load_type(channels, load_type)
+        channels = select_channels(channels, tvg_group_title=task['group_title'], tvg_name=task['name'],
+                                   tvg_id=task['id'], where=task['where'])
+        with config.CONSOLE.status(f"Streaming m3u file: {task_file}  to file: {to_file}", spinner="dots"):
+            result = export_m3u_file(to_file, channels, header[0] if header else "")
+    except DownloadError as error:
+        # the export is aborted, to_file is left as it was
+        print(f"ERROR: {error}")
+        return True
+    if result is False:
+        print(f"save failed to file: {to_file}.")
+        return True
+    skipped = ", unchanged, write skipped" if result['skipped'] else ""
+    print(f"streamed {result['count']} channels to m3u file {to_file}, {result['bytes']} bytes{skipped}")
     return True
 
 
@@ -62,8 +271,128 @@ def play_command_save_m3u_file(task):
     task_file = task["file"]
     if task_store not in config.STORE:
         config.STORE[task_store] = ProbeInfoList()
-    with config.CONSOLE.status(f"Loading m3u file: {task_file}  to store: {task_store}", spinner="dots"):
-        config.STORE[task_store].save_m3u_file(file=task_file, with_tag=task['with_tag'], without_tag=task['without_tag'])
+    with config.CONSOLE.status(f"Saving store: {task_store}  to m3u file: {task_file}", spinner="dots"):
+        config.STORE[task_store].save_m3u_file(file=task_file, with_tag=task['with_tag'],
+                                               without_tag=task['without_tag'], where=task['where'])
+    return True
+
+
+def get_m3u_outputs(outputs):
+    """Get the outputs of save_m3u_multi.
+
+    Args:
+        outputs: list of dicts with file, with_tag, without_tag and where, or a
+            string with file:with_tag:without_tag entries separated by commas
+
+    Returns:
+        list of dicts with file, with_tag, without_tag and where, None on error
+    """
+    if isinstance(outputs, str):
+        outputs = [dict(zip(('file', 'with_tag', 'without_tag'), entry.strip().split(':')))
+                   for entry in outputs.split(',')]
+    result = []
+    for output in outputs:
+        if not isinstance(output, dict) or output.get('file', "") == "":
+            return None
+        result.append({'file': output['file'], 'with_tag': output.get('with_tag', ""),
+                       'without_tag': output.get('without_tag', ""), 'where': output.get('where', "")})
+    return result
+
+
+def play_command_save_m3u_multi(task):
+    """Play command save_m3u_multi.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from .probe_list import ProbeInfoList
+
+    task_store = task["store"]
+    outputs = get_m3u_outputs(task["outputs"])
+    if not outputs:
+        sys.stderr.write(f"ERROR: outputs needs a list of file, with_tag and without_tag and not '{task['outputs']}'")
+        return True
+    if task_store not in config.STORE:
+        config.STORE[task_store] = ProbeInfoList()
+    with config.CONSOLE.status(f"Saving store: {task_store}  to {len(outputs)} m3u files", spinner="dots"):
+        config.STORE[task_store].save_m3u_files(outputs)
+    return True
+
+
+def play_command_save_store(task):
+    """Play command save_store.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from .probe_list import ProbeInfoList
+
+    task_store = task["store"]
+    task_file = task["file"]
+    if task_store not in config.STORE:
+        config.STORE[task_store] = ProbeInfoList()
+    with config.CONSOLE.status(f"Saving store: {task_store}  to snapshot: {task_file}", spinner="dots"):
+        count = config.STORE[task_store].save_store(task_file)
+    if count >= 0:
+        print(f"saved {count} channels to snapshot {task_file}")
+    return True
+
+
+def play_command_load_store(task):
+    """Play command load_store.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from .probe_list import ProbeInfoList
+
+    task_store = task["store"]
+    task_file = task["file"]
+    if task_store not in config.STORE:
+        config.STORE[task_store] = ProbeInfoList()
+    with config.CONSOLE.status(f"Loading snapshot: {task_file}  to store: {task_store}", spinner="dots"):
+        channels = config.STORE[task_store].load_store(task_file)
+    if channels is not None:
+        print(f"loaded {len(channels)} channels from snapshot {task_file}")
+    return True
+
+
+def play_command_store_options(task):
+    """Play command store_options.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from .probe_list import ProbeInfoList
+
+    task_store = task["store"]
+    if task_store not in config.STORE:
+        config.STORE[task_store] = ProbeInfoList()
+    store = config.STORE[task_store]
+    if task['columnar'] not in ('', 'yes', 'no'):
+        sys.stderr.write(f"ERROR: unknown columnar option '{task['columnar']}' and not yes or no")
+        return True
+    if task['trigram'] not in ('', 'yes', 'no'):
+        sys.stderr.write(f"ERROR: unknown trigram option '{task['trigram']}' and not yes or no")
+        return True
+    if task['columnar'] != '':
+        store.set_columnar(task['columnar'] == 'yes')
+    if task['trigram'] != '':
+        store.set_trigram(task['trigram'] == 'yes')
+    print(f"store {task_store}: columnar: {'yes' if store.is_columnar() else 'no'}, "
+          f"trigram: {'yes' if store.is_trigram() else 'no'}")
     return True
 
 
@@ -151,7 +480,8 @@ def play_command_delete_channels(task):
         with_tag=task['with_tag'],
         without_tag=task['without_tag'],
         with_id=task['with_id'],
-        with_name=task['with_name']
+        with_name=task['with_name'],
+        where=task['where']
     )
     print(f"removed {count} channels.")
     return True
@@ -171,7 +501,8 @@ def play_command_list_channels(task):
     task_store = task['store']
     if task_store not in config.STORE:
         config.STORE[task_store] = ProbeInfoList()
-    count = config.STORE[task_store].list_channels(with_tag=task['with_tag'], without_tag=task['without_tag'], verbose=task['verbose'])
+    count = config.STORE[task_store].list_channels(with_tag=task['with_tag'], without_tag=task['without_tag'],
+                                                   where=task['where'], verbose=task['verbose'])
     print(f"list {count} channels.")
     return True
 
@@ -192,9 +523,12 @@ def play_command_sort_channels(task):
         config.STORE[task_store] = ProbeInfoList()
     result = config.STORE[task_store].sort_channels(
         sort_key1=task['sort_key1'],
-        sort_key2=task['sort_key2']
+        sort_key2=task['sort_key2'],
+        keys=task['keys']
     )
-    if result:
+    if result and task['keys'] != "":
+        print(f"sorted channels with keys: {task['keys']}.")
+    elif result:
         print(f"sorted channels with key1: {task['sort_key1']}, key2: {task['sort_key2']}.")
     else:
         print("ERROR: sorted channels failed.")
@@ -219,6 +553,7 @@ def play_command_modify_channels(task):
         with_tag=task['with_tag'],
         without_tag=task['without_tag'],
         with_id=task['with_id'],
+        where=task['where'],
         set_id=task['set_id'],
         set_name=task['set_name'],
         set_group_title=task['set_group_title'],
@@ -251,6 +586,7 @@ def play_command_copy_channels(task):
         without_tag=task['without_tag'],
         with_id=task['with_id'],
         with_name=task['with_name'],
+        where=task['where'],
         to_store=config.STORE[to_store]
     )
 
@@ -275,20 +611,14 @@ def play_command_move_channels(task):
         config.STORE[task_store] = ProbeInfoList()
     if to_store not in config.STORE:
         config.STORE[to_store] = ProbeInfoList()
-    count = config.STORE[task_store].copy_channels(
+    count = config.STORE[task_store].move_channels(
         with_tag=task['with_tag'],
         without_tag=task['without_tag'],
         with_id=task['with_id'],
         with_name=task['with_name'],
+        where=task['where'],
         to_store=config.STORE[to_store]
     )
-
-    config.STORE[task_store].delete_channels(
-        with_tag=task['with_tag'],
-        without_tag=task['without_tag'],
-        with_id=task['with_id'],
-        with_name=task['with_name']
-    )
     print(f"moved {count} channels.")
     return True
 
@@ -304,6 +634,9 @@ def play_command_select(task):
     """
     from .probe_list import ProbeInfoList
 
+    threshold = get_number_argument(task, 'threshold', float, minimum=0, maximum=1)
+    if threshold is None:
+        return False
     task_store = task['store']
     if task_store not in config.STORE:
         config.STORE[task_store] = ProbeInfoList()
@@ -315,11 +648,99 @@ def play_command_select(task):
         tvg_id=task['id'],
         tvg_source=task['source'],
         set_tag=task['set_tag'],
-        clear_tag=task['clear_tag'])
+        clear_tag=task['clear_tag'],
+        match=task['match'],
+        threshold=threshold,
+        where=task['where'])
     print(f"selected {count} channels.")
     return True
 
 
+def play_command_list_series(task):
+    """Play command list series.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from .probe_list import ProbeInfoList
+
+    task_store = task['store']
+    if task_store not in config.STORE:
+        config.STORE[task_store] = ProbeInfoList()
+    for (title, seasons) in config.STORE[task_store].list_series(task['search']):
+        info = ", ".join(f"S{season:02d}: {episodes}" for (season, episodes) in seasons.items())
+        print(f"{title}   /   {info}")
+    return True
+
+
+def play_command_select_series(task):
+    """Play command select series.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from .probe_list import ProbeInfoList
+
+    task_store = task['store']
+    if task_store not in config.STORE:
+        config.STORE[task_store] = ProbeInfoList()
+    count = config.STORE[task_store].select_series(search=task['search'], mode=task['mode'], set_tag=task['set_tag'])
+    if count >= 0:
+        print(f"selected {count} episodes.")
+    return True
+
+
+def play_command_dedupe_channels(task):
+    """Play command dedupe channels.
+
+    Args:
+        task: task array
+
+    Returns:
+        Good: boolean
+    """
+    from .probe_list import ProbeInfoList
+    from .dedupe import dedupe_stores, MATCH_ON, KEEP_POLICIES
+    from .filter_expr import FilterError
+
+    if task['match_on'] not in MATCH_ON:
+        sys.stderr.write(f"ERROR: unknown match_on '{task['match_on']}' and not {', '.join(MATCH_ON)}")
+        return True
+    if task['keep'] not in KEEP_POLICIES:
+        sys.stderr.write(f"ERROR: unknown keep policy '{task['keep']}' and not {', '.join(KEEP_POLICIES)}")
+        return True
+    stores = {}
+    for task_store in [store.strip() for store in task['stores'].split(',') if store.strip() != ""]:
+        if task_store not in config.STORE:
+            config.STORE[task_store] = ProbeInfoList()
+        stores[task_store] = config.STORE[task_store]
+    counts = {task_store: config.STORE[task_store].count_channels() for task_store in stores}
+    try:
+        report = dedupe_stores(stores, match_on=task['match_on'], keep=task['keep'], with_tag=task['with_tag'],
+                               without_tag=task['without_tag'], where=task['where'])
+    except FilterError as error:
+        sys.stderr.write(f"ERROR: invalid where: {error}")
+        return True
+    merged = 0
+    for entry in report:
+        ch = entry['channel']
+        merged += len(entry['merged'])
+        print(f"{entry['store']}: {ch.tvg_name} <{ch.tvg_id}> merged with {len(entry['merged'])}, "
+              f"+{entry['sources']} sources, {len(ch.tvg_sources)} sources")
+        for (other_store, other_name) in entry['merged']:
+            print(f"    {other_store}: {other_name}")
+    for (task_store, store) in stores.items():
+        print(f"store {task_store}: {counts[task_store]} -> {store.count_channels()} channels")
+    print(f"merged {merged} duplicate channels into {len(report)} channels.")
+    return True
+
+
 def play_command_select_copy(task):
     """Play command select and copy.
 
@@ -331,28 +752,28 @@ def play_command_select_copy(task):
     """
     from .probe_list import ProbeInfoList
 
-    temp_tag = 'select_copy_tmp'
+    threshold = get_number_argument(task, 'threshold', float, minimum=0, maximum=1)
+    if threshold is None:
+        return False
     task_store = task['store']
     to_store = task['to_store']
     if task_store not in config.STORE:
         config.STORE[task_store] = ProbeInfoList()
     if to_store not in config.STORE:
         config.STORE[to_store] = ProbeInfoList()
-    count = config.STORE[task_store].select(
+    count = config.STORE[task_store].select_copy(
         with_tag=task['with_tag'],
         without_tag=task['without_tag'],
         tvg_group_title=task['group_title'],
         tvg_name=task['name'],
         tvg_id=task['id'],
         tvg_source=task['source'],
-        set_tag=temp_tag, quiet=True)
-
-    config.STORE[task_store].copy_channels(
-        with_tag=temp_tag,
-        to_store=config.STORE[to_store]
-    )
-    tmp_task = {'store': task_store, 'all_stores': 'yes', 'tag': temp_tag}
-    play_command_clear_tag(tmp_task, quiet=True)
+        match=task['match'],
+        threshold=threshold,
+        where=task['where'],
+        to_store=config.STORE[to_store])
+    if count < 0:
+        return False
 
     print(f"selected and copied {count} channels.")
     return True
@@ -369,31 +790,28 @@ def play_command_select_move(task):
     """
     from .probe_list import ProbeInfoList
 
-    temp_tag = 'select_copy_tmp'
+    threshold = get_number_argument(task, 'threshold', float, minimum=0, maximum=1)
+    if threshold is None:
+        return False
     task_store = task['store']
     to_store = task['to_store']
     if task_store not in config.STORE:
         config.STORE[task_store] = ProbeInfoList()
     if to_store not in config.STORE:
         config.STORE[to_store] = ProbeInfoList()
-    count = config.STORE[task_store].select(
+    count = config.STORE[task_store].select_move(
         with_tag=task['with_tag'],
         without_tag=task['without_tag'],
         tvg_group_title=task['group_title'],
         tvg_name=task['name'],
         tvg_id=task['id'],
         tvg_source=task['source'],
-        set_tag=temp_tag, quiet=True)
-
-    config.STORE[task_store].copy_channels(
-        with_tag=temp_tag,
-        to_store=config.STORE[to_store]
-    )
-    config.STORE[task_store].delete_channels(
-        with_tag=temp_tag
-    )
-    tmp_task = {'store': task_store, 'all_stores': 'yes', 'tag': temp_tag}
-    play_command_clear_tag(tmp_task, quiet=True)
+        match=task['match'],
+        threshold=threshold,
+        where=task['where'],
+        to_store=config.STORE[to_store])
+    if count < 0:
+        return False
 
     print(f"selected and moved {count} channels.")
     return True
@@ -430,16 +848,27 @@ def play_command_probe_scan(task):
     from .probe_list import ProbeInfoList
 
     task_store = task['store']
-    delay = int(task['delay'])
+    workers = get_number_argument(task, 'workers', minimum=1)
+    per_host = get_number_argument(task, 'per_host', minimum=1)
+    rate = get_number_argument(task, 'rate', float, minimum=0)
+    slow = get_number_argument(task, 'slow', float, minimum=0)
+    if None in (workers, per_host, rate, slow):
+        return False
     if task_store not in config.STORE:
         config.STORE[task_store] = ProbeInfoList()
-    with config.CONSOLE.status(f"Probe scan channel list from store: {task_store} with delay {delay}", spinner="dots"):
+    rate_text = f"{rate} probes/s" if rate > 0 else "no rate limit"
+    with config.CONSOLE.status(f"Probe scan channel list from store: {task_store} with {workers} workers, "
+                               f"per provider {per_host} connections and {rate_text}", spinner="dots"):
         config.STORE[task_store].probe_scan(
             with_tag=task['with_tag'],
             without_tag=task['without_tag'],
             with_id=task['with_id'],
             with_name=task['with_name'],
-            delay=delay
+            where=task['where'],
+            workers=workers,
+            per_host=per_host,
+            rate=rate,
+            slow=slow
         )
     return True
 
@@ -518,15 +947,12 @@ def play_command_filter_channels(task):
     task_type = task['type']
     if task_store not in config.STORE:
         config.STORE[task_store] = ProbeInfoList()
-    if task_type == 'channels':
-        with config.CONSOLE.status(f"Filter m3u list on channels to store: {task_store}", spinner="dots"):
-            config.STORE[task_store].filter_lijst(LoadType.CHANNELS)
-        return True
-    if task_type == 'vod':
-        with config.CONSOLE.status(f"Filter m3u list on vod to store: {task_store}", spinner="dots"):
-            config.STORE[task_store].filter_lijst(LoadType.VOD)
+    load_type = get_load_type(task_type)
+    if load_type is None or load_type == LoadType.ALL:
+        sys.stderr.write(f"ERROR: unknown filter options '{task_type}' and not channels or vod")
         return True
-    sys.stderr.write(f"ERROR: unknown filter options '{task_type}' and not channels or vod")
+    with config.CONSOLE.status(f"Filter m3u list on {task_type} to store: {task_store}", spinner="dots"):
+        config.STORE[task_store].filter_lijst(load_type)
     return True
 
 
@@ -541,9 +967,70 @@ funcdict = {
         "help": "run tasks from yaml task file."
     },
     "load_m3u": {
-        "args": [{"name": "file"}, {"name": "store", "help": "store name", "default": "default"}],
+        "args": [
+            {"name": "file"},
+            {"name": "store", "help": "store name", "default": "default"},
+            {"name": "type", "help": "type to load, all, channels or vod", "default": "all"},
+            {"name": "parallel_mb", "default": "256",
+             "help": "parse files from this size (MB) with all cpus, 0 is never"},
+            {"name": "keep_raw", "default": "no",
+             "help": "keep the original #EXTINF lines and save unchanged channels verbatim, yes or no"}
+        ],
         "func": play_command_load_m3u_file,
-        "help": "loading m3u file from disk."
+        "help": "loading m3u file from disk or http(s) url."
+    },
+    "load_m3u_many": {
+        "args": [
+            {"name": "sources", "help": "list of file, store, type and keep_raw, or store=file,store=file,..."},
+            {"name": "workers", "help": "amount of processes, 0 is the amount of cpus", "default": "0"}
+        ],
+        "func": play_command_load_m3u_many,
+        "help": "loading several m3u files or http(s) urls at the same time."
+    },
+    "reload_m3u": {
+        "args": [
+            {"name": "file"},
+            {"name": "store", "help": "store name", "default": "default"},
+            {"name": "type", "help": "type to load, all, channels or vod", "default": "all"},
+            {"name": "keep_raw", "default": "no",
+             "help": "keep the original #EXTINF lines and save unchanged channels verbatim, yes or no"}
+        ],
+        "func": play_command_reload_m3u_file,
+        "help": "reload m3u file in store, keep tags and probe info of unchanged channels."
+    },
+    "stream_m3u": {
+        "args": [
+            {"name": "file"},
+            {"name": "to_file"},
+            {"name": "type", "help": "type to keep, all, channels or vod", "default": "all"},
+            {"name": "group_title", "default": ""},
+            {"name": "name", "default": ""},
+            {"name": "id", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
+            {"name": "keep_raw", "default": "no",
+             "help": "keep the original #EXTINF lines and save unchanged channels verbatim, yes or no"}
+        ],
+        "func": play_command_stream_m3u_file,
+        "help": "filter m3u file to new m3u file without loading it in a store."
+    },
+    "save_store": {
+        "args": [{"name": "file"}, {"name": "store", "help": "store name", "default": "default"}],
+        "func": play_command_save_store,
+        "help": "save store with tags and probe info to a binary snapshot."
+    },
+    "load_store": {
+        "args": [{"name": "file"}, {"name": "store", "help": "store name", "default": "default"}],
+        "func": play_command_load_store,
+        "help": "load store from a binary snapshot."
+    },
+    "store_options": {
+        "args": [
+            {"name": "store", "help": "store name", "default": "default"},
+            {"name": "columnar", "help": "use a columnar table for filters (needs numpy), yes or no", "default": ""},
+            {"name": "trigram", "help": "use a trigram index for select on name, yes or no", "default": ""}
+        ],
+        "func": play_command_store_options,
+        "help": "show or change the options of a store."
     },
     "count_channels": {
         "args": [{"name": "store", "help": "store name", "default": "default"}],
@@ -573,11 +1060,17 @@ funcdict = {
     "probe_scan": {
         "args": [
             {"name": "store", "help": "store name", "default": "default"},
-            {"name": "delay", "help": "delay between probing channels", "default": "5"},
+            {"name": "workers", "help": "max channels probed at the same time over all providers", "default": "4"},
+            {"name": "per_host", "default": "2",
+             "help": "max connections at the same time per provider (host and user)"},
+            {"name": "rate", "help": "max ffprobe starts per second per provider, 0 is no limit", "default": "1"},
+            {"name": "slow", "default": "20",
+             "help": "seconds after which a probe is slow and the provider gets less connections"},
             {"name": "with_tag", "default": ""},
             {"name": "without_tag", "default": ""},
             {"name": "with_id", "default": ""},
-            {"name": "with_name", "default": ""}
+            {"name": "with_name", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""}
         ],
         "func": play_command_probe_scan,
         "help": "probe scanning the list of channels."
@@ -616,6 +1109,7 @@ funcdict = {
             {"name": "without_tag", "default": ""},
             {"name": "with_id", "default": ""},
             {"name": "with_name", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
         ],
         "func": play_command_delete_channels,
         "loop": "channels",
@@ -627,6 +1121,7 @@ funcdict = {
             {"name": "with_tag", "default": ""},
             {"name": "without_tag", "default": ""},
             {"name": "with_id", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
             {"name": "set_id", "default": ""},
             {"name": "set_name", "default": ""},
             {"name": "set_group_title", "default": ""},
@@ -643,6 +1138,7 @@ funcdict = {
             {"name": "without_tag", "default": ""},
             {"name": "with_id", "default": ""},
             {"name": "with_name", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
             {"name": "to_store"},
         ],
         "func": play_command_copy_channels,
@@ -656,6 +1152,7 @@ funcdict = {
             {"name": "without_tag", "default": ""},
             {"name": "with_id", "default": ""},
             {"name": "with_name", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
             {"name": "to_store"},
         ],
         "func": play_command_move_channels,
@@ -667,6 +1164,7 @@ funcdict = {
             {"name": "store", "help": "store name", "default": "default"},
             {"name": "with_tag", "default": ""},
             {"name": "without_tag", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
             {"name": "verbose", "default": "no", "help": "verbose: no or yes"},
         ],
         "func": play_command_list_channels,
@@ -677,6 +1175,9 @@ funcdict = {
             {"name": "store", "help": "store name", "default": "default"},
             {"name": "sort_key1", "default": "tvg_group_title", 'help': "sort key 1: tvg_id, tvg_name, tvg_logo, tvg_group_title"},
             {"name": "sort_key2", "default": "tvg_name", 'help': "sort key 2: tvg_id, tvg_name, tvg_logo, tvg_group_title"},
+            {"name": "keys", "default": "",
+             'help': "sort keys instead of sort_key1 and sort_key2, field[:plain|casefold|natural][:asc|desc] "
+                     "separated by commas, like: tvg_group_title,tvg_name:natural,probe.video.height:desc"},
         ],
         "func": play_command_sort_channels,
         "help": "sort channels."
@@ -687,10 +1188,20 @@ funcdict = {
             {"name": "file"},
             {"name": "with_tag", "default": ""},
             {"name": "without_tag", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
         ],
         "func": play_command_save_m3u_file,
         "help": "save channels."
     },
+    "save_m3u_multi": {
+        "args": [
+            {"name": "store", "help": "store name", "default": "default"},
+            {"name": "outputs",
+             "help": "list of file, with_tag, without_tag and where, or file:with_tag:without_tag,..."},
+        ],
+        "func": play_command_save_m3u_multi,
+        "help": "save channels to multiple m3u files in one pass."
+    },
     "select": {
         "args": [
             {"name": "store", "help": "store name", "default": "default"},
@@ -699,6 +1210,9 @@ funcdict = {
             {"name": "group_title", "default": ""},
             {"name": "name", "default": ""},
             {"name": "id", "default": ""},
+            {"name": "match", "help": "substring, icase, regex or fuzzy", "default": "substring"},
+            {"name": "threshold", "help": "minimal similarity for fuzzy match, 0.0 - 1.0", "default": "0.8"},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
             {"name": "source", "default": ""},
             {"name": "set_tag", "default": ""},
             {"name": "clear_tag", "default": ""}
@@ -706,6 +1220,36 @@ funcdict = {
         "func": play_command_select,
         "help": "select channels."
     },
+    "list_series": {
+        "args": [
+            {"name": "store", "help": "store name", "default": "default"},
+            {"name": "search", "help": "only series with this text in the title", "default": ""}
+        ],
+        "func": play_command_list_series,
+        "help": "list series with seasons and amount of episodes."
+    },
+    "select_series": {
+        "args": [
+            {"name": "store", "help": "store name", "default": "default"},
+            {"name": "search", "help": "only series with this text in the title", "default": ""},
+            {"name": "mode", "help": "all, complete_seasons, latest_season or latest_episode", "default": "all"},
+            {"name": "set_tag"}
+        ],
+        "func": play_command_select_series,
+        "help": "select episodes of series, for example only complete seasons or the latest episode."
+    },
+    "dedupe_channels": {
+        "args": [
+            {"name": "stores", "help": "store names separated by commas", "default": "default"},
+            {"name": "match_on", "help": "name_id, name or id", "default": "name_id"},
+            {"name": "keep", "help": "channel to keep: first, last, best_probe or most_sources", "default": "first"},
+            {"name": "with_tag", "default": ""},
+            {"name": "without_tag", "default": ""},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""}
+        ],
+        "func": play_command_dedupe_channels,
+        "help": "merge duplicate channels of one or more stores into one channel with all sources."
+    },
     "select_and_copy": {
         "args": [
             {"name": "store", "help": "store name", "default": "default"},
@@ -714,6 +1258,9 @@ funcdict = {
             {"name": "group_title", "default": ""},
             {"name": "name", "default": ""},
             {"name": "id", "default": ""},
+            {"name": "match", "help": "substring, icase, regex or fuzzy", "default": "substring"},
+            {"name": "threshold", "help": "minimal similarity for fuzzy match, 0.0 - 1.0", "default": "0.8"},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
             {"name": "source", "default": ""},
             {"name": "to_store"},
         ],
@@ -728,6 +1275,9 @@ funcdict = {
             {"name": "group_title", "default": ""},
             {"name": "name", "default": ""},
             {"name": "id", "default": ""},
+            {"name": "match", "help": "substring, icase, regex or fuzzy", "default": "substring"},
+            {"name": "threshold", "help": "minimal similarity for fuzzy match, 0.0 - 1.0", "default": "0.8"},
+            {"name": "where", "help": "filter expression, like: group == NL and not tag == keep", "default": ""},
             {"name": "source", "default": ""},
             {"name": "to_store"},
         ],
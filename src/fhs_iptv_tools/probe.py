@@ -2,23 +2,26 @@ import subprocess
 import json
 import hashlib
 import os
-from pathlib import Path
-from .directories import get_probe_dir
+from .directories import get_probe_dir, get_probe_db
 from pprint import pprint
 
 
 class ProbeInfo:
-    def __init__(self, cmdpath="/usr/bin/ffprobe", seed="Pn2OOHXBFjnSqB.Yt", probedir=None):
+    def __init__(self, cmdpath="/usr/bin/ffprobe", seed="Pn2OOHXBFjnSqB.Yt", probedir=None, cache_file=None):
         """Initiate class.
 
         Args:
             cmdpath: ffprobe command part
             seed: seed for sha1 function
-            probedir: directory to cache probes info
+            probedir: directory of the old json probe cache
+            cache_file: probe cache database, default in the data directory
         """
         self._cmdpath = cmdpath
         self._seed = seed
         self._probedir = probedir
+        self._cache_file = cache_file
+        self._cache = None
+        self._json_cache = None
 
     def process_media_info(self, media_info):
         """Cleanup and process media info.
@@ -44,6 +47,17 @@ class ProbeInfo:
         Returns:
             mediainfo
         """
+        return self._probe(source)[0]
+
+    def _probe(self, source):
+        """Probe a source, with the error, probe_scan probes from several threads at once.
+
+        Args:
+            source: source to probe
+
+        Returns:
+            (mediainfo, error), mediainfo None and an error message when the probe failed
+        """
         cmd = [
             self._cmdpath,
             "-loglevel",
@@ -63,19 +77,29 @@ class ProbeInfo:
         try:
             outputBytes = subprocess.check_output(cmd)
         except subprocess.CalledProcessError as e:
-            self._last_error = str(e)
-            return None
+            return (None, str(e))
 
         outputText = outputBytes.decode("utf-8")
         try:
             ffprobe = json.loads(outputText)
         except json.JSONDecodeError as e:
-            self._last_error = str(e)
-            return None
-        return self.process_media_info(ffprobe)
+            return (None, str(e))
+        return (self.process_media_info(ffprobe), "")
+
+    def get_source_hash(self, source):
+        """Get the hash of a source, the key in the probe cache.
+
+        Args:
+            source: source to hash
+
+        Returns:
+            hash
+        """
+        hash_string = f"{source}_{self._seed}"
+        return hashlib.sha1(hash_string.encode()).hexdigest()
 
     def get_cache_path(self, source):
-        """Get cache path.
+        """Get the path in the old json probe cache.
 
         Args:
             source: source to create path from
@@ -85,28 +109,98 @@ class ProbeInfo:
         """
         if self._probedir is None:
             self._probedir = get_probe_dir()
+        return os.path.join(self._probedir, f"{self.get_source_hash(source)}.json")
 
-        hash_string = f"{source}_{self._seed}"
-        hash_object = hashlib.sha1(hash_string.encode())
-        return os.path.join(self._probedir, f"{hash_object.hexdigest()}.json")
+    def get_cache(self):
+        """Get the probe cache, opened the first time.
+
+        Returns:
+            ProbeCache
+        """
+        if self._cache is None:
+            from .probe_cache import ProbeCache
+
+            self._cache = ProbeCache(self._cache_file or get_probe_db())
+        return self._cache
+
+    def has_json_cache(self):
+        """Check if the old json probe cache has files, checked once.
+
+        Returns:
+            boolean
+        """
+        if self._json_cache is None:
+            if self._probedir is None:
+                self._probedir = get_probe_dir()
+            try:
+                with os.scandir(self._probedir) as entries:
+                    self._json_cache = any(entry.name.endswith(".json") for entry in entries)
+            except OSError:
+                self._json_cache = False
+        return self._json_cache
+
+    def load_json_cache(self, source):
+        """Get a probe from the old json cache and import it in the probe cache.
+
+        Args:
+            source: source to get cache from
+
+        Returns:
+            mediainfo, None when not in the old cache
+        """
+        if not self.has_json_cache():
+            return None
+        cache_path = self.get_cache_path(source)
+        try:
+            with open(cache_path, encoding="UTF-8") as cache_file:
+                media_info = json.load(cache_file)
+            probe_time = os.path.getmtime(cache_path)
+        except (OSError, ValueError):
+            return None
+        if self._json_cache is True:
+            print("importing probes of the old json probe cache when they are used, "
+                  "run fhs-iptv-tools migrate-probe-cache to import them all at once.")
+            self._json_cache = "imported"
+        self.get_cache().put(self.get_source_hash(source), media_info, probe_time=probe_time)
+        return media_info
 
     def load_cache_source(self, source):
         """Get cached probe
 
+        A probe that is not in the probe cache is taken from the old json
+        cache, when that is not migrated yet.
+
         Args:
             source: source to get cache from
 
         Returns:
             mediainfo
         """
-        probe_file = self.get_cache_path(source)
-        try:
-            with Path(probe_file).open(encoding="UTF-8") as source:
-                media_info = json.load(source)
-        except FileNotFoundError:
-            media_info = None
+        media_info = self.get_cache().get(self.get_source_hash(source))
+        if media_info is None:
+            media_info = self.load_json_cache(source)
         return media_info
 
+    def load_cache_sources(self, sources):
+        """Get the cached probes of sources in one batch.
+
+        Args:
+            sources: list of sources
+
+        Returns:
+            dict source -> mediainfo, only the cached sources
+        """
+        hashes = {self.get_source_hash(source): source for source in sources}
+        cached = self.get_cache().get_many(list(hashes))
+        result = {hashes[source_hash]: media_info for (source_hash, media_info) in cached.items()}
+        if len(result) < len(hashes) and self.has_json_cache():
+            for source in hashes.values():
+                if source not in result:
+                    media_info = self.load_json_cache(source)
+                    if media_info is not None:
+                        result[source] = media_info
+        return result
+
     def save_cache_source(self, source, media_info):
         """Save probe to cache.
 
@@ -117,11 +211,20 @@ class ProbeInfo:
         Returns:
             Success
         """
-        probe_file = self.get_cache_path(source)
-        with Path(probe_file).open("w", encoding="UTF-8") as target:
-            json.dump(media_info, target)
+        self.get_cache().put(self.get_source_hash(source), media_info)
         return True
 
+    def save_cache_error(self, source, error):
+        """Save a failed probe to cache, a failed source is probed again next time.
+
+        Args:
+            source: source that failed
+            error: error message
+        """
+        from .probe_cache import STATUS_ERROR
+
+        self.get_cache().put(self.get_source_hash(source), {'error': error}, status=STATUS_ERROR)
+
     def probe_with_cache(self, source):
         """Probe a source cache to or from disk.
 
@@ -136,10 +239,12 @@ class ProbeInfo:
             media_info['fhs_source'] = 'cache'
             return media_info
 
-        media_info = self.probe(source)
+        (media_info, error) = self._probe(source)
         if media_info is not None:
             self.save_cache_source(source, media_info)
             media_info['fhs_source'] = 'ffprobe'
+        else:
+            self.save_cache_error(source, error)
         return media_info
  
     def calculate_bitrate(self, media_info, stream):
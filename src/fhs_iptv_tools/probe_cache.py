@@ -0,0 +1,167 @@
+"""Probe cache in one SQLite database.
+
+The probe info of a source is stored as zlib compressed json in a row keyed
+by the hash of the source (see ProbeInfo.get_source_hash), with the time of
+the probe and a status: ok, or error for a failed probe with the error as
+payload. Only the ok probes are returned, a failed source is probed again
+and the row shows when and why it failed last. The database is in WAL mode, so the probe threads
+can write while other processes read, and a write is a transaction, a crash
+can't leave half a probe like the json files of the old cache.
+
+The old cache, one <hash>.json file per source in the ffprobe_data
+directory, is imported with import_json_dir (fhs-iptv-tools
+migrate-probe-cache), or one file at a time by ProbeInfo when a probe
+is not in the database yet.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+# max parameters in one query, sqlite allows 999 in older versions
+BATCH_SIZE = 500
+
+
+class ProbeCache:
+    def __init__(self, db_file):
+        """Initiate class, open or create the database.
+
+        Args:
+            db_file: path to the database
+        """
+        self._db_file = db_file
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_file, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS probe ("
+            "hash TEXT PRIMARY KEY, probe_time REAL NOT NULL, status TEXT NOT NULL, payload BLOB"
+            ") WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def get(self, source_hash):
+        """Get the probe info of a source.
+
+        Args:
+            source_hash: hash of the source
+
+        Returns:
+            mediainfo, None when not in the cache
+        """
+        return self.get_many([source_hash]).get(source_hash)
+
+    def get_many(self, source_hashes):
+        """Get the probe info of sources.
+
+        Args:
+            source_hashes: list of hashes of sources
+
+        Returns:
+            dict hash -> mediainfo, only the sources in the cache
+        """
+        result = {}
+        with self._lock:
+            for start in range(0, len(source_hashes), BATCH_SIZE):
+                batch = source_hashes[start:start + BATCH_SIZE]
+                rows = self._db.execute(
+                    f"SELECT hash, payload FROM probe WHERE status = ? AND hash IN ({','.join('?' * len(batch))})",
+                    [STATUS_OK, *batch]
+                ).fetchall()
+                for (source_hash, payload) in rows:
+                    result[source_hash] = json.loads(zlib.decompress(payload))
+        return result
+
+    def put(self, source_hash, media_info, *, status=STATUS_OK, probe_time=None):
+        """Store the probe info of a source.
+
+        Args:
+            source_hash: hash of the source
+            media_info: probe info
+            status: status of the probe
+            probe_time: time of the probe, default now
+        """
+        self.put_many([(source_hash, media_info)], status=status, probe_time=probe_time)
+
+    def put_many(self, items, *, status=STATUS_OK, probe_time=None):
+        """Store the probe info of sources in one transaction.
+
+        Args:
+            items: list of (hash, mediainfo), or (hash, mediainfo, probe time)
+            status: status of the probes
+            probe_time: time of the probes without their own time, default now
+        """
+        if probe_time is None:
+            probe_time = time.time()
+        rows = []
+        for item in items:
+            payload = zlib.compress(json.dumps(item[1], separators=(',', ':')).encode("utf-8"))
+            rows.append((item[0], item[2] if len(item) > 2 else probe_time, status, payload))
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO probe (hash, probe_time, status, payload) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def count(self, status=STATUS_OK):
+        """Count the sources in the cache.
+
+        Args:
+            status: count the probes with this status, None for all
+
+        Returns:
+            count
+        """
+        with self._lock:
+            if status is None:
+                return self._db.execute("SELECT COUNT(*) FROM probe").fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM probe WHERE status = ?", [status]).fetchone()[0]
+
+
+def import_json_dir(cache, probe_dir, *, batch_size=1000):
+    """Import the json files of the old probe cache.
+
+    The file name is the hash of the source, the file time the probe time.
+    Files that aren't valid json, like the ones of an interrupted write,
+    are skipped.
+
+    Args:
+        cache: ProbeCache
+        probe_dir: directory with <hash>.json files
+        batch_size: files per transaction
+
+    Returns:
+        (imported, skipped) counts
+    """
+    imported = 0
+    skipped = 0
+    batch = []
+    with os.scandir(probe_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            try:
+                with open(entry.path, encoding="UTF-8") as source:
+                    media_info = json.load(source)
+            except (OSError, ValueError):
+                skipped += 1
+                continue
+            batch.append((entry.name[:-5], media_info, entry.stat().st_mtime))
+            if len(batch) >= batch_size:
+                cache.put_many(batch)
+                imported += len(batch)
+                batch = []
+    if batch:
+        cache.put_many(batch)
+        imported += len(batch)
+    return (imported, skipped)
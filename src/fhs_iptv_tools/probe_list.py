@@ -1,10 +1,19 @@
 # probe source
 
 from .probe import ProbeInfo
-from .import_m3u import import_m3u_file, return_tvg_group_titles, M3uChannel
+from .import_m3u import iter_m3u_file, import_m3u_file_parallel, return_tvg_group_titles, ChannelType, M3uChannel
+from .subgroup import subgroup_vod_only
+from .utils import get_matcher, MATCH_MODES
+from .filter_expr import compile_where, FilterError
+from .sort_keys import parse_sort_keys, sort_on_keys, SortKeyError
 from enum import Enum
-import time
-import copy
+from bisect import bisect_left
+from collections import deque
+from functools import partial
+from operator import itemgetter
+from itertools import compress
+import os
+import re
 from pprint import pprint
 
 
@@ -16,11 +25,476 @@ class LoadType(Enum):
     VOD = 2
 
 
+def filter_load_type(channels, filter_type):
+    """Filter channels on LoadType.
+
+    Args:
+        channels: iterable of m3uchannels
+        filter_type: type of LoadType
+
+    Returns:
+        iterable of m3uchannels, None for an unknown type
+    """
+    if filter_type == LoadType.ALL:
+        return channels
+    if filter_type == LoadType.CHANNELS:
+        return subgroup_vod_only(channels, include_vod=False)
+    if filter_type == LoadType.VOD:
+        return subgroup_vod_only(channels, include_vod=True)
+    return None
+
+
+def compile_filters(*, tvg_group_title="", tvg_name="", tvg_id="", match="substring", threshold=0.8):
+    """Get the matchers of the select filters.
+
+    Args:
+        tvg_group_title: select in group_title
+        tvg_name: select in tvg_name
+        tvg_id: select based on tvg_id
+        match: substring, icase, regex or fuzzy
+        threshold: minimal similarity for fuzzy, 0.0 - 1.0
+
+    Returns:
+        list of (attribute name, matcher)
+
+    Raises:
+        ValueError: unknown match mode
+        re.error: invalid regex
+    """
+    return [(key, get_matcher(value, match, threshold))
+            for (key, value) in (('tvg_id', tvg_id), ('tvg_group_title', tvg_group_title), ('tvg_name', tvg_name))
+            if value != ""]
+
+
+def match_filters(ch, filters):
+    """Check if a channel matches all compiled filters.
+
+    Args:
+        ch: m3uchannel to check
+        filters: list from compile_filters, a key None matches the channel itself
+
+    Returns:
+        match: boolean
+    """
+    for (key, matcher) in filters:
+        if not matcher(ch if key is None else getattr(ch, key)):
+            return False
+    return True
+
+
+def select_channels(channels, *, with_tag="", without_tag="", tvg_group_title="", tvg_name="", tvg_id="",
+                    match="substring", threshold=0.8, where=""):
+    """Select channels from an iterable of channels.
+
+    Args:
+        channels: iterable of m3uchannels
+        with_tag: select on tag set
+        without_tag: select on tag not set
+        tvg_group_title: select in group_title
+        tvg_name: select in tvg_name
+        tvg_id: select based on tvg_id
+        match: substring, icase, regex or fuzzy
+        threshold: minimal similarity for fuzzy, 0.0 - 1.0
+        where: filter expression
+
+    Yields:
+        matching m3uchannels
+
+    Raises:
+        FilterError: syntax error in where
+    """
+    filters = compile_filters(tvg_group_title=tvg_group_title, tvg_name=tvg_name, tvg_id=tvg_id,
+                              match=match, threshold=threshold)
+    if where != "":
+        filters.append((None, compile_where(where).match))
+    for ch in channels:
+        if with_tag != "" and not ch.has_tag(with_tag):
+            continue
+        if without_tag != "" and ch.has_tag(without_tag):
+            continue
+        if match_filters(ch, filters):
+            yield ch
+
+
 class ProbeInfoList:
-    def __init__(self):
-        """Initiate class."""
+    def __init__(self, columnar=False, trigram=False):
+        """Initiate class.
+
+        Args:
+            columnar: use a columnar ChannelTable for the filters, needs numpy
+            trigram: use a trigram index for select on name
+        """
         self.__probe = ProbeInfo()
         self.__m3u_channels = list()
+        self.__m3u_header = ""
+        self.__columnar = False
+        self.__table = None
+        self.__series = None
+        self.__index = None
+        self.__tags = None
+        self.__trigram_enabled = trigram
+        self.__trigram = None
+        if columnar:
+            self.set_columnar(True)
+
+    def set_columnar(self, columnar):
+        """Use a columnar ChannelTable for the filters.
+
+        The table is build on the first filter and kept in sync when channels
+        are added, deleted or modified. It is used by filter_lijst,
+        list_groups with vod_only, select and the ~ comparisons of where on
+        name, id and group.
+
+        Args:
+            columnar: boolean
+
+        Returns:
+            boolean, False if numpy is not installed
+        """
+        from .channel_table import columnar_available
+
+        if columnar and not columnar_available():
+            self.write_error("columnar store needs numpy, install it with: pip install numpy")
+            return False
+        self.__columnar = columnar
+        self.__table = None
+        return True
+
+    def is_columnar(self):
+        """Check if a columnar ChannelTable is used.
+
+        Returns:
+            boolean
+        """
+        return self.__columnar
+
+    def set_trigram(self, trigram):
+        """Use a trigram index for select on name.
+
+        The index is build on the first select on name and updated when
+        channels are added, deleted or renamed.
+
+        Args:
+            trigram: boolean
+        """
+        self.__trigram_enabled = trigram
+        self.__trigram = None
+
+    def is_trigram(self):
+        """Check if a trigram index is used.
+
+        Returns:
+            boolean
+        """
+        return self.__trigram_enabled
+
+    def _get_trigram(self):
+        """Get the trigram index, build it when needed.
+
+        Returns:
+            TrigramIndex or None if not enabled
+        """
+        if not self.__trigram_enabled:
+            return None
+        if self.__trigram is None:
+            from .trigram_index import TrigramIndex
+
+            self.__trigram = TrigramIndex(self.__m3u_channels)
+        return self.__trigram
+
+    def _channels_changed(self, *, added=(), removed=(), replaced=False, reordered=False, rebuild=False):
+        """Update the indexes after the channels are changed.
+
+        Removed channels must be removed from the hash indexes and the table
+        with _delete_positions before they are deleted.
+
+        Args:
+            added: channels added at the end of the store
+            removed: channels removed from the store
+            replaced: all channels are replaced, drop the indexes
+            reordered: the channels are sorted, drop the table and the hash indexes
+            rebuild: with replaced, build the indexes that were in use again
+        """
+        if replaced or reordered:
+            self.__table = None
+            in_use = (self.__index is not None, self.__tags is not None, self.__trigram is not None,
+                      self.__series is not None)
+            self.__index = None
+            self.__tags = None
+            self.__trigram = None
+            if replaced:
+                self.__series = None
+            if rebuild:
+                (index, tags, trigram, series) = in_use
+                if index:
+                    self._get_index()
+                if tags:
+                    self._get_tags()
+                if trigram:
+                    self._get_trigram()
+                if series:
+                    self.get_series()
+            return
+        if self.__table is not None:
+            self.__table.append(added)
+        for ch in added:
+            if self.__index is not None:
+                self.__index.append(ch)
+            if self.__tags is not None:
+                self.__tags.append(ch)
+            if self.__trigram is not None:
+                self.__trigram.append(ch)
+        if self.__series is None:
+            return
+        for ch in removed:
+            self.__series.remove(ch)
+        for ch in added:
+            self.__series.add(ch)
+
+    def get_series(self):
+        """Get the series index, build it when needed.
+
+        Returns:
+            SeriesIndex
+        """
+        if self.__series is None:
+            from .series_index import SeriesIndex
+
+            self.__series = SeriesIndex(self.__m3u_channels)
+        return self.__series
+
+    def _get_index(self):
+        """Get the hash indexes on id, name and group title, build them when needed.
+
+        Returns:
+            ChannelIndex
+        """
+        if self.__index is None:
+            from .channel_index import ChannelIndex
+
+            self.__index = ChannelIndex(self.__m3u_channels)
+        return self.__index
+
+    def _get_tags(self):
+        """Get the tag bitmaps, build them when needed.
+
+        Returns:
+            TagBitmaps
+        """
+        if self.__tags is None:
+            from .tag_bitmap import TagBitmaps
+
+            self.__tags = TagBitmaps(self.__m3u_channels)
+        return self.__tags
+
+    def _own(self, pos):
+        """Get the channel at a position to change it, replace it with a private clone if it is shared.
+
+        Args:
+            pos: position of the channel
+
+        Returns:
+            m3uchannel private to this store
+        """
+        ch = self.__m3u_channels[pos]
+        if not ch.is_shared():
+            return ch
+        new = ch.clone()
+        ch.release()
+        self.__m3u_channels[pos] = new
+        if self.__series is not None:
+            self.__series.remove(ch)
+            self.__series.add(new)
+        return new
+
+    def own_channels(self, channels):
+        """Get channels of this store to change them, shared channels are replaced with private clones.
+
+        Args:
+            channels: list of m3uchannels of this store
+
+        Returns:
+            list of m3uchannels private to this store, in the same order
+        """
+        if not any(ch.is_shared() for ch in channels):
+            return list(channels)
+        positions = {id(ch): p for (p, ch) in enumerate(self.__m3u_channels)}
+        return [self._own(positions[id(ch)]) if ch.is_shared() else ch for ch in channels]
+
+    def _lookup_positions(self, key, op, value):
+        """Get the positions of a comparison of a filter expression from the indexes.
+
+        Args:
+            key: tag, tvg_id, tvg_name, tvg_group_title, tvg_source or tvg_type
+            op: == or ~ or ~* (contains, case sensitive or not)
+            value: value to compare with
+
+        Returns:
+            sorted list of positions, the channels that can match, or None without index
+        """
+        if key == 'tag':
+            return self._get_tags().positions(with_tag=value)
+        if key in ('tvg_source', 'tvg_type'):
+            # only in the columnar table
+            table = self._get_table()
+            if table is None or op == '~*':
+                return None
+            if key == 'tvg_source':
+                return table.rows(table.source.mask_equals(value) if op == '==' else table.source.mask_contains(value))
+            if op != '==':
+                return None
+            types = [channel_type for channel_type in ChannelType if channel_type.name.lower() == value]
+            if not types:
+                return []
+            # the table has the type of the channels that are classified, the others can be any type
+            return table.rows(table.mask_type(types[0]) | table.mask_type(ChannelType.UNKNOWN))
+        if op == '==':
+            return self._get_index().positions(key, value)
+        table = self._get_table()
+        if table is not None and op == '~':
+            if key == 'tvg_group_title':
+                return table.rows(table.mask_group_contains(value))
+            return table.rows((table.name if key == 'tvg_name' else table.id).mask_contains(value))
+        if key == 'tvg_name' and self.__trigram_enabled:
+            return self._get_trigram().candidates(value)
+        if key == 'tvg_group_title' and self.__trigram_enabled:
+            index = self._get_index()
+            matcher = get_matcher(value, 'substring' if op == '~' else 'icase')
+            groups = [group for group in index.values('tvg_group_title') if matcher(group)]
+            return sorted(p for group in groups for p in index.positions('tvg_group_title', group))
+        return None
+
+    def _where_positions(self, where, positions=None):
+        """Get the positions of the channels matching a filter expression.
+
+        Args:
+            where: compiled ChannelFilter
+            positions: positions to check, None for all channels
+
+        Returns:
+            list of positions in store order
+        """
+        channels = self.__m3u_channels
+        candidates = where.candidates(self._lookup_positions)
+        if candidates is not None:
+            positions = candidates if positions is None else sorted(set(positions).intersection(candidates))
+        elif positions is None:
+            positions = range(len(channels))
+        match = where.match
+        return [p for p in positions if match(channels[p])]
+
+    def _find_positions(self, *, with_tag="", without_tag="", with_id="", with_name="", where=""):
+        """Find the positions of the channels matching all filters.
+
+        with_id and with_name are looked up in the hash indexes, the tags
+        in the tag bitmaps.
+
+        Args:
+            with_tag: select on tag set
+            without_tag: select on tag not set
+            with_id: select on id
+            with_name: select on name
+            where: filter expression
+
+        Returns:
+            list of positions in store order
+
+        Raises:
+            FilterError: syntax error in where
+        """
+        if where != "":
+            where = compile_where(where)
+            if with_tag == "" and without_tag == "" and with_id == "" and with_name == "":
+                return self._where_positions(where)
+            return self._where_positions(where, self._find_positions(
+                with_tag=with_tag, without_tag=without_tag, with_id=with_id, with_name=with_name))
+        channels = self.__m3u_channels
+        if with_id != "" or with_name != "":
+            index = self._get_index()
+            if with_id != "" and with_name != "":
+                positions = set(index.positions('tvg_id', with_id))
+                positions = sorted(positions.intersection(index.positions('tvg_name', with_name)))
+            elif with_id != "":
+                positions = index.positions('tvg_id', with_id)
+            else:
+                positions = index.positions('tvg_name', with_name)
+        elif with_tag != "" or without_tag != "":
+            return self._get_tags().positions(with_tag=with_tag, without_tag=without_tag)
+        else:
+            positions = range(len(channels))
+        if with_tag == "" and without_tag == "":
+            return list(positions)
+        return [p for p in positions if (with_tag == "" or channels[p].has_tag(with_tag))
+                and (without_tag == "" or not channels[p].has_tag(without_tag))]
+
+    def _delete_positions(self, positions, release=True):
+        """Delete the channels at positions from the store and the indexes.
+
+        A few channels are deleted one by one, more channels in one
+        partitioning pass over the list, with the indexes updated in one pass
+        as well, so deleting most of a large store stays linear.
+
+        Args:
+            positions: positions to delete
+            release: release shared channels, False when they move to another store
+
+        Returns:
+            list of deleted channels
+        """
+        channels = self.__m3u_channels
+        positions = sorted(set(positions))
+        removed = [channels[p] for p in positions]
+        if release:
+            for ch in removed:
+                ch.release()
+        table = self.__table
+        if table is not None:
+            table.delete(positions)
+        if len(positions) * 2 > len(channels):
+            # most channels go, indexing the channels that stay is less work than removing the others
+            keep = bytearray(b'\x01') * len(channels)
+            for p in positions:
+                keep[p] = 0
+            channels[:] = compress(channels, keep)
+            self._channels_changed(replaced=True, rebuild=True)
+            # the table is already compressed, that is less work than building it again
+            self.__table = table
+            return removed
+        if self.__tags is not None:
+            self.__tags.delete(positions)
+        if len(positions) > 64:
+            if self.__index is not None:
+                self.__index.delete_many(positions, removed)
+            if self.__trigram is not None:
+                self.__trigram.delete_many(positions, removed)
+            keep = bytearray(b'\x01') * len(channels)
+            for p in positions:
+                keep[p] = 0
+            channels[:] = compress(channels, keep)
+        else:
+            for p in reversed(positions):
+                if self.__index is not None:
+                    self.__index.delete(p, channels[p])
+                if self.__trigram is not None:
+                    self.__trigram.delete(p, channels[p])
+                del channels[p]
+        if removed:
+            self._channels_changed(removed=removed)
+        return removed
+
+    def _get_table(self):
+        """Get the columnar table, build it when needed.
+
+        Returns:
+            ChannelTable or None if not columnar
+        """
+        if not self.__columnar:
+            return None
+        if self.__table is None:
+            from .channel_table import ChannelTable
+
+            self.__table = ChannelTable(self.__m3u_channels)
+        return self.__table
 
     def write_error(self, msg):
         """Write error message.
@@ -30,18 +504,215 @@ class ProbeInfoList:
         """
         print(f"ERROR: {msg}")
 
-    def load_m3u_file(self, m3u_file):
+    def load_m3u_file(self, m3u_file, filter_type=LoadType.ALL, parallel_size=0, keep_raw=False):
         """Load a m3u file.
 
+        The file is streamed, channels not matching filter_type are dropped
+        while reading and never kept in memory. Files of parallel_size bytes
+        or more are parsed with a pool of processes. With keep_raw the
+        #EXTM3U line is kept as well and written back by save_m3u_file.
+
         Args:
-            m3u_file: file to load
+            m3u_file: file or http(s) url to load
+            filter_type: type of LoadType to keep
+            parallel_size: minimal file size to use the parallel loader, 0 is never
+            keep_raw: keep the original #EXTINF lines, unchanged channels are saved verbatim
+
+        Returns:
+            list op m3uchannels, None on error, the store is left as it was when a download fails
+        """
+        from .download_m3u import DownloadError
+
+        if filter_type not in (LoadType.ALL, LoadType.CHANNELS, LoadType.VOD):
+            self.write_error(f"unknown type: {filter_type=}")
+            return None
+        try:
+            parallel = parallel_size > 0 and os.path.getsize(m3u_file) >= parallel_size
+        except OSError:
+            parallel = False
+        header = [] if keep_raw else None
+        if parallel:
+            channel_filter = partial(filter_load_type, filter_type=filter_type)
+            channels = import_m3u_file_parallel(m3u_file, channel_filter=channel_filter, keep_raw=keep_raw,
+                                                header=header)
+            self.__m3u_channels = channels or []
+        else:
+            try:
+                channels = list(filter_load_type(iter_m3u_file(m3u_file, keep_raw, header), filter_type))
+            except DownloadError as error:
+                self.write_error(f"can't load m3u_file: {error}")
+                return None
+            self.__m3u_channels = channels
+        self.__m3u_header = header[0] if header else ""
+        self._channels_changed(replaced=True)
+        if self.__m3u_channels == []:
+            self.write_error(f"can't load m3u_file: {m3u_file}")
+            return None
+        return self.__m3u_channels
+
+    def set_channels(self, channels, m3u_header=""):
+        """Replace the channels of the store, for channels loaded elsewhere.
+
+        Args:
+            channels: list of m3uchannels
+            m3u_header: the #EXTM3U line to save, "" for a plain #EXTM3U
 
         Returns:
             list op m3uchannels
         """
-        self.__m3u_channels = import_m3u_file(m3u_file)
-        if self.__m3u_channels == None:
+        self.__m3u_channels = list(channels)
+        self.__m3u_header = m3u_header
+        self._channels_changed(replaced=True)
+        return self.__m3u_channels
+
+    def reload_m3u_file(self, m3u_file, filter_type=LoadType.ALL, keep_raw=False):
+        """Reload a m3u file, keep tags and probe info of unchanged channels.
+
+        Entries are matched on (tvg_id, tvg_name, sources). Matching entries
+        keep their channel, only logo, group title and vod are updated. Of the
+        entries left, the ones with the same tvg_id and tvg_name got a new
+        source, they keep their tags but lose the probe info. The rest is
+        removed or added. A shared channel is only cloned when it changes.
+
+        The kept channels stay in the order of the store, a new entry is
+        inserted after the channel of the entry before it in the playlist,
+        so a store in playlist order gets the order of a fresh load.
+
+        Args:
+            m3u_file: file or http(s) url to load
+            filter_type: type of LoadType to keep
+            keep_raw: keep the original #EXTINF lines, unchanged channels are saved verbatim
+
+        Returns:
+            dict with counts of added, removed, changed and unchanged, None on error
+        """
+        from .download_m3u import DownloadError
+
+        header = [] if keep_raw else None
+        channels = filter_load_type(iter_m3u_file(m3u_file, keep_raw, header), filter_type)
+        if channels is None:
+            self.write_error(f"unknown type: {filter_type=}")
+            return None
+        new_by_key = {}
+        try:
+            for (order, ch) in enumerate(channels):
+                new_by_key.setdefault((ch.tvg_id, ch.tvg_name, tuple(ch.tvg_sources)), deque()).append((order, ch))
+        except DownloadError as error:
+            self.write_error(f"can't reload m3u_file: {error}")
+            return None
+        if new_by_key == {}:
             self.write_error(f"can't load m3u_file: {m3u_file}")
+            return None
+        self.__m3u_header = header[0] if header else ""
+
+        result = {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 0}
+
+        def update_channel(pos, new):
+            old = self.__m3u_channels[pos]
+            if ((old.tvg_logo, old.tvg_group_title, old.vod, old.raw_extinf, old.dirty)
+                    == (new.tvg_logo, new.tvg_group_title, new.vod, new.raw_extinf, False)):
+                return False
+            # a shared channel is only cloned when it changes, the other stores keep the shared one
+            old = self._own(pos)
+            old.tvg_logo = new.tvg_logo
+            old.tvg_group_title = new.tvg_group_title
+            if old.vod != new.vod:
+                old.clear_type()
+            old.vod = new.vod
+            old.raw_extinf = new.raw_extinf
+            old.dirty = False
+            return True
+
+        # the playlist order of the entry of every kept channel, None for the ones left over
+        orders = []
+        unmatched = []
+        for (pos, ch) in enumerate(self.__m3u_channels):
+            same = new_by_key.get((ch.tvg_id, ch.tvg_name, tuple(ch.tvg_sources)))
+            if same:
+                (order, new) = same.popleft()
+                if update_channel(pos, new):
+                    result['changed'] += 1
+                else:
+                    result['unchanged'] += 1
+                orders.append(order)
+            else:
+                orders.append(None)
+                unmatched.append(pos)
+
+        # the entries left over are new or got a new source
+        new_by_id = {}
+        for same in new_by_key.values():
+            for (order, ch) in same:
+                new_by_id.setdefault((ch.tvg_id, ch.tvg_name), deque()).append((order, ch))
+        for pos in unmatched:
+            ch = self.__m3u_channels[pos]
+            same = new_by_id.get((ch.tvg_id, ch.tvg_name))
+            if not same:
+                ch.release()
+                result['removed'] += 1
+                continue
+            (order, new) = same.popleft()
+            update_channel(pos, new)
+            ch = self._own(pos)
+            ch.tvg_sources = new.tvg_sources
+            ch.fhs_dict = None
+            ch.fhs_info = ""
+            orders[pos] = order
+            result['changed'] += 1
+
+        # a new entry goes after the kept channel of the entry before it in the playlist
+        kept = sorted((order, pos) for (pos, order) in enumerate(orders) if order is not None)
+        kept_orders = [order for (order, _) in kept]
+        added_after = {}
+        for (order, ch) in sorted((item for same in new_by_id.values() for item in same), key=itemgetter(0)):
+            before = bisect_left(kept_orders, order)
+            added_after.setdefault(kept[before - 1][1] if before > 0 else -1, []).append(ch)
+            result['added'] += 1
+        channels = added_after.get(-1, [])
+        for (pos, ch) in enumerate(self.__m3u_channels):
+            if orders[pos] is not None:
+                channels.append(ch)
+                channels.extend(added_after.get(pos, ()))
+        self.__m3u_channels = channels
+        self._channels_changed(replaced=True)
+        return result
+
+    def save_store(self, file):
+        """Save the channels and the #EXTM3U line to a binary snapshot.
+
+        Args:
+            file: snapshot file to write
+
+        Returns:
+            count of channels saved, -1 on error
+        """
+        from .snapshot import save_snapshot
+
+        try:
+            return save_snapshot(file, self.__m3u_channels, self.__m3u_header)
+        except OSError as e:
+            self.write_error(f"can't save store to {file}: {e}")
+        return -1
+
+    def load_store(self, file):
+        """Load the channels and the #EXTM3U line from a binary snapshot.
+
+        Args:
+            file: snapshot file to read
+
+        Returns:
+            list op m3uchannels
+        """
+        from .snapshot import load_snapshot, SnapshotError
+
+        header = []
+        try:
+            self.__m3u_channels = load_snapshot(file, header)
+        except (OSError, SnapshotError) as e:
+            self.write_error(f"can't load store from {file}: {e}")
+            return None
+        self.__m3u_header = header[0] if header else ""
+        self._channels_changed(replaced=True)
         return self.__m3u_channels
 
     def filter_lijst(self, filter_type):
@@ -53,79 +724,87 @@ class ProbeInfoList:
         Returns:
             filtered list of type.
         """
-        include_vod = None
         if filter_type == LoadType.ALL:
             return self.__m3u_channels
 
-        if filter_type == LoadType.CHANNELS:
-            include_vod = False
-
-        if filter_type == LoadType.VOD:
-            include_vod = True
-
-        if include_vod is None:
+        table = self._get_table()
+        if table is not None and filter_type in (LoadType.CHANNELS, LoadType.VOD):
+            rows = table.rows(table.mask_vod(filter_type == LoadType.VOD))
+            result = [self.__m3u_channels[row] for row in rows]
+        else:
+            result = filter_load_type(self.__m3u_channels, filter_type)
+        if result is None:
             self.write_error(f"unknown type: {filter_type=}")
             return None
 
-        result = list(filter(lambda d: d.vod is include_vod, self.__m3u_channels))
-        self.__m3u_channels = result
+        self.__m3u_channels = list(result)
+        self._channels_changed(replaced=True)
         return self.__m3u_channels
 
-    def probe_channel(self, *, channel, status_output, max_len=40, delay=5):
-        """Probe a channel.
+    def _apply_probe(self, *, channel, result, status_output, max_len=40):
+        """Store the probe result on a channel.
 
         Args:
             channel: channel array
+            result: mediainfo, None when the probe failed
             status_output: function to output status
             max_len: max len for tvg_name
-            delay: sleep delay after scan
         """
-        if status_output is not None:
-            status_output(f"starting scanning: {channel.tvg_name}")
-        if type(channel.tvg_sources) == list:
-            for source in channel.tvg_sources:
-                result = self.__probe.probe_with_cache(source)
-        else:
-            result = self.__probe.probe_with_cache(channel.tvg_sources)
         if result is None:
             if status_output is not None:
                 status_output(f"no result for: {channel.tvg_name}")
             return
-
         if status_output is not None:
             status_output(f"ready scanning: {channel.tvg_name}")
         (channel.fhs_info, channel.fhs_dict) = self.__probe.info2str_and_dict(result)
         print(f"{channel.tvg_name:{max_len}}:\t{channel.fhs_info}")
-        if result.get('fhs_source', 'unknown') != 'cache':
-            time.sleep(delay)
-        return
-
 
-
-    def probe_scan(self, *, delay=5, status_output=None, with_tag="", without_tag="", with_id="", with_name=""):
+    def probe_scan(self, *, workers=4, per_host=2, rate=0.0, slow=20.0, status_output=None, with_tag="",
+                   without_tag="", with_id="", with_name="", where=""):
         """Probe a m3u file.
 
+        The channels are probed at the same time by workers ffprobe
+        processes, with a budget of connections and starts per provider,
+        see probe_scan.scan_channels, the results are printed in the order
+        they are ready.
+
         Args:
-            delay: delay between channels.
+            workers: max probes at the same time over all providers
+            per_host: max connections at the same time per provider
+            rate: max ffprobe starts per second per provider, 0 is no limit
+            slow: seconds after which a probe counts as slow and lowers the connections
             status_output: function to output status
             with_tag: select on tag set
             without_tag: select on tag not set
             with_id: change only on id
             with_name: change only when name is the same
+            where: filter expression
 
         Returns:
             Status: None
         """
+        from .probe_scan import scan_channels
+
         max_len = 10
-        channels = list(self.get_channels(
-            with_tag=with_tag, without_tag=without_tag, with_id=with_id, with_name=with_name))
+        try:
+            positions = self._find_positions(with_tag=with_tag, without_tag=without_tag,
+                                             with_id=with_id, with_name=with_name, where=where)
+        except FilterError as error:
+            self.write_error(f"invalid where: {error}")
+            return None
+        channels = [self.__m3u_channels[p] for p in positions]
+        position = {id(ch): p for (p, ch) in zip(positions, channels)}
         print(f"channels: {len(channels)}")
         for ch in channels:
             if len(ch.tvg_name) > max_len:
                 max_len = len(ch.tvg_name)
         max_len += 3
-        for ch in channels:
-            self.probe_channel(channel=ch, status_output=status_output, max_len=max_len, delay=delay)
+        results = scan_channels(self.__probe, channels, workers=workers, per_host=per_host, rate=rate, slow=slow)
+        for (ch, result) in results:
+            if result is not None:
+                # the probe info is stored on the channel, a shared channel is only cloned when it gets it
+                ch = self._own(position[id(ch)])
+            self._apply_probe(channel=ch, result=result, status_output=status_output, max_len=max_len)
         return None
 
     def count_channels(self):
@@ -145,6 +824,11 @@ class ProbeInfoList:
         Returns:
             list of groups
         """
+        if vod_only is not True:
+            return sorted(self._get_index().values('tvg_group_title'))
+        table = self._get_table()
+        if table is not None:
+            return sorted({table.groups[code] for code in set(table.group[table.mask_vod(True)].tolist())})
         groups = return_tvg_group_titles(self.__m3u_channels, vod_only)
         return groups
 
@@ -157,11 +841,8 @@ class ProbeInfoList:
         Returns:
             list of channels
         """
-        channels = []
-        for ch in self.__m3u_channels:
-            if ch.tvg_group_title == group:
-                channels.append(ch)
-        return channels
+        channels = self.__m3u_channels
+        return [channels[p] for p in self._get_index().positions('tvg_group_title', group)]
 
     def add_channel(self, *, tvg_id, tvg_name, tvg_logo, tvg_group_title, tvg_source):
         """Add channel.
@@ -178,6 +859,7 @@ class ProbeInfoList:
         """
         self.__m3u_channels.append(M3uChannel(tvg_id=tvg_id, tvg_name=tvg_name.strip(), tvg_logo=tvg_logo, tvg_group_title=tvg_group_title))
         self.__m3u_channels[-1].tvg_sources.append(tvg_source)
+        self._channels_changed(added=self.__m3u_channels[-1:])
         return self.__m3u_channels
 
     def add_channel_struct(self, channel):
@@ -190,9 +872,97 @@ class ProbeInfoList:
             list of channels
         """
         self.__m3u_channels.append(channel)
+        self._channels_changed(added=[channel])
         return self.__m3u_channels
 
-    def select(self, *, with_tag="", without_tag="", tvg_group_title="", tvg_name="", tvg_id="", tvg_source="", set_tag="", clear_tag="", quiet=False):
+    def add_channels(self, channels):
+        """Add channels by struct at the end of the store.
+
+        Args:
+            channels: list of channel structs to add
+
+        Returns:
+            count: channels added
+        """
+        self.__m3u_channels.extend(channels)
+        self._channels_changed(added=channels)
+        return len(channels)
+
+    def _select_positions(self, *, with_tag="", without_tag="", tvg_group_title="", tvg_name="", tvg_id="",
+                          tvg_source="", match="substring", threshold=0.8, where=""):
+        """Find the positions of the channels of a select.
+
+        Args:
+            with_tag: select on tag set
+            without_tag: select on tag not set
+            tvg_id: select based on tvg_id
+            tvg_group_title: select in group_title
+            tvg_name: select in tvg_name
+            tvg_source: select on source url
+            match: substring, icase (case insensitive), regex or fuzzy
+            threshold: minimal similarity for fuzzy, 0.0 - 1.0
+            where: filter expression
+
+        Returns:
+            sorted positions, None on error
+        """
+        if match not in MATCH_MODES:
+            self.write_error(f"unknown match mode {match}, use {', '.join(MATCH_MODES)}")
+            return None
+        if not 0.0 <= threshold <= 1.0:
+            self.write_error(f"threshold must be from 0.0 up to 1.0 and not {threshold}")
+            return None
+        try:
+            filters = compile_filters(tvg_group_title=tvg_group_title, tvg_name=tvg_name, tvg_id=tvg_id,
+                                      match=match, threshold=threshold)
+            where = compile_where(where) if where != "" else None
+        except re.error as error:
+            self.write_error(f"invalid regex: {error}")
+            return None
+        except FilterError as error:
+            self.write_error(f"invalid where: {error}")
+            return None
+
+        if tvg_source != "":
+            self.write_error(f"ERROR: tvg_source not implemented: {tvg_source}.")
+        channels = self.__m3u_channels
+        tags = self._get_tags()
+        positions = None
+        if with_tag != "" or without_tag != "":
+            positions = tags.positions(with_tag=with_tag, without_tag=without_tag)
+        # the trigram index is lowercase, so it only helps a (case insensitive) substring
+        trigram = self._get_trigram() if tvg_name != "" and match in ("substring", "icase") else None
+        candidates = trigram.candidates(tvg_name) if trigram is not None else None
+        if candidates is not None:
+            positions = candidates if positions is None else sorted(set(positions).intersection(candidates))
+        if self.__trigram_enabled and tvg_group_title != "" and positions is None:
+            # there are few group titles, search them and get the channels from the hash index
+            index = self._get_index()
+            group_matcher = get_matcher(tvg_group_title, match, threshold)
+            groups = [group for group in index.values('tvg_group_title') if group_matcher(group)]
+            positions = sorted(p for group in groups for p in index.positions('tvg_group_title', group))
+        table = self._get_table() if match == "substring" else None
+        if table is not None and filters:
+            mask = table.mask_all()
+            if tvg_id != "":
+                mask &= table.id.mask_contains(tvg_id)
+            if tvg_group_title != "":
+                mask &= table.mask_group_contains(tvg_group_title)
+            if tvg_name != "":
+                mask &= table.name.mask_contains(tvg_name)
+            rows = table.rows(mask)
+            positions = rows if positions is None else sorted(set(positions).intersection(rows))
+        elif filters:
+            positions = [p for p in (range(len(channels)) if positions is None else positions)
+                         if match_filters(channels[p], filters)]
+        elif positions is None and where is None:
+            positions = range(len(channels))
+        if where is not None:
+            positions = self._where_positions(where, positions)
+        return sorted(positions)
+
+    def select(self, *, with_tag="", without_tag="", tvg_group_title="", tvg_name="", tvg_id="", tvg_source="",
+               set_tag="", clear_tag="", match="substring", threshold=0.8, where="", quiet=False):
         """Select channel.
 
         If multiple filters are used than it is a 'AND'
@@ -206,111 +976,163 @@ class ProbeInfoList:
             tvg_source: select on source url
             set_tag: set tag
             clear_tag: remove tag
+            match: substring, icase (case insensitive), regex or fuzzy
+            threshold: minimal similarity for fuzzy, 0.0 - 1.0
+            where: filter expression
 
         Returns:
-            count, amount of
+            count, amount of, -1 on error
         """
-        from .utils import check_search_filter_in_string
-
         if set_tag == "" and clear_tag == "":
             self.write_error("ERROR: select needs to set a tag or remove a tag.")
             return -1
+        positions = self._select_positions(with_tag=with_tag, without_tag=without_tag, tvg_group_title=tvg_group_title,
+                                           tvg_name=tvg_name, tvg_id=tvg_id, tvg_source=tvg_source, match=match,
+                                           threshold=threshold, where=where)
+        if positions is None:
+            return -1
+        channels = self.__m3u_channels
+        tags = self._get_tags()
 
         count = 0
-        for ch in self.__m3u_channels:
-            # check if tag is precent
-            if with_tag != "" and with_tag not in ch.fhs_tags:
-                continue
-
-            # check if tag is not precent
-            if without_tag != "" and without_tag in ch.fhs_tags:
-                continue
-
-            if tvg_id != "" and check_search_filter_in_string(ch.tvg_id, tvg_id) is False:
-                continue
-
-            if tvg_group_title != "" and check_search_filter_in_string(ch.tvg_group_title, tvg_group_title) is False:
-                continue
-
-            if tvg_name != "" and check_search_filter_in_string(ch.tvg_name, tvg_name) is False:
-                continue
-
-            if tvg_source != "":
-                self.write_error(f"ERROR: tvg_source not implemented: {tvg_source}.")
+        for p in positions:
+            ch = channels[p]
             count += 1
+            if ch.is_shared() and ((set_tag != "" and not ch.has_tag(set_tag))
+                                   or (clear_tag != "" and ch.has_tag(clear_tag))):
+                ch = self._own(p)
             if set_tag != "":
-                ch.fhs_tags.add(set_tag)
+                ch.add_tag(set_tag)
             if clear_tag != "":
-                try:
-                    ch.fhs_tags.remove(set_tag)
-                except KeyError:
-                    pass
+                ch.remove_tag(clear_tag)
             if quiet is False:
                 print(f"{count}: {ch.tvg_name}     /   {ch.tvg_group_title}")
+        if set_tag != "":
+            tags.set(set_tag, positions)
+        if clear_tag != "":
+            tags.clear(clear_tag, positions)
         return count
 
-    def delete_channels(self, *, with_tag="", without_tag="", with_id="", with_name=""):
+    def list_series(self, search=""):
+        """List series with their seasons and amount of episodes.
+
+        Args:
+            search: only series with this text in the title
+
+        Returns:
+            list of (serie title, dict season -> amount of episodes)
+        """
+        series = self.get_series()
+        result = []
+        for title in series.titles(search):
+            seasons = series.seasons(title)
+            result.append((title, {season: len(seasons[season]) for season in sorted(seasons)}))
+        return result
+
+    def select_series(self, *, search="", mode="all", set_tag):
+        """Select episodes with the series index.
+
+        Args:
+            search: only series with this text in the title
+            mode: all, complete_seasons, latest_season or latest_episode
+            set_tag: tag to set on the selected episodes
+
+        Returns:
+            count, amount of episodes selected, -1 on error
+        """
+        if mode not in ("all", "complete_seasons", "latest_season", "latest_episode"):
+            self.write_error(f"unknown series mode {mode}, use all, complete_seasons, latest_season or latest_episode")
+            return -1
+        if set_tag == "":
+            self.write_error("select_series needs to set a tag.")
+            return -1
+        series = self.get_series()
+        count = 0
+        selected = []
+        for title in series.titles(search):
+            if mode == "latest_episode":
+                latest = series.latest_episode(title)
+                episodes = [latest] if latest is not None else []
+            elif mode == "latest_season":
+                season = series.latest_season(title)
+                episodes = [item for item in series.episodes(title) if item[0] == season]
+            elif mode == "complete_seasons":
+                complete = set(series.complete_seasons(title))
+                episodes = [item for item in series.episodes(title) if item[0] in complete]
+            else:
+                episodes = series.episodes(title)
+            for (_, _, channels) in episodes:
+                selected.extend(channels)
+        for ch in self.own_channels([ch for ch in selected if not ch.has_tag(set_tag)]):
+            ch.add_tag(set_tag)
+        count = len(selected)
+        # the index has no positions, build the tag bitmaps again when needed
+        self.__tags = None
+        return count
+
+    def delete_channels(self, *, with_tag="", without_tag="", with_id="", with_name="", where=""):
         """Delete channels.
 
-        Delete channels
+        Delete the channels matching any of the filters, with_id and
+        with_name are looked up in the hash indexes.
 
         Args:
             with_tag: select on tag set
             without_tag: select on tag not set
+            with_id: select on id
+            with_name: select on name
+            where: filter expression
 
         Returns:
-            count, amount of
+            count, amount of, -1 on error
         """
 
-        if with_tag == "" and without_tag == "" and with_id == "" and with_name == "":
-            self.write_error("delete_channel needs with_tag, without_tag, with_id or with_name set.")
+        if with_tag == "" and without_tag == "" and with_id == "" and with_name == "" and where == "":
+            self.write_error("delete_channel needs with_tag, without_tag, with_id, with_name or where set.")
             return -1
 
-        count = 0
-        for p in range(len(self.__m3u_channels), 0, -1):
-            if with_tag != "" and with_tag in self.__m3u_channels[p - 1].fhs_tags:
-                del self.__m3u_channels[p - 1]
-                count += 1
-                continue
-            if without_tag != "" and without_tag not in self.__m3u_channels[p - 1].fhs_tags:
-                del self.__m3u_channels[p - 1]
-                count += 1
-                continue
-            if with_id != "" and with_id==self.__m3u_channels[p - 1].tvg_id:
-                del self.__m3u_channels[p - 1]
-                count += 1
-                continue
-            if with_name != "" and with_name==self.__m3u_channels[p - 1].tvg_name:
-                del self.__m3u_channels[p - 1]
-                count += 1
-                continue
-        return count
-
-    def get_channels(self, *, with_tag="", without_tag="", with_id="", with_name=""):
+        positions = set()
+        if where != "":
+            try:
+                positions.update(self._find_positions(where=where))
+            except FilterError as error:
+                self.write_error(f"invalid where: {error}")
+                return -1
+        if with_id != "" or with_name != "":
+            index = self._get_index()
+            if with_id != "":
+                positions.update(index.positions('tvg_id', with_id))
+            if with_name != "":
+                positions.update(index.positions('tvg_name', with_name))
+        if with_tag != "":
+            positions.update(self._get_tags().positions(with_tag=with_tag))
+        if without_tag != "":
+            positions.update(self._get_tags().positions(without_tag=without_tag))
+        return len(self._delete_positions(positions))
+
+    def get_channels(self, *, with_tag="", without_tag="", with_id="", with_name="", where=""):
         """Get channels.
 
-        Get channels
+        The positions are found right away, so an error in where is raised
+        here and not while iterating.
 
         Args:
             with_tag: select on tag set
             without_tag: select on tag not set
             with_id: select on id
             with_name: select on name
+            where: filter expression
 
         Returns:
-            yield of channels
-        """
+            generator of channels
 
-        for ch in self.__m3u_channels:
-            if with_id != "" and ch.tvg_id != with_id:
-                continue
-            if with_name != "" and ch.tvg_name != with_name:
-                continue
-            if with_tag != "" and with_tag not in ch.fhs_tags:
-                continue
-            if without_tag != "" and without_tag in ch.fhs_tags:
-                continue
-            yield ch
+        Raises:
+            FilterError: syntax error in where
+        """
+        channels = self.__m3u_channels
+        positions = self._find_positions(with_tag=with_tag, without_tag=without_tag,
+                                         with_id=with_id, with_name=with_name, where=where)
+        return (channels[p] for p in positions)
 
     def clear_tag(self, *, tag):
         """Clear tag.
@@ -321,13 +1143,12 @@ class ProbeInfoList:
         Returns:
             count: amount of tags removed
         """
+        tags = self._get_tags()
         count = 0
-        for ch in self.__m3u_channels:
-            try:
-                ch.fhs_tags.remove(tag)
+        for p in tags.positions(with_tag=tag):
+            if self._own(p).remove_tag(tag):
                 count += 1
-            except KeyError:
-                pass
+        tags.clear(tag)
         return count
 
     def display_channel(self, channel, *, extra=None):
@@ -340,14 +1161,14 @@ class ProbeInfoList:
         Returns:
             str:channel descriptions as string
         """
-        tags = ", ".join(channel.fhs_tags)
+        tags = ", ".join(channel.get_tags())
         if tags != "":
             display_tags = f" tags: {tags}"
         else:
             display_tags = ""
         return f"<{channel.tvg_id}> {channel.tvg_name}   /   {channel.tvg_group_title}{display_tags}"
 
-    def list_channels(self, *, with_tag="", without_tag="", verbose="no"):
+    def list_channels(self, *, with_tag="", without_tag="", where="", verbose="no"):
         """List channels.
 
         List channels
@@ -355,44 +1176,129 @@ class ProbeInfoList:
         Args:
             with_tag: select on tag set
             without_tag: select on tag not set
+            where: filter expression
             verbose: verbose output no or yes
 
         Returns:
-            yield of channels
+            count, -1 on error
         """
 
+        try:
+            channels = self.get_channels(with_tag=with_tag, without_tag=without_tag, where=where)
+        except FilterError as error:
+            self.write_error(f"invalid where: {error}")
+            return -1
         count = 0
-        for ch in self.get_channels(with_tag=with_tag, without_tag=without_tag):
+        for ch in channels:
             count += 1
             print(f"{count}: {self.display_channel(ch)}")
             if verbose == 'yes':
                 pprint(ch)
         return count
 
-    def save_m3u_file(self, *, file, with_tag="", without_tag=""):
-        """List channels.
+    def save_m3u_file(self, *, file, with_tag="", without_tag="", where=""):
+        """Save channels to m3u file.
 
-        List channels
+        The m3u file is replaced atomically, and left alone when the content
+        didn't change.
 
         Args:
             file: filename to save
             with_tag: select on tag set
             without_tag: select on tag not set
+            where: filter expression
+
+        Returns:
+            dict with bytes, count and skipped, or False on error
         """
         from .import_m3u import export_m3u_file
 
-        channels = self.get_channels(with_tag=with_tag, without_tag=without_tag)
-        if export_m3u_file(file, channels) is False:
+        try:
+            channels = self.get_channels(with_tag=with_tag, without_tag=without_tag, where=where)
+        except FilterError as error:
+            self.write_error(f"invalid where: {error}")
+            return False
+        result = export_m3u_file(file, channels, self.__m3u_header)
+        if result is False:
             print(f"save failed to file: {file}.")
-        print(f"channels saved to m3u file {file}")
+            return False
+        if result['skipped']:
+            print(f"m3u file {file} unchanged, {result['count']} channels, {result['bytes']} bytes, write skipped")
+        else:
+            print(f"{result['count']} channels saved to m3u file {file}, {result['bytes']} bytes written")
+        return result
+
+    def save_m3u_files(self, outputs):
+        """Save channels to multiple m3u files in one pass over the channels.
+
+        Every output has its own buffered writer, a channel is rendered once
+        and written to every output it matches.
+
+        Args:
+            outputs: list of dicts with file, with_tag, without_tag and where
 
-    def modify_channels(self, *, with_tag="", without_tag="", with_id="", set_id="", set_name="", set_group_title="", set_logo=""):
+        Returns:
+            list of dicts with file, bytes, count and skipped, or False on error
+        """
+        from .import_m3u import M3uWriter, render_channel
+
+        selected = []
+        for output in outputs:
+            if output.get('where', "") == "":
+                selected.append(None)
+                continue
+            try:
+                positions = self._find_positions(with_tag=output.get('with_tag', ""),
+                                                 without_tag=output.get('without_tag', ""), where=output['where'])
+                selected.append(set(positions))
+            except FilterError as error:
+                self.write_error(f"invalid where for {output['file']}: {error}")
+                return False
+        writers = []
+        try:
+            for (output, positions) in zip(outputs, selected):
+                writers.append((M3uWriter(output['file'], header=self.__m3u_header), output.get('with_tag', ""),
+                                output.get('without_tag', ""), positions))
+            for (p, ch) in enumerate(self.__m3u_channels):
+                lines = None
+                for (writer, with_tag, without_tag, positions) in writers:
+                    if positions is not None:
+                        if p not in positions:
+                            continue
+                    elif with_tag != "" and not ch.has_tag(with_tag):
+                        continue
+                    elif without_tag != "" and ch.has_tag(without_tag):
+                        continue
+                    if lines is None:
+                        lines = render_channel(ch)
+                    writer.write(ch, lines)
+            results = []
+            while writers:
+                writer = writers.pop(0)[0]
+                results.append(writer.close())
+        except OSError as e:
+            for (writer, _, _, _) in writers:
+                writer.abort()
+            self.write_error(f"save failed: {e}")
+            return False
+        for result in results:
+            if result['skipped']:
+                print(f"m3u file {result['file']} unchanged, {result['count']} channels, {result['bytes']} bytes, "
+                      "write skipped")
+            else:
+                print(f"{result['count']} channels saved to m3u file {result['file']}, "
+                      f"{result['bytes']} bytes written")
+        return results
+
+    def modify_channels(self, *, with_tag="", without_tag="", with_id="", where="", set_id="", set_name="",
+                        set_group_title="", set_logo=""):
         """Modify channel.
 
         Args:
             with_tag: select on tag set
             without_tag: select on tag not set
             with_id: change only on id
+            where: filter expression
             set_id: set new id
             set_name: set_name
             set_group_title: set group title
@@ -401,76 +1307,207 @@ class ProbeInfoList:
         Returns:
             count: channels changed.
         """
-        channels = self.get_channels(with_tag=with_tag, without_tag=without_tag, with_id=with_id)
+        from .channel_index import KEYS
+
+        try:
+            positions = self._find_positions(with_tag=with_tag, without_tag=without_tag, with_id=with_id, where=where)
+        except FilterError as error:
+            self.write_error(f"invalid where: {error}")
+            return -1
         if set_id != "" or set_name != "" or set_logo != "":
             # this modifications we do only on one channel at a time.
-            channels = list(channels)
-            if len(channels) != 1:
-                self.write_error(f"ERROR: you can only change this type one channel on a time and not for {len(channels)}")
+            if len(positions) != 1:
+                self.write_error("ERROR: you can only change this type one channel on a time "
+                                 f"and not for {len(positions)}")
                 return -1
+        if set_id == "" and set_name == "" and set_group_title == "" and set_logo == "":
+            return len(positions)
         count = 0
-        for ch in channels:
+        for p in positions:
+            ch = self._own(p)
             count += 1
+            old_values = {key: getattr(ch, key) for key in KEYS}
+            if set_name != "" and self.__series is not None:
+                # the series index finds the channel with the old serie info, so remove before clear_type
+                self.__series.remove(ch)
             if set_id != "":
                 ch.tvg_id = set_id
             if set_name != "":
                 ch.tvg_name = set_name
+                ch.clear_type()
+                if self.__series is not None:
+                    self.__series.add(ch)
             if set_group_title != "":
                 ch.tvg_group_title = set_group_title
             if set_logo != "":
                 ch.tvg_logo = set_logo
+            ch.mark_dirty()
+            if self.__index is not None:
+                self.__index.update(p, old_values, ch)
+            if self.__table is not None:
+                self.__table.update(p, ch)
+            if self.__trigram is not None:
+                self.__trigram.update(p, old_values['tvg_name'], ch)
         return count
 
-    def copy_channels(self, *, with_tag="", without_tag="", with_id="", with_name="", to_store):
+    def copy_channels(self, *, with_tag="", without_tag="", with_id="", with_name="", where="", to_store, quiet=False):
         """Copy channel to store.
 
+        The channels are shared with the other store and not copied, the
+        store that changes or tags a shared channel first makes a private
+        clone of it.
+
         Args:
             with_tag: select on tag set
             without_tag: select on tag not set
             with_id: change only on id
             with_name: change only when name is the same
+            where: filter expression
             to_store: store to copy to
+            quiet: don't print the copied channels
 
         Returns:
-            count: channels changed.
+            count: channels changed, -1 on error
         """
-        channels = self.get_channels(with_tag=with_tag, without_tag=without_tag, with_id=with_id, with_name=with_name)
-        count = 0
-        for ch in channels:
-            count += 1
-            # create a copy of the structure with copy.copy
-            to_store.add_channel_struct(copy.copy(ch))
-            print(f"copied {ch.tvg_name}")
-        return count
+        try:
+            channels = self.get_channels(with_tag=with_tag, without_tag=without_tag,
+                                         with_id=with_id, with_name=with_name, where=where)
+        except FilterError as error:
+            self.write_error(f"invalid where: {error}")
+            return -1
+        shared = [ch.share() for ch in channels]
+        if quiet is False:
+            for ch in shared:
+                print(f"copied {ch.tvg_name}")
+        return to_store.add_channels(shared)
+
+    def remove_channels(self, channels):
+        """Remove channel objects from the store.
+
+        Removed channels that are shared with another store are released, so
+        the other store doesn't clone them on its next change.
+
+        Args:
+            channels: m3uchannels of this store to remove
+
+        Returns:
+            count: channels removed
+        """
+        remove = {id(ch) for ch in channels}
+        positions = [p for (p, ch) in enumerate(self.__m3u_channels) if id(ch) in remove]
+        return len(self._delete_positions(positions, release=True))
+
+    def move_channels(self, *, with_tag="", without_tag="", with_id="", with_name="", where="", to_store):
+        """Move channels to store.
+
+        The channel objects are taken out of this store in one pass and
+        added to the other store, with their tags and probe info.
+
+        Args:
+            with_tag: select on tag set
+            without_tag: select on tag not set
+            with_id: move only on id
+            with_name: move only when name is the same
+            where: filter expression
+            to_store: store to move to
 
-    def sort_channels(self, *, sort_key1="", sort_key2=""):
+        Returns:
+            count: channels moved, -1 on error
+        """
+        if to_store is self:
+            self.write_error("can't move channels to the same store.")
+            return -1
+        try:
+            positions = self._find_positions(with_tag=with_tag, without_tag=without_tag,
+                                             with_id=with_id, with_name=with_name, where=where)
+        except FilterError as error:
+            self.write_error(f"invalid where: {error}")
+            return -1
+        return to_store.add_channels(self._delete_positions(positions, release=False))
+
+    def select_copy(self, *, with_tag="", without_tag="", tvg_group_title="", tvg_name="", tvg_id="", tvg_source="",
+                    match="substring", threshold=0.8, where="", to_store):
+        """Copy the channels of a select to store.
+
+        The channels are shared like copy_channels, the selected positions
+        are copied directly, so no channel is tagged and cloned for it.
+
+        Args:
+            with_tag: select on tag set
+            without_tag: select on tag not set
+            tvg_id: select based on tvg_id
+            tvg_group_title: select in group_title
+            tvg_name: select in tvg_name
+            tvg_source: select on source url
+            match: substring, icase (case insensitive), regex or fuzzy
+            threshold: minimal similarity for fuzzy, 0.0 - 1.0
+            where: filter expression
+            to_store: store to copy to
+
+        Returns:
+            count: channels copied, -1 on error
+        """
+        positions = self._select_positions(with_tag=with_tag, without_tag=without_tag, tvg_group_title=tvg_group_title,
+                                           tvg_name=tvg_name, tvg_id=tvg_id, tvg_source=tvg_source, match=match,
+                                           threshold=threshold, where=where)
+        if positions is None:
+            return -1
+        channels = self.__m3u_channels
+        return to_store.add_channels([channels[p].share() for p in positions])
+
+    def select_move(self, *, with_tag="", without_tag="", tvg_group_title="", tvg_name="", tvg_id="", tvg_source="",
+                    match="substring", threshold=0.8, where="", to_store):
+        """Move the channels of a select to store.
+
+        Like move_channels the channel objects are taken out of this store in
+        one pass.
+
+        Args:
+            with_tag: select on tag set
+            without_tag: select on tag not set
+            tvg_id: select based on tvg_id
+            tvg_group_title: select in group_title
+            tvg_name: select in tvg_name
+            tvg_source: select on source url
+            match: substring, icase (case insensitive), regex or fuzzy
+            threshold: minimal similarity for fuzzy, 0.0 - 1.0
+            where: filter expression
+            to_store: store to move to
+
+        Returns:
+            count: channels moved, -1 on error
+        """
+        if to_store is self:
+            self.write_error("can't move channels to the same store.")
+            return -1
+        positions = self._select_positions(with_tag=with_tag, without_tag=without_tag, tvg_group_title=tvg_group_title,
+                                           tvg_name=tvg_name, tvg_id=tvg_id, tvg_source=tvg_source, match=match,
+                                           threshold=threshold, where=where)
+        if positions is None:
+            return -1
+        return to_store.add_channels(self._delete_positions(positions, release=False))
+
+    def sort_channels(self, *, sort_key1="", sort_key2="", keys=""):
         """Sort channels.
 
         Args:
             sort_key1: first key to sort on
             sort_key2: second key to sort on
+            keys: sort keys separated by commas, like tvg_group_title,tvg_name:natural,probe.video.height:desc,
+                  used instead of sort_key1 and sort_key2, see sort_keys
 
         Returns:
-            result: boolean
+            result: boolean, False for an invalid sort key
         """
-        if self.__m3u_channels == []:
+        if keys == "":
+            keys = ",".join(key for key in (sort_key1, sort_key2) if key != "")
+        if self.__m3u_channels == [] and keys.strip() == "":
             return True
         try:
-            getattr(self.__m3u_channels[0], sort_key1)
-        except AttributeError as e:
-            print(f"ERROR: sortkey 1 not found: {e}")
+            sort_keys = parse_sort_keys(keys)
+            sort_on_keys(self.__m3u_channels, sort_keys)
+        except SortKeyError as e:
+            print(f"ERROR: sort failed: {e}")
             return False
-
-        if sort_key2 == "":
-            sort_key2 = sort_key1
-        try:
-            getattr(self.__m3u_channels[0], sort_key2)
-        except AttributeError as e:
-            print(f"ERROR: sortkey 2 not found: {e}")
-            return False
-
-        def sorted_key(m3u_info):
-            return (getattr(m3u_info, sort_key1), getattr(m3u_info, sort_key2))
-
-        self.__m3u_channels.sort(key=sorted_key)
+        self._channels_changed(reordered=True)
         return True
@@ -0,0 +1,223 @@
+"""Probe the channels of a store with several ffprobe processes at once.
+
+The probes run in a pool of threads, ffprobe is a subprocess so the threads
+only wait on it. Every source is probed once, also when channels share it.
+The results are returned in the order they are ready, the caller stores
+them on the channels, so the store is only changed by one thread.
+
+Providers limit the connections per account and ban clients that open too
+many, so the sources are grouped per provider (host and user name, see
+get_source_group) and every group has a HostBudget: a max of connections at
+the same time and a token bucket for the ffprobe starts. The scheduler
+starts one probe per group in turn, so the work is spread over the
+providers. The connections of a group start at 1 and adapt with AIMD: one
+more after a round of good probes, half after an error or a slow probe.
+
+The cache works like ProbeInfo.probe_with_cache, cached sources are read
+in one batch before the scan and don't use connections or tokens.
+"""
+
+import queue
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+# xtream codes urls: /live/<user>/<password>/<id>.ts or /<user>/<password>/<id>
+XTREAM_TYPES = ('live', 'movie', 'series', 'timeshift')
+STREAM_ID_REGEX = re.compile(r'^\d+(\.\w+)?$')
+
+
+def get_source_group(source):
+    """Get the provider group of a source, the host with the user name when there is one.
+
+    Args:
+        source: url or path
+
+    Returns:
+        group name, like user@host:port, host:port or local
+    """
+    parts = urlsplit(source)
+    if not parts.netloc:
+        return "local"
+    host = parts.netloc.rpartition('@')[2].lower()
+    user = parts.username
+    if not user:
+        user = parse_qs(parts.query).get('username', [None])[0]
+    if not user:
+        segments = parts.path.strip('/').split('/')
+        if len(segments) == 4 and segments[0] in XTREAM_TYPES:
+            user = segments[1]
+        elif len(segments) == 3 and STREAM_ID_REGEX.match(segments[2]):
+            user = segments[0]
+    return f"{user}@{host}" if user else host
+
+
+class HostBudget:
+    def __init__(self, *, max_connections=2, rate=0.0, slow=20.0):
+        """Initiate class.
+
+        Args:
+            max_connections: max connections at the same time
+            rate: tokens per second for the ffprobe starts, 0 is no limit
+            slow: seconds after which a probe counts as slow
+        """
+        self.max_connections = max(1, max_connections)
+        self.limit = 1.0
+        self.active = 0
+        self._rate = rate
+        self._burst = float(self.max_connections)
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._slow = slow
+
+    def ready(self, now):
+        """Check if a probe can start.
+
+        Args:
+            now: time.monotonic()
+
+        Returns:
+            (can start, seconds to wait for a token or None when waiting on a connection)
+        """
+        if self.active >= int(self.limit):
+            return (False, None)
+        if self._rate <= 0:
+            return (True, 0.0)
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        if self._tokens >= 1.0:
+            return (True, 0.0)
+        return (False, (1.0 - self._tokens) / self._rate)
+
+    def start(self):
+        """Use a connection and a token."""
+        self.active += 1
+        if self._rate > 0:
+            self._tokens -= 1.0
+
+    def finish(self, ok, seconds):
+        """Release a connection and adapt the limit.
+
+        Args:
+            ok: the probe had a result
+            seconds: duration of the probe
+        """
+        self.active -= 1
+        if ok and seconds < self._slow:
+            # additive increase: one more connection after a limit of good probes
+            self.limit = min(float(self.max_connections), self.limit + 1.0 / self.limit)
+        else:
+            self.limit = max(1.0, self.limit / 2)
+
+
+def probe_source(probe, source, group, done):
+    """Probe a source in a worker thread.
+
+    Args:
+        probe: ProbeInfo
+        source: source to probe
+        group: group of the source
+        done: queue for (source, group, mediainfo or None, seconds)
+    """
+    start = time.monotonic()
+    try:
+        result = probe.probe_with_cache(source)
+    except Exception:  # noqa:B902
+        result = None
+    done.put((source, group, result, time.monotonic() - start))
+
+
+def scan_channels(probe, channels, *, workers=4, per_host=2, rate=0.0, slow=20.0):
+    """Probe channels at the same time.
+
+    Every source of a channel is probed, the channel gets the result of its
+    last source, None when that one failed even if an earlier source worked.
+
+    Args:
+        probe: ProbeInfo
+        channels: list of m3uchannels
+        workers: max probes at the same time over all providers
+        per_host: max connections at the same time per provider
+        rate: max ffprobe starts per second per provider, 0 is no limit
+        slow: seconds after which a probe counts as slow and lowers the connections
+
+    Yields:
+        (m3uchannel, mediainfo or None), in the order the probes are ready
+    """
+    workers = max(1, workers)
+    jobs = {}
+    for ch in channels:
+        jobs.setdefault(tuple(ch.tvg_sources), []).append(ch)
+    results = {}
+    waiting = {}
+    remaining = {}
+    for sources in jobs:
+        if not sources:
+            for ch in jobs[sources]:
+                yield (ch, None)
+            continue
+        remaining[sources] = len(set(sources))
+        for source in set(sources):
+            waiting.setdefault(source, []).append(sources)
+
+    def ready(source, result):
+        results[source] = result
+        for sources in waiting.pop(source):
+            remaining[sources] -= 1
+            if remaining[sources] == 0:
+                for ch in jobs[sources]:
+                    yield (ch, results[sources[-1]])
+
+    pending = {}
+    cached = probe.load_cache_sources(list(waiting))
+    for source in list(waiting):
+        media_info = cached.get(source)
+        if media_info is not None:
+            media_info['fhs_source'] = 'cache'
+            yield from ready(source, media_info)
+        else:
+            pending.setdefault(get_source_group(source), deque()).append(source)
+    budgets = {group: HostBudget(max_connections=per_host, rate=rate, slow=slow) for group in pending}
+    order = deque(pending)
+    done = queue.Queue()
+    running = 0
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while order or running:
+            # start one probe per group in turn till the workers are busy or no group can start
+            wait = None
+            started = True
+            while started and running < workers:
+                started = False
+                now = time.monotonic()
+                for _ in range(len(order)):
+                    if running >= workers or not order:
+                        break
+                    group = order[0]
+                    (can_start, group_wait) = budgets[group].ready(now)
+                    if can_start:
+                        budgets[group].start()
+                        executor.submit(probe_source, probe, pending[group].popleft(), group, done)
+                        running += 1
+                        started = True
+                        if not pending[group]:
+                            order.popleft()
+                            continue
+                    elif group_wait is not None:
+                        wait = group_wait if wait is None else min(wait, group_wait)
+                    order.rotate(-1)
+            if running == 0 and wait is not None:
+                time.sleep(wait)
+                continue
+            try:
+                (source, group, result, seconds) = done.get(timeout=wait)
+            except queue.Empty:
+                continue
+            running -= 1
+            budgets[group].finish(result is not None, seconds)
+            yield from ready(source, result)
+    finally:
+        # the caller can stop early, only the running probes are waited for
+        executor.shutdown(wait=True)
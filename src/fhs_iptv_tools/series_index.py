@@ -0,0 +1,138 @@
+"""Index of the episodes in a store, serie title -> season -> episode -> channels."""
+
+from .import_m3u import ChannelType
+
+
+class SeriesIndex:
+    def __init__(self, m3u_channels=()):
+        """Initiate class.
+
+        Args:
+            m3u_channels: channels to index, only episodes are added
+        """
+        self._series = {}
+        for ch in m3u_channels:
+            self.add(ch)
+
+    def add(self, ch):
+        """Add channel to the index if it is an episode.
+
+        Args:
+            ch: m3uchannel
+        """
+        if ch.classify() is not ChannelType.EPISODE:
+            return
+        (title, season, episode) = ch.get_serie()
+        self._series.setdefault(title, {}).setdefault(season, {}).setdefault(episode, []).append(ch)
+
+    def remove(self, ch):
+        """Remove channel from the index.
+
+        Uses the cached serie info of the channel, so remove a channel before
+        changing its name.
+
+        Args:
+            ch: m3uchannel
+        """
+        if ch.tvg_type is not ChannelType.EPISODE:
+            return
+        (title, season, episode) = ch.get_serie()
+        seasons = self._series.get(title)
+        if seasons is None or season not in seasons or episode not in seasons[season]:
+            return
+        channels = seasons[season][episode]
+        for (pos, other) in enumerate(channels):
+            if other is ch:
+                del channels[pos]
+                break
+        if not channels:
+            del seasons[season][episode]
+            if not seasons[season]:
+                del seasons[season]
+                if not seasons:
+                    del self._series[title]
+
+    def titles(self, search=""):
+        """Get the serie titles.
+
+        Args:
+            search: only titles with this text in it
+
+        Returns:
+            sorted list of serie titles
+        """
+        return sorted(title for title in self._series if search in title)
+
+    def seasons(self, title):
+        """Get the seasons of a serie.
+
+        Args:
+            title: serie title
+
+        Returns:
+            dict season -> episode -> list of channels
+        """
+        return self._series.get(title, {})
+
+    def episodes(self, title):
+        """Get all episodes of a serie.
+
+        Args:
+            title: serie title
+
+        Yields:
+            (season, episode, list of channels), sorted on season and episode
+        """
+        seasons = self.seasons(title)
+        for season in sorted(seasons):
+            for episode in sorted(seasons[season]):
+                yield (season, episode, seasons[season][episode])
+
+    def complete_seasons(self, title):
+        """Get the seasons without missing episodes, from episode 1 to the last one.
+
+        Args:
+            title: serie title
+
+        Returns:
+            sorted list of seasons
+        """
+        seasons = self.seasons(title)
+        return sorted(season for (season, episodes) in seasons.items()
+                      if len(episodes) == max(episodes) and min(episodes) == 1)
+
+    def latest_season(self, title):
+        """Get the last season of a serie.
+
+        Args:
+            title: serie title
+
+        Returns:
+            season or None
+        """
+        seasons = self.seasons(title)
+        return max(seasons) if seasons else None
+
+    def latest_episode(self, title):
+        """Get the last episode of a serie.
+
+        Args:
+            title: serie title
+
+        Returns:
+            (season, episode, list of channels) or None
+        """
+        season = self.latest_season(title)
+        if season is None:
+            return None
+        episode = max(self._series[title][season])
+        return (season, episode, self._series[title][season][episode])
+
+    def count(self):
+        """Count series and episodes.
+
+        Returns:
+            (amount of series, amount of episodes)
+        """
+        episodes = sum(len(episodes) for seasons in self._series.values() for episodes in seasons.values())
+        return (len(self._series), episodes)
@@ -0,0 +1,285 @@
+"""Binary snapshot of m3u channels.
+
+Layout, all numbers little endian:
+
+- header: magic, version, record size, record count
+- records: length prefixed section with a fixed size record per channel with
+  string table indexes for id, name, logo, group title, probe info, probe
+  dict (json) and raw #EXTINF line, flags, channel type and the amount of
+  sources and tags
+- lists: length prefixed section with the string table indexes of the
+  sources and tags of all channels after each other
+- string table: length prefixed section with all strings joined with NUL
+- m3u header: length prefixed section with the #EXTM3U line of the list
+
+Every string is stored once in the string table, so the repeated group
+titles and logo urls cost only an index per channel. The fixed size records
+are read with a single struct.iter_unpack. A newer version may only add
+fields at the end of a record, a reader skips those extra bytes, so a
+snapshot of a newer version can be read as long as its records are not
+smaller than the records of this version.
+
+A snapshot that is truncated or corrupt raises SnapshotError.
+"""
+
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from itertools import islice
+
+from .import_m3u import ChannelType, M3uChannel
+
+SNAPSHOT_MAGIC = b'FHSSNAP\0'
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct('<8sHHI')
+RECORD = struct.Struct('<IIIIIIBBIII')
+SECTION_LENGTH = struct.Struct('<Q')
+
+FLAG_VOD = 1
+FLAG_SELECTED = 2
+FLAG_DIRTY = 4
+
+
+class SnapshotError(Exception):
+    """Snapshot file can't be read."""
+
+
+class SnapshotWriter:
+    def __init__(self, snapshot_file, header=""):
+        """Initiate class.
+
+        Channels are written while they are added, only the string table is
+        kept in memory and written when the snapshot is closed. The snapshot
+        is written to a temporary file and renamed on close.
+
+        Args:
+            snapshot_file: file to write
+            header: the #EXTM3U line of the list, "" for none
+        """
+        self._snapshot_file = snapshot_file
+        self.header = header
+        (fd, self._tmp_file) = tempfile.mkstemp(dir=os.path.dirname(snapshot_file) or ".",
+                                                prefix=f".{os.path.basename(snapshot_file)}.", suffix=".tmp")
+        self._target = os.fdopen(fd, 'wb')
+        self._target.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, RECORD.size, 0))
+        self._target.write(SECTION_LENGTH.pack(0))
+        self._strings = {}
+        self._lists = array('I')
+        self._count = 0
+
+    def __enter__(self):
+        """Enter context.
+
+        Returns:
+            self
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Exit context, only keep the snapshot if there was no exception.
+
+        Args:
+            exc_type: exception type
+            exc_value: exception
+            traceback: traceback
+        """
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def count(self):
+        """Get amount of channels written.
+
+        Returns:
+            count
+        """
+        return self._count
+
+    def string_index(self, value):
+        """Get the string table index of a string.
+
+        Args:
+            value: string
+
+        Returns:
+            index
+        """
+        index = self._strings.get(value)
+        if index is None:
+            if '\0' in value:
+                value = value.replace('\0', '')
+                return self.string_index(value)
+            index = len(self._strings)
+            self._strings[value] = index
+        return index
+
+    def add(self, channel):
+        """Add channel to the snapshot.
+
+        Args:
+            channel: m3uchannel
+        """
+        get = self._strings.get
+
+        def index(value):
+            found = get(value)
+            return self.string_index(value) if found is None else found
+
+        flags = ((FLAG_VOD if channel.vod else 0) | (FLAG_SELECTED if channel.fhs_selected else 0)
+                 | (FLAG_DIRTY if channel.dirty else 0))
+        probe_dict = channel.get_probe_dict()
+        fhs_dict = json.dumps(dict(probe_dict), separators=(',', ':')) if probe_dict else ''
+        tags = channel.get_tags()
+        self._lists.extend([index(source) for source in channel.tvg_sources])
+        if tags:
+            self._lists.extend([index(tag) for tag in sorted(tags)])
+        self._target.write(RECORD.pack(
+            index(channel.tvg_id), index(channel.tvg_name), index(channel.tvg_logo),
+            index(channel.tvg_group_title), index(channel.fhs_info), index(fhs_dict),
+            flags, channel.tvg_type.value, len(channel.tvg_sources), len(tags), index(channel.raw_extinf)
+        ))
+        self._count += 1
+
+    def close(self):
+        """Write the lists, string table and header, and rename the snapshot in place."""
+        records_length = self._count * RECORD.size
+        if self._lists.itemsize != 4 or sys.byteorder != 'little':
+            self._lists = array('I', struct.pack(f'<{len(self._lists)}I', *self._lists))
+        self._target.write(SECTION_LENGTH.pack(len(self._lists) * 4))
+        self._target.write(self._lists.tobytes())
+        table = '\0'.join(self._strings).encode('utf-8')
+        self._target.write(SECTION_LENGTH.pack(len(table)))
+        self._target.write(table)
+        m3u_header = self.header.encode('utf-8')
+        self._target.write(SECTION_LENGTH.pack(len(m3u_header)))
+        self._target.write(m3u_header)
+        self._target.seek(0)
+        self._target.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, RECORD.size, self._count))
+        self._target.write(SECTION_LENGTH.pack(records_length))
+        self._target.close()
+        try:
+            os.replace(self._tmp_file, self._snapshot_file)
+        except OSError:
+            self.abort()
+            raise
+
+    def abort(self):
+        """Stop writing and remove the temporary file."""
+        self._target.close()
+        try:
+            os.remove(self._tmp_file)
+        except FileNotFoundError:
+            pass
+
+
+def save_snapshot(snapshot_file, m3u_channels, header=""):
+    """Save channels to a snapshot file.
+
+    Args:
+        snapshot_file: file to write
+        m3u_channels: iterable of m3uchannels
+        header: the #EXTM3U line of the list, "" for none
+
+    Returns:
+        count of channels saved
+    """
+    with SnapshotWriter(snapshot_file, header) as writer:
+        for ch in m3u_channels:
+            writer.add(ch)
+    return writer.count
+
+
+def iter_snapshot(snapshot_file, header=None):
+    """Iterate over the channels in a snapshot file.
+
+    Args:
+        snapshot_file: file to read
+        header: optional list, the #EXTM3U line is added to it
+
+    Yields:
+        m3uchannel
+
+    Raises:
+        SnapshotError: not a snapshot, a truncated or corrupt snapshot or a record size that can't be read
+    """
+    with open(snapshot_file, 'rb') as source:
+        data = memoryview(source.read())
+    if len(data) < HEADER.size + SECTION_LENGTH.size:
+        raise SnapshotError(f"{snapshot_file} is not a snapshot")
+    (magic, version, record_size, count) = HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{snapshot_file} is not a snapshot")
+    pos = HEADER.size
+    sections = []
+    for _ in range(4):
+        if pos + SECTION_LENGTH.size > len(data):
+            raise SnapshotError(f"{snapshot_file} is truncated")
+        (length,) = SECTION_LENGTH.unpack_from(data, pos)
+        pos += SECTION_LENGTH.size
+        if pos + length > len(data):
+            raise SnapshotError(f"{snapshot_file} is truncated")
+        sections.append(data[pos:pos + length])
+        pos += length
+    (records, lists_data, table, m3u_header) = sections
+    if record_size < RECORD.size:
+        raise SnapshotError(f"{snapshot_file} has version {version} records of {record_size} bytes, "
+                            f"expected {RECORD.size}")
+    if len(records) < count * record_size or len(lists_data) % 4 != 0:
+        raise SnapshotError(f"{snapshot_file} is corrupt")
+    records = records[:count * record_size]
+    record = RECORD if record_size == RECORD.size else struct.Struct(f"{RECORD.format}{record_size - RECORD.size}x")
+    lists = array('I', bytes(lists_data))
+    if lists.itemsize != 4 or sys.byteorder != 'little':
+        lists = struct.unpack(f'<{len(lists_data) // 4}I', lists_data)
+    try:
+        strings = str(table, 'utf-8').split('\0')
+    except UnicodeDecodeError as e:
+        raise SnapshotError(f"{snapshot_file} has a corrupt string table: {e}") from e
+    if header is not None and len(m3u_header) > 0:
+        try:
+            header.append(str(m3u_header, 'utf-8'))
+        except UnicodeDecodeError as e:
+            raise SnapshotError(f"{snapshot_file} has a corrupt m3u header: {e}") from e
+    channel_types = list(ChannelType)
+
+    list_iter = iter(lists)
+    for (tvg_id, tvg_name, tvg_logo, group_title, fhs_info, fhs_dict, flags, tvg_type,
+         sources, tags, raw_extinf) in record.iter_unpack(records):
+        try:
+            source_list = [strings[i] for i in islice(list_iter, sources)]
+            tag_list = [strings[i] for i in islice(list_iter, tags)]
+            if len(source_list) != sources or len(tag_list) != tags:
+                raise SnapshotError(f"{snapshot_file} is corrupt, the list of sources and tags is too short")
+            fhs_dict = strings[fhs_dict]
+            ch = M3uChannel(
+                strings[tvg_id], strings[tvg_name], strings[tvg_logo], strings[group_title],
+                flags & FLAG_VOD != 0, source_list, channel_types[tvg_type],
+                flags & FLAG_SELECTED != 0, set(tag_list) if tags else None,
+                json.loads(fhs_dict) if fhs_dict else None, strings[fhs_info], strings[raw_extinf],
+                flags & FLAG_DIRTY != 0
+            )
+        except (IndexError, ValueError) as e:
+            raise SnapshotError(f"{snapshot_file} is corrupt: {e}") from e
+        yield ch
+
+
+def load_snapshot(snapshot_file, header=None):
+    """Load channels from a snapshot file.
+
+    Args:
+        snapshot_file: file to read
+        header: optional list, the #EXTM3U line is added to it
+
+    Returns:
+        list of m3uchannels
+
+    Raises:
+        SnapshotError: not a snapshot, a truncated or corrupt snapshot or a record size that can't be read
+    """
+    return list(iter_snapshot(snapshot_file, header))
@@ -0,0 +1,185 @@
+"""Sort keys for ProbeInfoList.sort_channels.
+
+A sort is a list of keys, separated by commas, every key is a field with
+an optional mode and direction:
+
+    tvg_group_title, tvg_name:natural, probe.video.height:desc
+
+A field is a channel attribute (tvg_name, season, ...), a field of the
+filter expressions (name, group, type, ...) or probe.<type>.<key> from the
+probe info. The modes are plain, casefold (case insensitive) and natural
+(case insensitive, the numbers in the text compared as numbers, so
+'Ch 2' comes before 'Ch 10'). The direction is asc or desc.
+
+The value of every key is read once per channel. The distinct values of a
+key are sorted in its mode and direction and numbered, so the mode (like
+the natural key) is only computed per distinct value. The numbers of all
+keys are combined in one integer per channel and the channels are sorted
+once on that integer, the sort is stable. Channels without a value for a
+key are last, in both directions.
+"""
+
+import re
+from operator import attrgetter
+
+from .filter_expr import STRING_FIELDS, NUMBER_FIELDS, BOOL_FIELDS, probe_getter
+
+SORT_MODES = ("plain", "casefold", "natural")
+SORT_DIRECTIONS = ("asc", "desc")
+DIGITS_REGEX = re.compile(r'(\d+)')
+
+
+class SortKeyError(ValueError):
+    """Error in a sort key."""
+
+
+def natural_key(text):
+    """Get the natural sort key of a text.
+
+    Args:
+        text: text
+
+    Returns:
+        tuple of casefolded text and numbers, text parts and numbers alternate
+    """
+    parts = DIGITS_REGEX.split(text.casefold())
+    parts[1::2] = [int(part) for part in parts[1::2]]
+    return tuple(parts)
+
+
+def get_field_getter(field, sample=None):
+    """Get the function that reads a field of a channel.
+
+    Args:
+        field: channel attribute, filter field or probe.<type>.<key>
+        sample: m3uchannel to check a channel attribute on
+
+    Returns:
+        function channel -> value or None
+
+    Raises:
+        SortKeyError: unknown field
+    """
+    if field.startswith('probe.'):
+        return probe_getter(field)
+    getter = STRING_FIELDS.get(field) or NUMBER_FIELDS.get(field) or BOOL_FIELDS.get(field)
+    if getter is not None:
+        return getter
+    if field.startswith('_') or (sample is not None and not hasattr(sample, field)):
+        raise SortKeyError(f"unknown sort key {field}")
+    return attrgetter(field)
+
+
+def parse_sort_keys(text):
+    """Parse a list of sort keys.
+
+    Args:
+        text: keys separated by commas, a key is field[:mode][:direction]
+
+    Returns:
+        list of (field, mode, descending)
+
+    Raises:
+        SortKeyError: invalid key
+    """
+    keys = []
+    for item in text.split(','):
+        item = item.strip()
+        if item == "":
+            continue
+        (field, *options) = [part.strip() for part in item.split(':')]
+        mode = "plain"
+        descending = False
+        for option in options:
+            option = option.lower()
+            if option in SORT_MODES:
+                mode = option
+            elif option in SORT_DIRECTIONS:
+                descending = option == "desc"
+            else:
+                choices = ', '.join(SORT_MODES + SORT_DIRECTIONS)
+                raise SortKeyError(f"unknown sort option {option} of {field}, use: {choices}")
+        if field == "":
+            raise SortKeyError(f"sort key without field: {item}")
+        keys.append((field, mode, descending))
+    if not keys:
+        raise SortKeyError("no sort keys")
+    return keys
+
+
+def get_mode_key(mode):
+    """Get the function that converts a value for a sort mode.
+
+    Args:
+        mode: plain, casefold or natural
+
+    Returns:
+        function value -> value to compare, None for plain
+    """
+    if mode == "natural":
+        return lambda value: natural_key(str(value))
+    if mode == "casefold":
+        return lambda value: value.casefold() if isinstance(value, str) else value
+    return None
+
+
+def rank_values(values, mode, descending):
+    """Rank the values of a key in sort order.
+
+    Equal values in the mode get the same number, missing values (None)
+    get the highest.
+
+    Args:
+        values: list of values, one per channel
+        mode: plain, casefold or natural
+        descending: sort descending
+
+    Returns:
+        (list of numbers, one per channel, amount of numbers)
+
+    Raises:
+        SortKeyError: values that can't be compared or hashed
+    """
+    mode_key = get_mode_key(mode)
+    try:
+        distinct = set(values)
+        distinct.discard(None)
+        ordered = sorted(distinct, key=mode_key, reverse=descending)
+    except TypeError as error:
+        raise SortKeyError(f"values can't be sorted: {error}") from error
+    ranks = {}
+    rank = -1
+    previous = object()
+    for value in ordered:
+        compare = value if mode_key is None else mode_key(value)
+        if compare != previous:
+            rank += 1
+            previous = compare
+        ranks[value] = rank
+    ranks[None] = rank + 1
+    return ([ranks[value] for value in values], rank + 2)
+
+
+def sort_on_keys(channels, keys):
+    """Sort channels in place on a list of keys.
+
+    Args:
+        channels: list of m3uchannels
+        keys: list of (field, mode, descending) from parse_sort_keys
+
+    Raises:
+        SortKeyError: unknown field or values that can't be compared
+    """
+    if not channels:
+        return
+    sample = channels[0]
+    getters = [(get_field_getter(field, sample), mode, descending) for (field, mode, descending) in keys]
+    combined = None
+    for (getter, mode, descending) in getters:
+        (ranks, count) = rank_values(list(map(getter, channels)), mode, descending)
+        if combined is None:
+            combined = ranks
+        else:
+            combined = [value * count + rank for (value, rank) in zip(combined, ranks)]
+    order = sorted(range(len(channels)), key=combined.__getitem__)
+    channels[:] = [channels[pos] for pos in order]
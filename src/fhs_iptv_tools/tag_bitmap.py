@@ -0,0 +1,189 @@
+"""Bitmaps of the tags of the channels in a store.
+
+Every tag has a bitset, a python int with bit n set when the channel at
+position n has the tag, so a tag takes one bit per channel and combined
+filters are a bitwise AND or AND NOT of the bitsets. A position past the
+highest set bit doesn't have the tag.
+The tags of the channels stay the source of truth, the store keeps the
+bitmaps in sync when it changes tags and drops them when it can't.
+"""
+
+from itertools import compress
+
+# bits of a binary string as 0/1 bytes, for itertools.compress
+BINARY_TO_BYTES = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def positions_to_bits(positions):
+    """Get the bitset of positions.
+
+    Args:
+        positions: iterable of channel positions
+
+    Returns:
+        int with the bits of the positions set
+    """
+    positions = list(positions)
+    if not positions:
+        return 0
+    packed = bytearray(max(positions) // 8 + 1)
+    for pos in positions:
+        packed[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(packed, 'little')
+
+
+def bits_to_positions(bits):
+    """Get the positions of the set bits.
+
+    Args:
+        bits: bitset
+
+    Returns:
+        sorted list of positions
+    """
+    if not bits:
+        return []
+    # lowest bit first, the binary string is converted and filtered in C
+    flags = bin(bits)[:1:-1].encode('ascii').translate(BINARY_TO_BYTES)
+    return list(compress(range(len(flags)), flags))
+
+
+def delete_bits(bits, positions):
+    """Remove bits, the bits above a removed bit move down.
+
+    Args:
+        bits: bitset
+        positions: sorted list of positions to remove
+
+    Returns:
+        bitset
+    """
+    if not bits:
+        return 0
+    if len(positions) > 64:
+        flags = bin(bits)[:1:-1]
+        keep = bytearray(b'\x01') * len(flags)
+        for pos in positions:
+            if pos >= len(flags):
+                break
+            keep[pos] = 0
+        kept = ''.join(compress(flags, keep))
+        return int(kept[::-1], 2) if kept else 0
+    for pos in reversed(positions):
+        if bits >> pos:
+            bits = (bits & ((1 << pos) - 1)) | ((bits >> (pos + 1)) << pos)
+    return bits
+
+
+class TagBitmaps:
+    def __init__(self, m3u_channels):
+        """Initiate class, build the bitmaps from the tags of the channels.
+
+        Args:
+            m3u_channels: list of m3uchannels of the store
+        """
+        self._size = len(m3u_channels)
+        positions = {}
+        for (pos, ch) in enumerate(m3u_channels):
+            tags = ch.get_tags()
+            if tags:
+                for tag in tags:
+                    positions.setdefault(tag, []).append(pos)
+        self._bitmaps = {tag: positions_to_bits(tag_positions) for (tag, tag_positions) in positions.items()}
+
+    def tags(self):
+        """Get the tags with at least one channel.
+
+        Returns:
+            list of tags
+        """
+        return [tag for (tag, bits) in self._bitmaps.items() if bits]
+
+    def append(self, ch):
+        """Add a channel added at the end of the store.
+
+        Args:
+            ch: m3uchannel
+        """
+        pos = self._size
+        self._size += 1
+        tags = ch.get_tags()
+        if tags:
+            for tag in tags:
+                self._bitmaps[tag] = self._bitmaps.get(tag, 0) | (1 << pos)
+
+    def set(self, tag, positions):
+        """Set a tag on positions.
+
+        Args:
+            tag: tag
+            positions: list of channel positions
+        """
+        self._bitmaps[tag] = self._bitmaps.get(tag, 0) | positions_to_bits(positions)
+
+    def clear(self, tag, positions=None):
+        """Clear a tag, of all channels or of positions.
+
+        Args:
+            tag: tag
+            positions: list of channel positions, None is all
+        """
+        if positions is None:
+            self._bitmaps.pop(tag, None)
+            return
+        bits = self._bitmaps.get(tag)
+        if bits:
+            self._bitmaps[tag] = bits & ~positions_to_bits(positions)
+
+    def delete(self, positions):
+        """Remove the bits of deleted channels.
+
+        Args:
+            positions: sorted list of deleted channel positions
+        """
+        if not positions:
+            return
+        for (tag, bits) in self._bitmaps.items():
+            self._bitmaps[tag] = delete_bits(bits, positions)
+        self._size -= len(positions)
+
+    def bits(self, *, with_tag="", without_tag=""):
+        """Get the bitset of the channels with with_tag and without without_tag.
+
+        Args:
+            with_tag: tag that must be set, "" for all channels
+            without_tag: tag that must not be set, "" for no restriction
+
+        Returns:
+            bitset
+        """
+        if with_tag != "":
+            bits = self._bitmaps.get(with_tag, 0)
+        else:
+            bits = (1 << self._size) - 1
+        if without_tag != "":
+            bits &= ~self._bitmaps.get(without_tag, 0)
+        return bits
+
+    def positions(self, *, with_tag="", without_tag=""):
+        """Get the positions of the channels with with_tag and without without_tag.
+
+        Args:
+            with_tag: tag that must be set, "" for all channels
+            without_tag: tag that must not be set, "" for no restriction
+
+        Returns:
+            list of positions
+        """
+        return bits_to_positions(self.bits(with_tag=with_tag, without_tag=without_tag))
+
+    def count(self, tag):
+        """Count the channels with a tag.
+
+        Args:
+            tag: tag
+
+        Returns:
+            count
+        """
+        return bin(self._bitmaps.get(tag, 0)).count('1')
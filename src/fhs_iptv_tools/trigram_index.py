@@ -0,0 +1,161 @@
+"""Trigram index on the lowercase tvg_name of the channels in a store.
+
+Every channel gets a sequence number like in channel_index, the posting list
+of a trigram is an array of the sorted sequence numbers of the names with
+that trigram. A substring search takes the shortest posting list of the
+trigrams of the search text and only checks those channels.
+"""
+
+from array import array
+from bisect import bisect_left
+from itertools import compress
+
+
+def get_trigrams(text):
+    """Get the trigrams of a text.
+
+    Args:
+        text: lowercase text
+
+    Returns:
+        set of trigrams
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    def __init__(self, m3u_channels):
+        """Initiate class, index all channels.
+
+        Args:
+            m3u_channels: list of m3uchannels of the store
+        """
+        self._seqs = array('q', range(len(m3u_channels)))
+        self._next = len(m3u_channels)
+        self._postings = {}
+        postings = self._postings
+        for (seq, ch) in enumerate(m3u_channels):
+            for trigram in get_trigrams(ch.tvg_name.lower()):
+                posting = postings.get(trigram)
+                if posting is None:
+                    posting = postings[trigram] = array('q')
+                posting.append(seq)
+
+    def _add(self, seq, name):
+        """Add the trigrams of a name.
+
+        Args:
+            seq: sequence number of the channel
+            name: tvg_name
+        """
+        for trigram in get_trigrams(name.lower()):
+            posting = self._postings.get(trigram)
+            if posting is None:
+                posting = self._postings[trigram] = array('q')
+            if not posting or posting[-1] < seq:
+                posting.append(seq)
+            else:
+                posting.insert(bisect_left(posting, seq), seq)
+
+    def _remove(self, seq, name):
+        """Remove the trigrams of a name.
+
+        Args:
+            seq: sequence number of the channel
+            name: tvg_name
+        """
+        for trigram in get_trigrams(name.lower()):
+            posting = self._postings.get(trigram)
+            if posting is None:
+                continue
+            pos = bisect_left(posting, seq)
+            if pos < len(posting) and posting[pos] == seq:
+                del posting[pos]
+                if not posting:
+                    del self._postings[trigram]
+
+    def append(self, ch):
+        """Index a channel added at the end of the store.
+
+        Args:
+            ch: m3uchannel
+        """
+        seq = self._next
+        self._next += 1
+        self._seqs.append(seq)
+        self._add(seq, ch.tvg_name)
+
+    def delete(self, pos, ch):
+        """Remove the channel at position pos, call this before it is deleted from the store.
+
+        Args:
+            pos: position of the channel in the store
+            ch: m3uchannel
+        """
+        self._remove(self._seqs[pos], ch.tvg_name)
+        del self._seqs[pos]
+
+    def delete_many(self, positions, removed):
+        """Remove many channels in one pass, call this before they are deleted from the store.
+
+        Every posting list with a removed channel is filtered once.
+
+        Args:
+            positions: sorted list of positions in the store
+            removed: the channels at those positions
+        """
+        seqs = self._seqs
+        by_trigram = {}
+        for (pos, ch) in zip(positions, removed):
+            seq = seqs[pos]
+            for trigram in get_trigrams(ch.tvg_name.lower()):
+                by_trigram.setdefault(trigram, set()).add(seq)
+        for (trigram, drop) in by_trigram.items():
+            posting = self._postings.get(trigram)
+            if posting is None:
+                continue
+            if len(drop) == len(posting):
+                del self._postings[trigram]
+            else:
+                self._postings[trigram] = array('q', [seq for seq in posting if seq not in drop])
+        keep = bytearray(b'\x01') * len(seqs)
+        for pos in positions:
+            keep[pos] = 0
+        self._seqs = array('q', compress(seqs, keep))
+
+    def update(self, pos, old_name, ch):
+        """Index the new name of a channel.
+
+        Args:
+            pos: position of the channel in the store
+            old_name: tvg_name before the change
+            ch: m3uchannel with the new name
+        """
+        if old_name != ch.tvg_name:
+            seq = self._seqs[pos]
+            self._remove(seq, old_name)
+            self._add(seq, ch.tvg_name)
+
+    def candidates(self, text):
+        """Get the positions of the channels that can have text in their name.
+
+        Args:
+            text: text to search, case insensitive
+
+        Returns:
+            list of positions in store order, None if text is too short for the index
+        """
+        trigrams = get_trigrams(text.lower())
+        if not trigrams:
+            return None
+        postings = []
+        for trigram in trigrams:
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        posting = min(postings, key=len)
+        seqs = self._seqs
+        if len(posting) == len(seqs):
+            return list(range(len(seqs)))
+        return [bisect_left(seqs, seq) for seq in posting]
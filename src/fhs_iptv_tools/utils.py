@@ -1,21 +1,115 @@
 """File for multipe utils."""
 
+import re
+from functools import lru_cache
+
+MATCH_MODES = ("substring", "icase", "regex", "fuzzy")
 
-def check_search_filter_in_string(full_string, search_string):
-    """Check if search filter in sttring.
 
-    Todo: make a regex posible
+def check_search_filter_in_string(full_string, search_string, match="substring", threshold=0.8):
+    """Check if search filter in sttring.
 
     Args:
         full_string: string to search in
-        search_string: (sub)string to search for
+        search_string: (sub)string, or regex with match regex, to search for
+        match: substring, icase, regex or fuzzy
+        threshold: minimal similarity for fuzzy, 0.0 - 1.0
 
     Returns:
         match: boolean
     """
-    if search_string == full_string:
-        return True
+    if match == "substring":
+        return search_string in full_string
+    return get_matcher(search_string, match, threshold)(full_string)
+
+
+def fuzzy_distance(pattern, text):
+    """Get the smallest edit distance between pattern and any substring of text.
+
+    Args:
+        pattern: string to search for
+        text: string to search in
+
+    Returns:
+        distance: int
+    """
+    # Sellers: like levenshtein, but the match can start anywhere in text
+    previous = list(range(len(pattern) + 1))
+    best = previous[-1]
+    for char in text:
+        current = [0]
+        for (i, pattern_char) in enumerate(pattern):
+            cost = previous[i] if pattern_char == char else previous[i] + 1
+            current.append(min(cost, previous[i + 1] + 1, current[i] + 1))
+        previous = current
+        if current[-1] < best:
+            best = current[-1]
+            if best == 0:
+                break
+    return best
+
+
+def fuzzy_matcher(search_string, threshold):
+    """Get a case insensitive fuzzy matcher.
+
+    Text matches if a part of it is within (1 - threshold) * len(search_string)
+    edits of the search string. Every edit loses at most one character of the
+    search string, so text that misses more characters is skipped before the
+    edit distance is calculated.
+
+    Args:
+        search_string: string to search for
+        threshold: minimal similarity, 0.0 - 1.0
+
+    Returns:
+        function text -> boolean
+
+    Raises:
+        ValueError: threshold not in 0.0 - 1.0
+    """
+    if not 0.0 <= threshold <= 1.0:
+        raise ValueError(f"threshold must be from 0.0 up to 1.0 and not {threshold}")
+    pattern = search_string.lower()
+    max_distance = int((1.0 - threshold) * len(pattern) + 1e-9)
+    needed = len(pattern) - max_distance
+    counts = {char: pattern.count(char) for char in set(pattern)}
+
+    def matcher(text):
+        text = text.lower()
+        if pattern in text:
+            return True
+        if sum(min(count, text.count(char)) for (char, count) in counts.items()) < needed:
+            return False
+        return fuzzy_distance(pattern, text) <= max_distance
+    return matcher
+
 
-    if search_string in full_string:
-        return True
-    return False
+@lru_cache(maxsize=256)
+def get_matcher(search_string, match="substring", threshold=0.8):
+    """Get the match function of a search filter.
+
+    The matchers are cached, so a pattern is only compiled once for all
+    tasks of a playbook.
+
+    Args:
+        search_string: string or regex to search for
+        match: substring, icase, regex or fuzzy
+        threshold: minimal similarity for fuzzy, 0.0 - 1.0
+
+    Returns:
+        function text -> boolean
+
+    Raises:
+        ValueError: unknown match mode or threshold not in 0.0 - 1.0
+        re.error: invalid regex
+    """
+    if match == "substring":
+        return lambda text: search_string in text
+    if match == "icase":
+        pattern = search_string.lower()
+        return lambda text: pattern in text.lower()
+    if match == "regex":
+        return re.compile(search_string).search
+    if match == "fuzzy":
+        return fuzzy_matcher(search_string, threshold)
+    raise ValueError(f"unknown match mode {match}, use {', '.join(MATCH_MODES)}")
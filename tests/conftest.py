@@ -0,0 +1,126 @@
+"""Shared fixtures."""
+
+import json
+import sys
+
+import pytest
+
+M3U_TEXT = """#EXTM3U url-tvg="http://host/epg.xml"
+#EXTINF:-1 tvg-id="one.nl" tvg-name="NL: One" tvg-logo="http://host/one.png" group-title="NL",NL: One
+http://host/live/user/pass/1.ts
+#EXTINF:-1 tvg-id="two.nl" tvg-name="NL: Two" tvg-logo="" group-title="NL",NL: Two
+http://host/live/user/pass/2.ts
+#EXTINF:-1 tvg-id="" tvg-name="Movie (2020)" tvg-logo="" group-title="Movies",Movie (2020)
+http://host/movie/user/pass/3.mkv
+#EXTINF:-1 tvg-id="" tvg-name="Serie S01 E02" tvg-logo="" group-title="Series",Serie S01 E02
+http://host/series/user/pass/4.mp4
+"""
+
+
+@pytest.fixture
+def m3u_file(tmp_path):
+    """Write the sample playlist.
+
+    Returns:
+        path of the m3u file
+    """
+    path = tmp_path / "sample.m3u"
+    path.write_text(M3U_TEXT)
+    return str(path)
+
+
+FAKE_FFPROBE = '''#!{python}
+"""Fake ffprobe, logs the calls, fails for sources with fail in them and sleeps for sources with slow."""
+import json
+import sys
+import time
+
+source = sys.argv[-1]
+start = time.time()
+if "slow" in source:
+    time.sleep(0.2)
+else:
+    time.sleep(0.02)
+with open({log!r}, "a") as log:
+    log.write(json.dumps([source, start, time.time()]) + "\\n")
+if "fail" in source:
+    sys.exit(1)
+height = 1080 if "hd" in source else 576
+print(json.dumps({{
+    "format": {{"filename": source, "format_name": "mpegts"}},
+    "streams": [
+        {{"codec_type": "audio", "codec_name": "aac", "bit_rate": "128000"}},
+        {{"codec_type": "video", "codec_name": "h264", "bit_rate": "4000000", "width": 1920, "height": height}},
+    ],
+    "packets": [],
+}}))
+'''
+
+
+class FakeFFprobe:
+    def __init__(self, path, log):
+        """Initiate class.
+
+        Args:
+            path: path of the fake ffprobe script
+            log: file with a json line [source, start, end] per call
+        """
+        self.path = path
+        self.log = log
+
+    def calls(self):
+        """Get the calls of the fake ffprobe.
+
+        Returns:
+            list of (source, start, end)
+        """
+        try:
+            with open(self.log) as source:
+                return [tuple(json.loads(line)) for line in source]
+        except FileNotFoundError:
+            return []
+
+    def max_running(self):
+        """Get the most probes that ran at the same time.
+
+        Returns:
+            count
+        """
+        calls = self.calls()
+        events = sorted([(start, 1) for (_, start, _) in calls] + [(end, -1) for (_, _, end) in calls])
+        running = 0
+        result = 0
+        for (_, change) in events:
+            running += change
+            result = max(result, running)
+        return result
+
+
+@pytest.fixture
+def fake_ffprobe(tmp_path):
+    """Write a fake ffprobe script.
+
+    Returns:
+        FakeFFprobe
+    """
+    path = tmp_path / "ffprobe"
+    log = str(tmp_path / "ffprobe.log")
+    path.write_text(FAKE_FFPROBE.format(python=sys.executable, log=log))
+    path.chmod(0o755)
+    return FakeFFprobe(str(path), log)
+
+
+@pytest.fixture
+def probe_info(tmp_path, fake_ffprobe):
+    """Get a ProbeInfo with the fake ffprobe and the caches in tmp_path.
+
+    Returns:
+        ProbeInfo
+    """
+    from fhs_iptv_tools.probe import ProbeInfo
+
+    (tmp_path / "json").mkdir()
+    probe = ProbeInfo(cmdpath=fake_ffprobe.path, probedir=str(tmp_path / "json"),
+                      cache_file=str(tmp_path / "probe.db"))
+    yield probe
+    probe.get_cache().close()
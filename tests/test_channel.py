@@ -0,0 +1,58 @@
+"""Compact M3uChannel."""
+
+import io
+
+import pytest
+
+from fhs_iptv_tools.import_m3u import M3uChannel, iter_m3u_stream
+
+
+def test_slots():
+    ch = M3uChannel("id", "name", "", "group")
+    assert not hasattr(ch, '__dict__')
+    with pytest.raises(AttributeError):
+        ch.unknown = 1
+
+
+def test_containers_allocated_on_first_use():
+    ch = M3uChannel("id", "name", "", "group")
+    assert ch.get_tags() == frozenset()
+    assert ch.get_probe_dict() == {}
+    assert not ch.has_tag("a")
+    assert not ch.remove_tag("a")
+    assert (ch._tvg_sources, ch._fhs_tags, ch._fhs_dict) == (None, None, None)
+    ch.add_tag("a")
+    ch.tvg_sources.append("http://host/1.ts")
+    assert ch.has_tag("a")
+    assert ch.fhs_tags == {"a"}
+    assert ch.tvg_sources == ["http://host/1.ts"]
+    assert ch.remove_tag("a")
+
+
+def test_parser_interns_groups_and_logos():
+    text = ''.join(f'#EXTINF:-1 tvg-logo="http://logo/{n % 2}.png" group-title="NL| Group",{n}\nhttp://h/{n}\n'
+                   for n in range(4))
+    channels = list(iter_m3u_stream(io.StringIO(text)))
+    assert channels[0].tvg_group_title is channels[3].tvg_group_title
+    assert channels[0].tvg_logo is channels[2].tvg_logo
+
+
+def test_clone_is_independent():
+    ch = M3uChannel("id", "name", "", "group", tvg_sources=["http://host/1.ts"], fhs_tags={"a"},
+                    fhs_dict={'video': 'h264'})
+    new = ch.clone()
+    assert new == ch
+    assert new is not ch
+    new.add_tag("b")
+    new.tvg_sources.append("http://host/2.ts")
+    new.fhs_dict['audio'] = 'aac'
+    assert ch.get_tags() == {"a"}
+    assert ch.tvg_sources == ["http://host/1.ts"]
+    assert ch.get_probe_dict() == {'video': 'h264'}
+
+
+def test_eq_and_repr():
+    assert M3uChannel("id", "name", "", "group") == M3uChannel("id", "name", "", "group", tvg_sources=[])
+    assert M3uChannel("id", "name", "", "group") != M3uChannel("id", "other", "", "group")
+    assert M3uChannel("id", "name", "", "group") != "id"
+    assert repr(M3uChannel("id", "name", "", "group")).startswith("M3uChannel(tvg_id='id', tvg_name='name'")
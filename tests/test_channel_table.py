@@ -0,0 +1,130 @@
+"""Columnar channel table, gives the same results as the list store."""
+
+import pytest
+
+from fhs_iptv_tools.benchmark import write_m3u_file
+from fhs_iptv_tools.probe_list import LoadType, ProbeInfoList
+
+numpy = pytest.importorskip("numpy")
+
+SELECTIONS = [
+    {'tvg_name': "Channel 1"},
+    {'tvg_name': "S01"},
+    {'tvg_group_title': "Group 12"},
+    {'tvg_id': "id1", 'tvg_group_title': "NL|"},
+    {'tvg_name': "\n"},
+    {'tvg_name': "no such channel"},
+]
+
+
+def selected(store, **kwargs):
+    store.select(set_tag="selected", quiet=True, **kwargs)
+    names = [ch.tvg_name for ch in store.get_channels(with_tag="selected")]
+    store.clear_tag(tag="selected")
+    return names
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = str(tmp_path / "list.m3u")
+    write_m3u_file(path, 1000)
+    result = []
+    for columnar in (False, True):
+        store = ProbeInfoList(columnar=columnar)
+        store.load_m3u_file(path)
+        result.append(store)
+    assert not result[0].is_columnar()
+    assert result[1].is_columnar()
+    return result
+
+
+def test_select_equals_list_store(stores):
+    (plain, columnar) = stores
+    for selection in SELECTIONS:
+        assert selected(columnar, **selection) == selected(plain, **selection)
+    assert columnar.list_groups(vod_only=True) == plain.list_groups(vod_only=True)
+
+
+def test_table_in_sync_after_changes(stores):
+    for store in stores:
+        store.select(tvg_name="Channel 2", set_tag="delete", quiet=True)
+        store.delete_channels(with_tag="delete")
+        store.modify_channels(with_id="id11.nl", set_name="Renamed 11", set_group_title="New group")
+        store.add_channel(tvg_id="new", tvg_name="Channel 2 new", tvg_logo="", tvg_group_title="Added",
+                          tvg_source="http://host/new.ts")
+    (plain, columnar) = stores
+    for selection in SELECTIONS + [{'tvg_name': "Renamed"}, {'tvg_group_title': "New"}, {'tvg_group_title': "Added"}]:
+        assert selected(columnar, **selection) == selected(plain, **selection)
+    assert selected(columnar, tvg_name="Channel 2") == ["Channel 2 new"]
+    assert columnar.list_groups(vod_only=True) == plain.list_groups(vod_only=True)
+
+
+def test_filter_equals_list_store(stores):
+    (plain, columnar) = stores
+    assert columnar.filter_lijst(LoadType.VOD) == plain.filter_lijst(LoadType.VOD)
+    assert selected(columnar, tvg_name="Channel") == selected(plain, tvg_name="Channel") == []
+
+
+def test_string_column():
+    from fhs_iptv_tools.channel_table import StringColumn
+
+    column = StringColumn(["abc", "bcd", "a\nb", "", "één"])
+    assert column.find_rows("bc").tolist() == [0, 1]
+    assert column.find_rows("\n").tolist() == [2]
+    assert column.find_rows("én").tolist() == [4]
+    assert column.find_rows("cb").tolist() == []
+    assert column.find_rows("").tolist() == [0, 1, 2, 3, 4]
+    assert column.mask_equals("bc").tolist() == [False] * 5
+    assert column.mask_equals("").tolist() == [False, False, False, True, False]
+    column.update(1, "a longer value with bc")
+    column.update(0, "x")
+    column.append(["bc"])
+    assert column.find_rows("bc").tolist() == [1, 5]
+    assert column.find_rows("x").tolist() == [0]
+    assert column.mask_equals("bc").tolist() == [False] * 5 + [True]
+    column.delete(numpy.array([False, True, True, True, True, True]))
+    assert len(column) == 5
+    assert column.find_rows("bc").tolist() == [0, 4]
+    assert column.mask_equals("a longer value with bc").tolist() == [True] + [False] * 4
+
+
+def test_string_column_compacts():
+    from fhs_iptv_tools.channel_table import StringColumn
+
+    values = [f"value {n}" for n in range(2000)]
+    column = StringColumn([])
+    for value in values:
+        column.append([value])
+    for n in range(0, 2000, 3):
+        values[n] = f"a longer value {n}"
+        column.update(n, values[n])
+    keep = numpy.arange(2000) % 5 != 0
+    column.delete(keep)
+    values = [value for (value, kept) in zip(values, keep) if kept]
+    for text in ("value 1", "longer", "99", "e 3"):
+        assert column.find_rows(text).tolist() == [row for (row, value) in enumerate(values) if text in value]
+    assert column.mask_equals(values[7]).tolist() == [value == values[7] for value in values]
+
+
+def test_where_source_and_type(stores):
+    wheres = ['source ~ "/series/"', 'source == "http://provider.example:8080/live/user/pass/3.ts"',
+              'type == episode', 'type == movie and source ~ "1"', 'type == nothing', 'type ~ "epi"']
+    for store in stores:
+        store.modify_channels(with_id="id3.nl", set_name="Renamed S01 E01")
+    (plain, columnar) = stores
+    for where in wheres:
+        assert list(columnar.get_channels(where=where)) == list(plain.get_channels(where=where))
+    assert list(columnar.get_channels(where='type == episode'))
+
+
+def test_table_added_one_by_one(stores):
+    (plain, columnar) = stores
+    other = ProbeInfoList(columnar=True)
+    # the table is built for the empty store, the channels are appended to it
+    assert selected(other, tvg_name="Channel") == []
+    for ch in plain.get_channels():
+        other.add_channel_struct(ch.clone())
+    assert other.is_columnar()
+    for selection in SELECTIONS:
+        assert selected(other, **selection) == selected(columnar, **selection)
+    assert other.filter_lijst(LoadType.VOD) == columnar.filter_lijst(LoadType.VOD)
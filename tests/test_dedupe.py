@@ -0,0 +1,93 @@
+"""Duplicate detection and merge over stores."""
+
+import pytest
+
+from fhs_iptv_tools.dedupe import dedupe_stores, find_duplicates, get_key, normalize_name
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+
+
+def channel(name, tvg_id="", sources=1, height=None):
+    return M3uChannel(tvg_id, name, "", "", tvg_sources=[f"http://{name}/{n}.ts" for n in range(sources)],
+                      fhs_dict={'video': {'height': height}} if height else None)
+
+
+def make_stores():
+    first = ProbeInfoList()
+    first.add_channels([channel("NL: RTL 4 HD", "rtl4.nl", height=720), channel("NL: NPO 1"),
+                        channel("NL | RTL 4", "rtl4.nl", sources=3)])
+    second = ProbeInfoList()
+    second.add_channels([channel("[NL] RTL 4 FHD", "rtl4.nl", height=1080), channel("NL: NPO 2"),
+                         channel("nl npo 1")])
+    return {'first': first, 'second': second}
+
+
+def names(store):
+    return [ch.tvg_name for ch in store.get_channels()]
+
+
+def test_normalize_name():
+    assert normalize_name("NL: RTL 4 HD") == normalize_name("NL | RTL 4") == normalize_name("[NL] RTL 4 FHD")
+    assert normalize_name("NL: RTL 4 HD") == "nl rtl 4"
+    assert normalize_name("HD") == ""
+    assert get_key(channel("HD"), "name") is None
+    assert get_key(channel("x"), "id") is None
+    assert get_key(channel("NL: One", "One.NL")) == ("nl one", "one.nl")
+    assert get_key(channel("HD")) is None
+    assert get_key(channel("", "one.nl")) == ("", "one.nl")
+
+
+def test_find_duplicates():
+    groups = find_duplicates(make_stores())
+    assert [[(store, ch.tvg_name) for (store, ch) in members] for members in groups] == [
+        [('first', "NL: RTL 4 HD"), ('first', "NL | RTL 4"), ('second', "[NL] RTL 4 FHD")],
+        [('first', "NL: NPO 1"), ('second', "nl npo 1")],
+    ]
+    assert len(find_duplicates(make_stores(), match_on="id")) == 1
+    assert len(find_duplicates(make_stores(), where='name ~ "RTL"')) == 1
+
+
+@pytest.mark.parametrize(("keep", "store", "name", "added"), [
+    ("first", "first", "NL: RTL 4 HD", 4),
+    ("last", "second", "[NL] RTL 4 FHD", 4),
+    ("best_probe", "second", "[NL] RTL 4 FHD", 4),
+    ("most_sources", "first", "NL | RTL 4", 2),
+])
+def test_keep_policies(keep, store, name, added):
+    stores = make_stores()
+    report = dedupe_stores(stores, keep=keep, where='id == "rtl4.nl"')
+    assert [(merge['store'], merge['channel'].tvg_name, merge['sources']) for merge in report] == [
+        (store, name, added)]
+    assert (names(stores['first']) + names(stores['second'])).count(name) == 1
+    assert sum(1 for ch in stores['first'].get_channels() if ch.tvg_id == "rtl4.nl") == (store == "first")
+    assert len(report[0]['channel'].tvg_sources) == 5
+    assert len(set(report[0]['channel'].tvg_sources)) == 5
+
+
+def test_merge_sources_order():
+    stores = make_stores()
+    dedupe_stores(stores)
+    (rtl, npo) = list(stores['first'].get_channels())
+    assert rtl.tvg_sources == ["http://NL: RTL 4 HD/0.ts", "http://NL | RTL 4/0.ts", "http://NL | RTL 4/1.ts",
+                               "http://NL | RTL 4/2.ts", "http://[NL] RTL 4 FHD/0.ts"]
+    assert npo.tvg_sources == ["http://NL: NPO 1/0.ts", "http://nl npo 1/0.ts"]
+    assert names(stores['second']) == ["NL: NPO 2"]
+
+
+def test_shared_channel_is_cloned():
+    stores = make_stores()
+    other = ProbeInfoList()
+    stores['first'].copy_channels(to_store=other, quiet=True)
+    dedupe_stores(stores)
+    assert [len(ch.tvg_sources) for ch in other.get_channels()] == [1, 1, 3]
+    assert [len(ch.tvg_sources) for ch in stores['first'].get_channels()] == [5, 2]
+    # the kept channels are cloned and the removed ones released, other is the only store left with them
+    assert not any(ch.is_shared() for ch in other.get_channels())
+
+
+def test_no_name_and_no_id_are_not_merged():
+    store = ProbeInfoList()
+    store.add_channels([channel("HD"), channel("FHD"), channel("NL: One")])
+    assert find_duplicates({'store': store}) == []
+    assert dedupe_stores({'store': store}) == []
+    assert names(store) == ["HD", "FHD", "NL: One"]
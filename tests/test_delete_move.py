@@ -0,0 +1,59 @@
+"""Bulk delete and move of channels."""
+
+import pytest
+
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+
+
+def make_store(count):
+    store = ProbeInfoList()
+    store.add_channels([M3uChannel(f"id{n}", f"name {n}", "", f"group {n % 4}", tvg_sources=[f"http://host/{n}.ts"],
+                                   fhs_tags={"odd"} if n % 2 else None) for n in range(count)])
+    return store
+
+
+@pytest.mark.parametrize("count", [20, 200, 2000])
+def test_delete_keeps_order(count):
+    store = make_store(count)
+    # warm the indexes, so they are updated and not built again
+    store.get_channels(with_id="id1")
+    store.get_channels(with_tag="odd")
+    expected = [ch for ch in store.get_channels() if ch.tvg_group_title != "group 1" and not ch.has_tag("odd")]
+    deleted = store.delete_channels(with_tag="odd", where='group == "group 1"')
+    assert deleted == count - len(expected)
+    assert list(store.get_channels()) == expected
+    assert list(store.get_channels(with_tag="odd")) == []
+    assert list(store.get_channels(with_id="id2")) == expected[1:2]
+    assert list(store.get_channels(with_name="name 1")) == []
+
+
+def test_delete_needs_a_filter():
+    store = make_store(10)
+    assert store.delete_channels() == -1
+    assert store.count_channels() == 10
+
+
+@pytest.mark.parametrize("count", [20, 2000])
+def test_move_keeps_channels(count):
+    store = make_store(count)
+    target = make_store(3)
+    moved = list(store.get_channels(with_tag="odd"))
+    moved[0].fhs_dict = {'video': 'h264'}
+    assert store.move_channels(with_tag="odd", to_store=target) == len(moved)
+    channels = list(target.get_channels())
+    assert channels[3:] == moved
+    assert all(a is b for (a, b) in zip(channels[3:], moved))
+    assert channels[3].get_probe_dict() == {'video': 'h264'}
+    assert list(target.get_channels(with_tag="odd")) == channels[1:2] + moved
+    assert store.count_channels() == count - len(moved)
+    assert list(store.get_channels(with_tag="odd")) == []
+    assert store.move_channels(with_tag="odd", to_store=store) == -1
+
+
+def test_remove_channels():
+    store = make_store(100)
+    remove = list(store.get_channels(where='group == "group 2"'))
+    assert store.remove_channels(remove) == 25
+    assert not any(ch.tvg_group_title == "group 2" for ch in store.get_channels())
+    assert store.group_channels("group 2") == []
@@ -0,0 +1,148 @@
+"""Conditional-GET m3u download."""
+
+import http.server
+import json
+import threading
+
+import pytest
+import requests
+
+from fhs_iptv_tools import download_m3u
+from fhs_iptv_tools.download_m3u import DownloadError, is_url, iter_m3u_url
+from fhs_iptv_tools.import_m3u import iter_m3u_stream
+from fhs_iptv_tools.probe_list import ProbeInfoList
+from fhs_iptv_tools.snapshot import SnapshotWriter
+
+ETAG = '"v1"'
+M3U_TEXT = """#EXTM3U url-tvg="http://host/epg.xml"
+#EXTINF:-1 tvg-id="one.nl" tvg-name="NL: One" tvg-logo="" group-title="NL",NL: One
+http://host/live/user/pass/1.ts
+#EXTINF:-1 tvg-id="" tvg-name="Movie (2020)" tvg-logo="" group-title="Movies",Movie (2020)
+http://host/movie/user/pass/3.mkv
+"""
+BROKEN_TEXT = "#EXTM3U\n" + "".join(
+    f'#EXTINF:-1 tvg-id="ch{n}.nl" tvg-name="Channel {n}" tvg-logo="" group-title="NL",Channel {n}\n'
+    f"http://host/live/user/pass/{n}.ts\n" for n in range(100))
+
+
+class M3uHandler(http.server.BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == "/broken.m3u":
+            # the connection drops after 47 of the 100 channels
+            body = BROKEN_TEXT.encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:body.index(b"#EXTINF", body.index(b"Channel 47"))])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        if self.path != "/list.m3u":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = M3U_TEXT.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/x-mpegurl')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETAG)
+        self.send_header('Last-Modified', 'Sat, 01 Jan 2000 00:00:00 GMT')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    M3uHandler.requests_seen = []
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), M3uHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_is_url():
+    assert is_url("http://host/list.m3u")
+    assert is_url("HTTPS://host/list.m3u")
+    assert not is_url("/tmp/list.m3u")
+
+
+def test_not_modified_uses_snapshot(server, tmp_path):
+    url = f"{server}/list.m3u"
+    expected = list(iter_m3u_stream(M3U_TEXT.splitlines()))
+    session = requests.Session()
+    header = []
+    assert list(iter_m3u_url(url, cache_dir=str(tmp_path), session=session, header=header)) == expected
+    assert header == ['#EXTM3U url-tvg="http://host/epg.xml"']
+
+    header = []
+    assert list(iter_m3u_url(url, cache_dir=str(tmp_path), session=session, header=header)) == expected
+    assert header == ['#EXTM3U url-tvg="http://host/epg.xml"']
+    assert M3uHandler.requests_seen == [("/list.m3u", None), ("/list.m3u", ETAG)]
+
+
+def test_partial_read_keeps_no_cache(server, tmp_path):
+    url = f"{server}/list.m3u"
+    channels = iter_m3u_url(url, cache_dir=str(tmp_path), session=requests.Session())
+    next(channels)
+    channels.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_error_status(server, tmp_path, capsys):
+    assert list(iter_m3u_url(f"{server}/missing.m3u", cache_dir=str(tmp_path), session=requests.Session())) == []
+    assert "status 404" in capsys.readouterr().out
+
+
+def test_cache_files(server, tmp_path, monkeypatch):
+    url = f"{server}/list.m3u"
+    list(iter_m3u_url(url, cache_dir=str(tmp_path), session=requests.Session()))
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".json", ".snapshot"]
+    (meta_file,) = tmp_path.glob("*.json")
+    assert json.loads(meta_file.read_text())['etag'] == ETAG
+
+    def fail_close(writer):
+        writer.abort()
+        raise OSError("disk full")
+
+    # the headers of a changed list are only saved after its snapshot
+    meta_file.write_text(json.dumps({'etag': '"v0"'}))
+    monkeypatch.setattr(SnapshotWriter, "close", fail_close)
+    with pytest.raises(OSError):
+        list(iter_m3u_url(url, cache_dir=str(tmp_path), session=requests.Session()))
+    assert json.loads(meta_file.read_text()) == {'etag': '"v0"'}
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".json", ".snapshot"]
+
+
+def test_broken_download(server, tmp_path, monkeypatch):
+    url = f"{server}/broken.m3u"
+    channels = iter_m3u_url(url, cache_dir=str(tmp_path), session=requests.Session())
+    with pytest.raises(DownloadError, match="broken.m3u"):
+        list(channels)
+    assert list(tmp_path.iterdir()) == []
+
+    # load and reload leave the store as it was
+    monkeypatch.setattr(download_m3u, "get_m3u_cache_dir", lambda: str(tmp_path))
+    m3u_file = tmp_path / "list.m3u"
+    m3u_file.write_text(BROKEN_TEXT)
+    store = ProbeInfoList()
+    store.load_m3u_file(str(m3u_file))
+    store.select(tvg_name="Channel 9", set_tag="keep", quiet=True)
+    before = [ch.clone() for ch in store.get_channels()]
+    assert store.load_m3u_file(url) is None
+    assert list(store.get_channels()) == before
+    assert store.reload_m3u_file(url) is None
+    assert list(store.get_channels()) == before
+    assert store.count_channels() == 100
+    assert len(list(store.get_channels(with_tag="keep"))) == 11
@@ -0,0 +1,78 @@
+"""Buffered, atomic, skip-if-unchanged m3u export."""
+
+import os
+import stat
+
+import pytest
+
+from fhs_iptv_tools.import_m3u import M3uChannel, M3uWriter, export_m3u_file, import_m3u_file
+
+
+def make_channels(count=10):
+    return [M3uChannel(f"id{n}", f"name {n}", "", "group", tvg_sources=[f"http://host/{n}.ts"])
+            for n in range(count)]
+
+
+def test_export_and_import(tmp_path):
+    path = str(tmp_path / "out.m3u")
+    result = export_m3u_file(path, make_channels())
+    assert result == {'file': path, 'bytes': os.path.getsize(path), 'count': 10, 'skipped': False}
+    assert import_m3u_file(path) == make_channels()
+    with open(path) as source:
+        assert source.readline() == "#EXTM3U\n"
+
+
+def test_skip_unchanged(tmp_path):
+    path = str(tmp_path / "out.m3u")
+    export_m3u_file(path, make_channels())
+    os.utime(path, (1000000000, 1000000000))
+    assert export_m3u_file(path, make_channels())['skipped'] is True
+    assert os.stat(path).st_mtime == 1000000000
+    assert export_m3u_file(path, make_channels(11))['skipped'] is False
+    assert os.stat(path).st_mtime != 1000000000
+    assert os.listdir(tmp_path) == ["out.m3u"]
+
+
+def test_small_buffer(tmp_path):
+    path = str(tmp_path / "out.m3u")
+    export_m3u_file(path, make_channels())
+    with M3uWriter(path, buffer_size=16) as writer:
+        for ch in make_channels():
+            writer.write(ch)
+    assert writer.skipped is True
+    assert writer.count == 10
+
+
+def test_error_keeps_old_file(tmp_path):
+    path = tmp_path / "out.m3u"
+    export_m3u_file(str(path), make_channels())
+    old = path.read_text()
+    with pytest.raises(RuntimeError):
+        with M3uWriter(str(path), buffer_size=16) as writer:
+            writer.write_channels(make_channels(3))
+            raise RuntimeError("stop")
+    assert path.read_text() == old
+    assert os.listdir(tmp_path) == ["out.m3u"]
+
+
+def test_keeps_mode(tmp_path):
+    path = tmp_path / "out.m3u"
+    export_m3u_file(str(path), make_channels())
+    path.chmod(0o640)
+    export_m3u_file(str(path), make_channels(3))
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_new_file_uses_umask(tmp_path):
+    path = tmp_path / "out.m3u"
+    umask = os.umask(0o027)
+    try:
+        export_m3u_file(str(path), make_channels())
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_missing_directory(tmp_path, capsys):
+    assert export_m3u_file(str(tmp_path / "missing" / "out.m3u"), make_channels()) is False
+    assert "ERROR" in capsys.readouterr().out
@@ -0,0 +1,102 @@
+"""Filter expressions for the where argument."""
+
+import pytest
+
+from fhs_iptv_tools.benchmark import generate_m3u_lines
+from fhs_iptv_tools.filter_expr import FilterError, Parser, compile_where, tokenize
+from fhs_iptv_tools.import_m3u import M3uChannel, iter_m3u_stream
+from fhs_iptv_tools.probe_list import ProbeInfoList
+
+WHERES = [
+    'group == "NL| Group 12"',
+    'name ~ "Channel 1" and group ~* "group 1"',
+    'name =~ "^NL: Movie \\\\d+3$" or tag == even',
+    'not vod and id != "id10.nl"',
+    'type == episode and season >= 5 and episode < 10',
+    '(group == "NL| Group 1" or group == "NL| Group 2") and not tag == even',
+    'probe.video.height >= 720',
+    'probed == false and name ~ "Serie 1"',
+    'tag == missing or name == "NL: Channel 20"',
+]
+
+
+def test_tokenize():
+    assert tokenize('name ~* "a \\"b\\"" and (vod)') == [
+        ('word', 'name'), ('op', '~*'), ('string', 'a "b"'), ('word', 'and'), ('bracket', '('),
+        ('word', 'vod'), ('bracket', ')')]
+    assert tokenize("group == 'x'") == [('word', 'group'), ('op', '=='), ('string', 'x')]
+
+
+def test_parse():
+    assert Parser('vod').parse() == ('bool', 'vod')
+    assert Parser('season > 2').parse() == ('cmp', 'season', '>', 2)
+    assert Parser('season > 2 and not vod or tag == x').parse() == (
+        'or', [('and', [('cmp', 'season', '>', 2), ('not', ('bool', 'vod'))]), ('cmp', 'tag', '==', 'x')])
+    assert Parser('probe.video.height >= 7.5').parse() == ('cmp', 'probe.video.height', '>=', 7.5)
+    assert Parser('probe.video.codec == "264"').parse() == ('cmp', 'probe.video.codec', '==', '264')
+    assert Parser('VOD == Yes AND NAME ~ x').parse() == (
+        'and', [('cmp', 'vod', '==', True), ('cmp', 'name', '~', 'x')])
+
+
+@pytest.mark.parametrize("where", [
+    'name', 'name ==', 'name == "x" and', '(vod', 'vod)', 'unknown == 1', 'season == "2"', 'season == two',
+    'vod == maybe', 'season ~ 2', 'tag > x', 'name =~ "("', 'name = x', 'name == x y',
+])
+def test_errors(where):
+    with pytest.raises(FilterError):
+        compile_where(where)
+
+
+def test_match():
+    ch = M3uChannel("id.nl", "NL: Serie S02 E05", "", "Series", vod=True, tvg_sources=["http://host/1.mkv"],
+                    fhs_tags={"new"}, fhs_dict={'video': {'height': 1080, 'codec': 'h264', 'with': 1920}})
+    assert compile_where('type == episode and serie == "NL: Serie" and season == 2 and episode >= 5').match(ch)
+    assert compile_where('probe.video.width == 1920 and probe.video.codec ~ "264" and probed').match(ch)
+    assert compile_where('tag == new and tag != old and source ~ "host"').match(ch)
+    assert not compile_where('probe.audio.codec == "aac"').match(ch)
+    assert not compile_where('probe.video.codec > 5').match(ch)
+    assert not compile_where('season > 2 or not vod').match(ch)
+
+
+@pytest.mark.parametrize(("columnar", "trigram"), [(False, False), (False, True), (True, False)])
+def test_pushdown_equals_scan(columnar, trigram):
+    if columnar:
+        pytest.importorskip("numpy")
+    channels = list(iter_m3u_stream(generate_m3u_lines(1000)))
+    channels[7].fhs_dict = {'video': {'height': 1080}}
+    store = ProbeInfoList(columnar=columnar, trigram=trigram)
+    for ch in channels:
+        store.add_channel_struct(ch)
+    store.select(tvg_name="2", set_tag="even", quiet=True)
+    for where in WHERES:
+        match = compile_where(where).match
+        assert list(store.get_channels(where=where)) == [ch for ch in channels if match(ch)]
+    store.delete_channels(where='group ~ "Group 3"')
+    for where in WHERES:
+        match = compile_where(where).match
+        assert list(store.get_channels(where=where)) == [ch for ch in store.get_channels() if match(ch)]
+
+
+def test_candidates():
+    calls = []
+
+    def lookup(field, op, value):
+        calls.append((field, op, value))
+        return [1, 2, 3] if field == 'tvg_name' else [2, 3, 4]
+
+    assert compile_where('name == a and group ~ b').candidates(lookup) == [2, 3]
+    assert compile_where('name == a or tag == b').candidates(lookup) == [1, 2, 3, 4]
+    assert compile_where('name == a or vod').candidates(lookup) is None
+    assert compile_where('not name == a').candidates(lookup) is None
+    assert compile_where('vod and id ~* a').candidates(lookup) == [2, 3, 4]
+    assert calls == [('tvg_name', '==', 'a'), ('tvg_group_title', '~', 'b'), ('tvg_name', '==', 'a'),
+                     ('tag', '==', 'b'), ('tvg_name', '==', 'a'), ('tvg_id', '~*', 'a')]
+
+
+def test_store_invalid_where():
+    store = ProbeInfoList()
+    store.add_channel_struct(M3uChannel("", "x", "", ""))
+    with pytest.raises(FilterError):
+        store.get_channels(where="name ==")
+    assert store.delete_channels(where="name ==") == -1
+    assert store.select(where="name ==", set_tag="x") == -1
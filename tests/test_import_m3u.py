@@ -0,0 +1,52 @@
+"""Streaming m3u parser."""
+
+import io
+
+from fhs_iptv_tools.import_m3u import import_m3u_file, import_m3u_stream, iter_m3u_file, iter_m3u_stream
+
+
+def test_iter_m3u_stream(m3u_file):
+    header = []
+    with open(m3u_file) as input_stream:
+        channels = list(iter_m3u_stream(input_stream, header=header))
+    assert header == ['#EXTM3U url-tvg="http://host/epg.xml"']
+    assert [ch.tvg_name for ch in channels] == ["NL: One", "NL: Two", "Movie (2020)", "Serie S01 E02"]
+    assert channels[0].tvg_id == "one.nl"
+    assert channels[0].tvg_logo == "http://host/one.png"
+    assert channels[0].tvg_group_title == "NL"
+    assert channels[0].tvg_sources == ["http://host/live/user/pass/1.ts"]
+    assert [ch.vod for ch in channels] == [False, False, True, True]
+
+
+def test_iter_m3u_stream_is_lazy():
+    def lines():
+        yield '#EXTINF:-1 tvg-id="" tvg-name="first" tvg-logo="" group-title="",first\n'
+        yield 'http://host/1.ts\n'
+        yield '#EXTINF:-1 tvg-id="" tvg-name="second" tvg-logo="" group-title="",second\n'
+        raise AssertionError("read past the second #EXTINF line")
+
+    first = next(iter_m3u_stream(lines()))
+    assert first.tvg_name == "first"
+    assert first.tvg_sources == ["http://host/1.ts"]
+
+
+def test_iter_m3u_stream_multiple_sources_and_directives():
+    text = ('#EXTM3U\n#EXTINF:-1,no attributes\n#EXTGRP:ignored\nhttp://a/1.ts\n\nhttp://b/1.ts\n'
+            'not a url\n')
+    channels = list(iter_m3u_stream(io.StringIO(text)))
+    assert len(channels) == 1
+    assert channels[0].tvg_name == "no attributes"
+    assert channels[0].tvg_sources == ["http://a/1.ts", "http://b/1.ts"]
+
+
+def test_import_m3u_stream_empty():
+    assert import_m3u_stream(io.StringIO("#EXTM3U\n")) is None
+
+
+def test_iter_m3u_file_equals_import(m3u_file):
+    assert list(iter_m3u_file(m3u_file)) == import_m3u_file(m3u_file)
+
+
+def test_import_m3u_file_missing(tmp_path, capsys):
+    assert import_m3u_file(str(tmp_path / "missing.m3u")) is None
+    assert "not found" in capsys.readouterr().out
@@ -0,0 +1,69 @@
+"""Hash indexes on id, name and group title stay consistent with the channels."""
+
+import random
+
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+
+
+def make_channels(count, start=0):
+    return [M3uChannel(f"id{n % 7}", f"name {n % 11}", "", f"group {n % 3}", tvg_sources=[f"http://host/{n}.ts"])
+            for n in range(start, start + count)]
+
+
+def check_index(store):
+    channels = list(store.get_channels())
+    for value in {ch.tvg_id for ch in channels} | {"missing"}:
+        assert list(store.get_channels(with_id=value)) == [ch for ch in channels if ch.tvg_id == value]
+    for value in {ch.tvg_name for ch in channels} | {"missing"}:
+        assert list(store.get_channels(with_name=value)) == [ch for ch in channels if ch.tvg_name == value]
+    for value in {ch.tvg_group_title for ch in channels}:
+        assert store.group_channels(value) == [ch for ch in channels if ch.tvg_group_title == value]
+    assert store.list_groups() == sorted({ch.tvg_group_title for ch in channels})
+    assert (list(store.get_channels(with_id="id1", with_name="name 1"))
+            == [ch for ch in channels if ch.tvg_id == "id1" and ch.tvg_name == "name 1"])
+
+
+def test_index_after_changes():
+    rng = random.Random(13)
+    store = ProbeInfoList()
+    store.add_channels(make_channels(300))
+    other = ProbeInfoList()
+    check_index(store)
+    for step in range(30):
+        action = step % 6
+        if action == 0:
+            store.delete_channels(with_name=f"name {rng.randrange(11)}")
+        elif action == 1:
+            store.add_channels(make_channels(rng.randrange(1, 100), start=rng.randrange(1000)))
+        elif action == 2:
+            store.move_channels(with_id=f"id{rng.randrange(7)}", to_store=other)
+        elif action == 3:
+            store.sort_channels(keys=rng.choice(["tvg_name", "tvg_id:desc", "tvg_group_title,tvg_name"]))
+        elif action == 4:
+            store.modify_channels(where=f'id == "id{rng.randrange(7)}"', set_group_title=f"group {rng.randrange(5)}")
+        else:
+            store.add_channel(tvg_id="id1", tvg_name="name 1", tvg_logo="", tvg_group_title="group 9",
+                              tvg_source="http://host/new.ts")
+        check_index(store)
+        check_index(other)
+
+
+def test_index_after_bulk_delete():
+    store = ProbeInfoList()
+    store.add_channels(make_channels(1000))
+    check_index(store)
+    # more than 64 and more than half of the channels
+    assert store.delete_channels(where='group == "group 0"') == 334
+    check_index(store)
+    assert store.delete_channels(where='group != "group 1"') == 333
+    check_index(store)
+
+
+def test_modify_single_channel():
+    store = ProbeInfoList()
+    store.add_channels(make_channels(20))
+    check_index(store)
+    assert store.modify_channels(with_id="id3", where='name == "name 3"', set_id="unique", set_name="renamed") == 1
+    check_index(store)
+    assert [ch.tvg_name for ch in store.get_channels(with_id="unique")] == ["renamed"]
@@ -0,0 +1,67 @@
+"""Verbatim round trip of the #EXTINF lines."""
+
+from fhs_iptv_tools.import_m3u import M3uChannel, render_channel, update_extinf
+from fhs_iptv_tools.probe_list import ProbeInfoList
+
+RAW_TEXT = """#EXTM3U url-tvg="http://host/epg.xml" x-tvg-url="http://host/epg2.xml"
+#EXTINF:0 CUID="1" tvg-ID="one.nl" tvg-chno=7 Tvg-Name="NL: One" group-title="NL" catchup="default",NL: One
+http://host/1.ts
+#EXTINF:-1 tvg-name="Two",Two, the "second"
+http://host/2.ts
+http://backup/2.ts
+"""
+
+
+def test_unchanged_is_verbatim(tmp_path):
+    source = tmp_path / "in.m3u"
+    source.write_text(RAW_TEXT)
+    store = ProbeInfoList()
+    store.load_m3u_file(str(source), keep_raw=True)
+    target = tmp_path / "out.m3u"
+    store.save_m3u_file(file=str(target))
+    assert target.read_text() == RAW_TEXT
+
+
+def test_changed_keeps_attributes_and_key_case(tmp_path):
+    source = tmp_path / "in.m3u"
+    source.write_text(RAW_TEXT)
+    store = ProbeInfoList()
+    store.load_m3u_file(str(source), keep_raw=True)
+    assert store.modify_channels(with_id="one.nl", set_name="NL: Uno", set_group_title="Nederland") == 1
+    target = tmp_path / "out.m3u"
+    store.save_m3u_file(file=str(target))
+    lines = target.read_text().splitlines()
+    assert lines[0] == '#EXTM3U url-tvg="http://host/epg.xml" x-tvg-url="http://host/epg2.xml"'
+    assert lines[1] == ('#EXTINF:0 CUID="1" tvg-ID="one.nl" tvg-chno="7" Tvg-Name="NL: Uno" group-title="Nederland" '
+                        'catchup="default" tvg-logo="",NL: Uno')
+    assert lines[3:] == RAW_TEXT.splitlines()[3:]
+
+
+def test_reload_keeps_header(tmp_path):
+    source = tmp_path / "in.m3u"
+    source.write_text(RAW_TEXT)
+    store = ProbeInfoList()
+    store.load_m3u_file(str(source))
+    store.reload_m3u_file(str(source), keep_raw=True)
+    target = tmp_path / "out.m3u"
+    store.save_m3u_file(file=str(target))
+    assert target.read_text() == RAW_TEXT
+
+
+def test_without_keep_raw_uses_plain_header(tmp_path):
+    source = tmp_path / "in.m3u"
+    source.write_text(RAW_TEXT)
+    store = ProbeInfoList()
+    store.load_m3u_file(str(source))
+    target = tmp_path / "out.m3u"
+    store.save_m3u_file(file=str(target))
+    lines = target.read_text().splitlines()
+    assert lines[0] == "#EXTM3U"
+    assert lines[1] == '#EXTINF:-1 tvg-id="one.nl" tvg-name="NL: One" tvg-logo="" group-title="NL",NL: One'
+
+
+def test_update_extinf_duration():
+    ch = M3uChannel("id", "name", "", "group", raw_extinf="#EXTINF:120,old name", dirty=True)
+    assert update_extinf(ch) == '#EXTINF:120 tvg-id="id" tvg-name="name" tvg-logo="" group-title="group",name'
+    ch.tvg_sources.append("http://host/1.ts")
+    assert render_channel(ch).endswith(",name\nhttp://host/1.ts\n")
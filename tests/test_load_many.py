@@ -0,0 +1,69 @@
+"""Concurrent loading of several m3u files."""
+
+import pytest
+
+from fhs_iptv_tools.benchmark import write_m3u_file
+from fhs_iptv_tools.import_m3u import import_m3u_file
+from fhs_iptv_tools.load_many import load_m3u_many
+from fhs_iptv_tools.probe_list import LoadType, ProbeInfoList
+
+
+@pytest.fixture
+def m3u_files(tmp_path):
+    files = []
+    for count in (10, 20):
+        path = str(tmp_path / f"list{count}.m3u")
+        write_m3u_file(path, count)
+        files.append(path)
+    return files
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_many(m3u_files, tmp_path, workers):
+    sources = [
+        {'file': m3u_files[0], 'filter_type': LoadType.ALL, 'keep_raw': False},
+        {'file': str(tmp_path / "missing.m3u"), 'filter_type': LoadType.ALL, 'keep_raw': False},
+        {'file': m3u_files[1], 'filter_type': LoadType.VOD, 'keep_raw': True},
+    ]
+    results = load_m3u_many(sources, workers=workers)
+    assert [result['file'] for result in results] == [source['file'] for source in sources]
+    assert results[0]['channels'] == import_m3u_file(m3u_files[0])
+    assert results[0]['header'] == ""
+    assert results[1]['channels'] is None
+    assert "missing.m3u" in results[1]['error']
+    assert results[2]['channels'] == [ch for ch in import_m3u_file(m3u_files[1], keep_raw=True) if ch.vod]
+    assert results[2]['header'] == "#EXTM3U"
+    assert all(result['seconds'] >= 0 for result in results)
+
+
+def play_load_m3u_many(sources, workers="2"):
+    from fhs_iptv_tools import playyaml
+    from fhs_iptv_tools.playyaml_lib import check_console
+
+    check_console()
+    return playyaml.play_command_load_m3u_many({'sources': sources, 'workers': workers})
+
+
+def test_play_load_m3u_many(m3u_files, tmp_path, capsys):
+    from fhs_iptv_tools import config
+
+    config.STORE['many_a'] = ProbeInfoList()
+    config.STORE['many_a'].add_channel(tvg_id="old", tvg_name="old", tvg_logo="", tvg_group_title="",
+                                       tvg_source="http://host/old.ts")
+    config.STORE.pop('many_b', None)
+    sources = [
+        {'file': m3u_files[0], 'store': 'many_b'},
+        {'file': str(tmp_path / "missing.m3u"), 'store': 'many_a'},
+        {'file': m3u_files[1], 'store': 'many_b', 'type': 'channels'},
+    ]
+    assert play_load_m3u_many(sources) is True
+    assert "can't load m3u_file" in capsys.readouterr().out
+    # the store of the missing source is left as it was
+    assert [ch.tvg_name for ch in config.STORE['many_a'].get_channels()] == ["old"]
+    assert config.STORE['many_b'].count_channels() == 10 + 10
+
+
+@pytest.mark.parametrize("workers", ["-1", "two", "1.5"])
+def test_play_load_m3u_many_workers(m3u_files, workers):
+    assert play_load_m3u_many(f"many_c={m3u_files[0]}", workers) is False
+    assert play_load_m3u_many(f"many_c={m3u_files[0]}", "0") is True
@@ -0,0 +1,81 @@
+"""Regex, case insensitive and fuzzy matching in select."""
+
+import re
+
+import pytest
+
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+from fhs_iptv_tools.utils import check_search_filter_in_string, fuzzy_distance, fuzzy_matcher, get_matcher
+
+NAMES = ["NL: Discovery HD", "NL: discovery", "BE: Dicsovery", "UK: History", "NL: Disney Channel"]
+
+
+def selected(store, **kwargs):
+    count = store.select(set_tag="selected", quiet=True, **kwargs)
+    names = [ch.tvg_name for ch in store.get_channels(with_tag="selected")]
+    store.clear_tag(tag="selected")
+    assert count == len(names)
+    return names
+
+
+@pytest.fixture
+def store():
+    store = ProbeInfoList()
+    for name in NAMES:
+        store.add_channel_struct(M3uChannel("", name, "", name[:2]))
+    return store
+
+
+def test_match_modes(store):
+    assert selected(store, tvg_name="Discovery") == ["NL: Discovery HD"]
+    assert selected(store, tvg_name="DISCOVERY", match="icase") == ["NL: Discovery HD", "NL: discovery"]
+    assert selected(store, tvg_name=r"^NL: Dis(covery|ney)\b", match="regex") == [
+        "NL: Discovery HD", "NL: Disney Channel"]
+    assert selected(store, tvg_name="discovery", match="fuzzy", threshold=0.75) == [
+        "NL: Discovery HD", "NL: discovery", "BE: Dicsovery"]
+    assert selected(store, tvg_name="discovery", match="fuzzy", threshold=1.0) == ["NL: Discovery HD", "NL: discovery"]
+    assert selected(store, tvg_group_title="nl", match="icase", tvg_name="HD") == ["NL: Discovery HD"]
+
+
+def test_errors(store):
+    assert store.select(tvg_name="(", match="regex", set_tag="x") == -1
+    assert store.select(tvg_name="x", match="glob", set_tag="x") == -1
+    assert store.select(tvg_name="x", match="fuzzy", threshold=1.5, set_tag="x") == -1
+    assert store.select(tvg_name="x", match="fuzzy", threshold=-0.1, set_tag="x") == -1
+    assert list(store.get_channels(with_tag="x")) == []
+
+
+def test_fuzzy():
+    assert fuzzy_distance("abc", "xxabcxx") == 0
+    assert fuzzy_distance("abc", "xxacxx") == 1
+    assert fuzzy_distance("abc", "") == 3
+    assert fuzzy_matcher("Discovery", 0.75)("nl: dicsovery hd")
+    assert not fuzzy_matcher("Discovery", 0.9)("nl: dicsovery hd")
+    with pytest.raises(ValueError):
+        fuzzy_matcher("x", 1.1)
+
+
+def test_get_matcher():
+    assert get_matcher("abc", "regex") is get_matcher("abc", "regex")
+    assert get_matcher("ABC", "icase")("xabcx")
+    assert check_search_filter_in_string("xabcx", "abc")
+    assert check_search_filter_in_string("xabcx", "a.c", "regex")
+    with pytest.raises(ValueError):
+        get_matcher("abc", "glob")
+    with pytest.raises(re.error):
+        get_matcher("(", "regex")
+
+
+@pytest.mark.parametrize("threshold", ["1.5", "-1", "abc", "nan"])
+def test_play_select_threshold(threshold):
+    from fhs_iptv_tools import config, playyaml
+    from fhs_iptv_tools.playyaml_lib import check_console
+
+    check_console()
+    config.STORE['match'] = ProbeInfoList()
+    task = {'store': 'match', 'with_tag': '', 'without_tag': '', 'group_title': '', 'name': 'x', 'id': '',
+            'source': '', 'set_tag': 'x', 'clear_tag': '', 'match': 'fuzzy', 'threshold': threshold, 'where': ''}
+    assert playyaml.play_command_select(task) is False
+    task['threshold'] = "0.5"
+    assert playyaml.play_command_select(task) is True
@@ -0,0 +1,76 @@
+"""Parallel memory mapped m3u loader."""
+
+import pytest
+
+from fhs_iptv_tools.benchmark import write_m3u_file
+from fhs_iptv_tools.import_m3u import import_m3u_file, import_m3u_file_parallel, split_m3u_ranges
+
+
+def only_vod(channels):
+    return (ch for ch in channels if ch.vod)
+
+
+@pytest.fixture
+def big_m3u(tmp_path):
+    path = str(tmp_path / "big.m3u")
+    write_m3u_file(path, 2000)
+    return path
+
+
+def test_split_m3u_ranges():
+    data = b"#EXTM3U\n" + b"#EXTINF:-1,x\nhttp://h/1.ts\n" * 10
+    ranges = split_m3u_ranges(data, 4)
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(data)
+    assert all(end == start for ((_, end), (start, _)) in zip(ranges, ranges[1:]))
+    assert all(data[start:start + 8] == b"#EXTINF:" for (start, _) in ranges[1:])
+
+
+def test_split_m3u_ranges_any_case(tmp_path):
+    data = b"#EXTM3U\n" + b"".join(b"#%s:-1,ch %d\nhttp://h/%d.ts\n" % (tag, n, n)
+                                   for (n, tag) in enumerate([b"extinf", b"ExtInf"] * 60))
+    ranges = split_m3u_ranges(data, 4)
+    assert len(ranges) == 4
+    assert all(data[start:start + 8].upper() == b"#EXTINF:" for (start, _) in ranges[1:])
+    path = tmp_path / "lower.m3u"
+    path.write_bytes(data)
+    channels = import_m3u_file_parallel(str(path), workers=2)
+    assert channels == import_m3u_file(str(path))
+    assert len(channels) == 120
+
+
+def test_parallel_equals_serial(big_m3u):
+    header = []
+    parallel = import_m3u_file_parallel(big_m3u, workers=2, header=header)
+    assert parallel == import_m3u_file(big_m3u)
+    assert len(parallel) == 2000
+    assert header == ["#EXTM3U"]
+
+
+def test_parallel_keep_raw_and_filter(big_m3u):
+    parallel = import_m3u_file_parallel(big_m3u, workers=2, channel_filter=only_vod, keep_raw=True)
+    serial = list(only_vod(import_m3u_file(big_m3u, keep_raw=True)))
+    assert parallel == serial
+    assert parallel[0].raw_extinf.startswith("#EXTINF:")
+
+
+def test_parallel_empty_and_missing(tmp_path):
+    empty = tmp_path / "empty.m3u"
+    empty.write_text("")
+    assert import_m3u_file_parallel(str(empty), workers=2) is None
+    assert import_m3u_file_parallel(str(tmp_path / "missing.m3u"), workers=2) is None
+
+
+@pytest.mark.parametrize(("load_type", "parallel_mb"), [("movies", "256"), ("all", "-1"), ("all", "big")])
+def test_play_load_m3u_arguments(big_m3u, load_type, parallel_mb):
+    from fhs_iptv_tools import config, playyaml
+    from fhs_iptv_tools.playyaml_lib import check_console
+
+    check_console()
+    config.STORE.pop('parallel', None)
+    task = {'store': 'parallel', 'file': big_m3u, 'type': load_type, 'parallel_mb': parallel_mb, 'keep_raw': 'no'}
+    assert playyaml.play_command_load_m3u_file(task) is False
+    assert 'parallel' not in config.STORE
+    task.update({'type': 'all', 'parallel_mb': '0'})
+    assert playyaml.play_command_load_m3u_file(task) is True
+    assert config.STORE['parallel'].count_channels() == 2000
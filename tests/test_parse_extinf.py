@@ -0,0 +1,58 @@
+"""#EXTINF attribute tokenizer."""
+
+import pytest
+
+from fhs_iptv_tools.import_m3u import parse_extinf
+
+STANDARD = '#EXTINF:-1 tvg-id="id.nl" tvg-name="NL: One" tvg-logo="http://host/1.png" group-title="NL",NL: One'
+
+
+def test_standard_layout():
+    assert parse_extinf(STANDARD) == (
+        {'tvg-id': 'id.nl', 'tvg-name': 'NL: One', 'tvg-logo': 'http://host/1.png', 'group-title': 'NL'},
+        'NL: One'
+    )
+
+
+def test_no_extinf():
+    assert parse_extinf('#EXTM3U') is None
+    assert parse_extinf('http://host/1.ts') is None
+
+
+def test_any_order_and_unknown_attributes():
+    line = '#EXTINF:-1 group-title="NL" tvg-chno="7" tvg-id="id.nl" catchup="default",Title'
+    assert parse_extinf(line) == ({'group-title': 'NL', 'tvg-chno': '7', 'tvg-id': 'id.nl', 'catchup': 'default'},
+                                  'Title')
+
+
+@pytest.mark.parametrize(("line", "expected"), [
+    # unquoted tokens before and between the quoted values
+    ('#EXTINF:-1 tvg-shift=2 tvg-id="id",Title', ({'tvg-shift': '2', 'tvg-id': 'id'}, 'Title')),
+    ('#EXTINF:-1 tvg-id="id" radio=true tvg-name="name",Title',
+     ({'tvg-id': 'id', 'radio': 'true', 'tvg-name': 'name'}, 'Title')),
+    ('#EXTINF:-1 tvg-id=id,Title', ({'tvg-id': 'id'}, 'Title')),
+    # commas in quoted values and in the title
+    ('#EXTINF:-1 tvg-name="One, Two" group-title="A,B",One, Two',
+     ({'tvg-name': 'One, Two', 'group-title': 'A,B'}, 'One, Two')),
+    # quotes in the title
+    ('#EXTINF:-1 tvg-id="id",The "Best" Show', ({'tvg-id': 'id'}, 'The "Best" Show')),
+    # missing title
+    ('#EXTINF:-1 tvg-id="id" tvg-name="name"', ({'tvg-id': 'id', 'tvg-name': 'name'}, '')),
+    ('#EXTINF:-1 tvg-id="id",', ({'tvg-id': 'id'}, '')),
+    # no attributes
+    ('#EXTINF:-1,Only a title', ({}, 'Only a title')),
+    ('#extinf:0,lower case', ({}, 'lower case')),
+])
+def test_edge_cases(line, expected):
+    assert parse_extinf(line) == expected
+
+
+def test_keys_are_lowercase():
+    line = '#EXTINF:-1 TVG-ID="id" Group-Title="NL",Title'
+    assert parse_extinf(line) == ({'tvg-id': 'id', 'group-title': 'NL'}, 'Title')
+
+
+def test_keep_case():
+    line = '#EXTINF:-1 TVG-ID="id" Group-Title="NL" tvg-Shift=1,Title'
+    assert parse_extinf(line, keep_case=True) == ({'TVG-ID': 'id', 'Group-Title': 'NL', 'tvg-Shift': '1'}, 'Title')
+    assert parse_extinf(STANDARD, keep_case=True) == parse_extinf(STANDARD)
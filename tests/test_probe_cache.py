@@ -0,0 +1,100 @@
+"""SQLite probe cache and the migration of the json probe cache."""
+
+import json
+import os
+import sqlite3
+
+from fhs_iptv_tools.probe_cache import STATUS_ERROR, ProbeCache, import_json_dir
+
+
+def write_json_cache(probe_dir, probe, sources):
+    for source in sources:
+        path = os.path.join(probe_dir, f"{probe.get_source_hash(source)}.json")
+        with open(path, "w") as target:
+            json.dump({'streams': [], 'source': source}, target)
+        os.utime(path, (1000000000, 1000000000))
+
+
+def test_put_and_get(tmp_path):
+    cache = ProbeCache(str(tmp_path / "probe.db"))
+    assert cache.get("missing") is None
+    cache.put("a", {'streams': [1]})
+    cache.put_many([(f"h{n}", {'n': n}) for n in range(1200)])
+    assert cache.get("a") == {'streams': [1]}
+    found = cache.get_many([f"h{n}" for n in range(1200)] + ["missing"])
+    assert len(found) == 1200
+    assert found["h1199"] == {'n': 1199}
+    cache.put("a", {'streams': [2]})
+    assert cache.get("a") == {'streams': [2]}
+    assert cache.count() == 1201
+    cache.close()
+    # the data is kept
+    cache = ProbeCache(str(tmp_path / "probe.db"))
+    assert cache.get("h5") == {'n': 5}
+    cache.close()
+
+
+def test_error_status(tmp_path):
+    cache = ProbeCache(str(tmp_path / "probe.db"))
+    cache.put("a", {'error': "timeout"}, status=STATUS_ERROR)
+    assert cache.get("a") is None
+    assert cache.count() == 0
+    assert cache.count(STATUS_ERROR) == 1
+    assert cache.count(None) == 1
+    cache.put("a", {'streams': []})
+    assert cache.get("a") == {'streams': []}
+    assert cache.count(STATUS_ERROR) == 0
+    cache.close()
+
+
+def test_import_json_dir(tmp_path):
+    probe_dir = tmp_path / "json"
+    probe_dir.mkdir()
+    (probe_dir / "good.json").write_text('{"streams": []}')
+    os.utime(probe_dir / "good.json", (1000000000, 1000000000))
+    (probe_dir / "half.json").write_text('{"streams": [')
+    (probe_dir / "other.txt").write_text('{}')
+    (probe_dir / "dir.json").mkdir()
+    cache = ProbeCache(str(tmp_path / "probe.db"))
+    assert import_json_dir(cache, str(probe_dir), batch_size=1) == (1, 1)
+    assert cache.get("good") == {'streams': []}
+    cache.close()
+    with sqlite3.connect(str(tmp_path / "probe.db")) as db:
+        assert db.execute("SELECT hash, probe_time FROM probe").fetchall() == [("good", 1000000000.0)]
+
+
+def test_json_fallback(probe_info, fake_ffprobe, tmp_path, capsys):
+    write_json_cache(str(tmp_path / "json"), probe_info, ["http://host/1.ts", "http://host/2.ts", "http://host/3.ts"])
+    assert probe_info.load_cache_source("http://host/1.ts") == {'streams': [], 'source': "http://host/1.ts"}
+    found = probe_info.load_cache_sources(["http://host/2.ts", "http://host/3.ts", "http://host/4.ts"])
+    assert sorted(found) == ["http://host/2.ts", "http://host/3.ts"]
+    assert capsys.readouterr().out.count("migrate-probe-cache") == 1
+    assert probe_info.get_cache().count() == 3
+    assert probe_info.probe_with_cache("http://host/2.ts")['fhs_source'] == "cache"
+    assert fake_ffprobe.calls() == []
+
+
+def test_probe_error_is_cached(probe_info, fake_ffprobe):
+    assert probe_info.probe_with_cache("http://host/fail.ts") is None
+    assert probe_info.get_cache().count(STATUS_ERROR) == 1
+    # a failed source is probed again
+    assert probe_info.probe_with_cache("http://host/fail.ts") is None
+    assert len(fake_ffprobe.calls()) == 2
+    assert probe_info.probe_with_cache("http://host/ok.ts")['fhs_source'] == "ffprobe"
+    assert probe_info.probe_with_cache("http://host/ok.ts")['fhs_source'] == "cache"
+    assert len(fake_ffprobe.calls()) == 3
+
+
+def test_migrate_probe_cache_command(tmp_path, probe_info):
+    from typer.testing import CliRunner
+
+    from fhs_iptv_tools.cli import main
+
+    write_json_cache(str(tmp_path / "json"), probe_info, ["http://host/1.ts", "http://host/2.ts"])
+    result = CliRunner().invoke(main, ["migrate-probe-cache", "--probe-dir", str(tmp_path / "json"),
+                                       "--cache-file", str(tmp_path / "migrated.db")])
+    assert result.exit_code == 0
+    assert "imported 2 probes, skipped 0 invalid files, 2 probes in the cache." in result.output
+    cache = ProbeCache(str(tmp_path / "migrated.db"))
+    assert cache.get(probe_info.get_source_hash("http://host/1.ts"))['source'] == "http://host/1.ts"
+    cache.close()
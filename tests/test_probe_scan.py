@@ -0,0 +1,120 @@
+"""Concurrent probe scan with a fake ffprobe."""
+
+import json
+import zlib
+
+import pytest
+
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_cache import STATUS_ERROR
+from fhs_iptv_tools.probe_list import ProbeInfoList
+from fhs_iptv_tools.probe_scan import scan_channels
+
+
+def channel(name, *sources):
+    return M3uChannel("", name, "", "", tvg_sources=list(sources))
+
+
+def test_scan_results(probe_info, fake_ffprobe):
+    channels = [
+        channel("one", "http://a.example/hd/1.ts"),
+        channel("two", "http://b.example/2.ts"),
+        channel("same source", "http://a.example/hd/1.ts"),
+        channel("two sources", "http://a.example/fail/3.ts", "http://c.example/hd/3.ts"),
+        channel("failed", "http://c.example/fail/4.ts"),
+        channel("no source"),
+    ]
+    results = {ch.tvg_name: result for (ch, result) in scan_channels(probe_info, channels, workers=4)}
+    assert sorted(results) == sorted(ch.tvg_name for ch in channels)
+    assert results["one"]['streams'][1]['height'] == 1080
+    assert results["one"]['fhs_source'] == "ffprobe"
+    assert 'filename' not in results["one"]['format']
+    assert results["two"]['streams'][1]['height'] == 576
+    assert results["same source"] is results["one"]
+    # the result of the last source
+    assert results["two sources"]['streams'][1]['height'] == 1080
+    assert results["failed"] is None
+    assert results["no source"] is None
+    assert sorted(source for (source, _, _) in fake_ffprobe.calls()) == sorted({
+        source for ch in channels for source in ch.tvg_sources})
+    assert probe_info.get_cache().count() == 3
+    assert probe_info.get_cache().count(STATUS_ERROR) == 2
+
+
+def test_scan_uses_cache(probe_info, fake_ffprobe):
+    channels = [channel(f"ch {n}", f"http://a.example/{n}.ts") for n in range(3)]
+    list(scan_channels(probe_info, channels))
+    channels.append(channel("new", "http://a.example/new.ts"))
+    results = list(scan_channels(probe_info, channels))
+    assert [result['fhs_source'] for (_, result) in results] == ["cache", "cache", "cache", "ffprobe"]
+    assert len(fake_ffprobe.calls()) == 4
+
+
+def test_scan_runs_probes_at_the_same_time(probe_info, fake_ffprobe):
+    channels = [channel(f"ch {n}", f"http://host{n}.example/slow/{n}.ts") for n in range(6)]
+    assert all(result is not None for (_, result) in scan_channels(probe_info, channels, workers=3))
+    assert 1 < fake_ffprobe.max_running() <= 3
+
+
+def test_scan_stops_early(probe_info, fake_ffprobe):
+    channels = [channel(f"ch {n}", f"http://host{n}.example/{n}.ts") for n in range(10)]
+    results = scan_channels(probe_info, channels, workers=2)
+    next(results)
+    results.close()
+    assert len(fake_ffprobe.calls()) < 10
+
+
+def test_store_probe_scan(probe_info):
+    store = ProbeInfoList()
+    store.add_channels([channel("one", "http://a.example/hd/1.ts"), channel("failed", "http://a.example/fail/2.ts")])
+    store._ProbeInfoList__probe = probe_info
+    statuses = []
+    assert store.probe_scan(workers=2, status_output=statuses.append, where='name ~ "e"') is None
+    (one, failed) = store.get_channels()
+    assert one.fhs_info.startswith("video: h264 bit_rate: 4000000 / width: 1920 / height: 1080")
+    assert one.get_probe_dict()['video'] == {'codec': 'h264', 'bit_rate': 4000000, 'with': 1920, 'height': 1080}
+    assert failed.fhs_info == ""
+    assert "no result for: failed" in statuses
+    assert list(store.get_channels(where='probed and probe.video.height >= 720')) == [one]
+
+
+def test_store_probe_scan_clones_only_probed_shared_channels(probe_info):
+    source = ProbeInfoList()
+    source.add_channels([channel("one", "http://a.example/hd/1.ts"), channel("failed", "http://a.example/fail/2.ts")])
+    store = ProbeInfoList()
+    source.copy_channels(to_store=store, quiet=True)
+    store._ProbeInfoList__probe = probe_info
+    store.probe_scan(workers=2)
+    (one, failed) = store.get_channels()
+    assert one.fhs_info != "" and not one.is_shared()
+    # the failed channel got no probe info and is still shared with source
+    assert failed is next(source.get_channels(with_name="failed"))
+    assert failed.is_shared()
+    assert next(source.get_channels(with_name="one")).fhs_info == ""
+
+
+def test_scan_caches_the_error_of_each_source(probe_info, fake_ffprobe):
+    channels = [channel(f"ch {n}", f"http://host{n}.example/fail/{n}.ts") for n in range(6)]
+    assert all(result is None for (_, result) in scan_channels(probe_info, channels, workers=6))
+    cache = probe_info.get_cache()
+    for ch in channels:
+        (payload,) = cache._db.execute("SELECT payload FROM probe WHERE hash = ? AND status = ?",
+                                       [probe_info.get_source_hash(ch.tvg_sources[0]), STATUS_ERROR]).fetchone()
+        assert ch.tvg_sources[0] in json.loads(zlib.decompress(payload))['error']
+
+
+@pytest.mark.parametrize(("name", "value"), [("workers", "0"), ("workers", "two"), ("per_host", "0"),
+                                             ("per_host", "1.5"), ("rate", "-1"), ("rate", "nan"), ("slow", "-0.5")])
+def test_play_probe_scan_arguments(name, value):
+    from fhs_iptv_tools import config, playyaml
+    from fhs_iptv_tools.playyaml_lib import check_console
+
+    check_console()
+    config.STORE.pop('scan', None)
+    task = {'store': 'scan', 'workers': "4", 'per_host': "2", 'rate': "0", 'slow': "20", 'with_tag': "",
+            'without_tag': "", 'with_id': "", 'with_name': "", 'where': ""}
+    task[name] = value
+    assert playyaml.play_command_probe_scan(task) is False
+    assert 'scan' not in config.STORE
+    task[name] = "0.5" if name in ("rate", "slow") else "1"
+    assert playyaml.play_command_probe_scan(task) is True
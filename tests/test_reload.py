@@ -0,0 +1,97 @@
+"""Incremental reload of a store."""
+
+from fhs_iptv_tools.probe_list import ProbeInfoList
+
+
+def write_m3u(path, entries):
+    with open(path, "w") as output_stream:
+        output_stream.write("#EXTM3U\n")
+        for (tvg_id, name, group, source) in entries:
+            output_stream.write(f'#EXTINF:-1 tvg-id="{tvg_id}" tvg-name="{name}" tvg-logo="" group-title="{group}",'
+                                f'{name}\n{source}\n')
+
+
+def test_reload_counts(tmp_path):
+    path = str(tmp_path / "list.m3u")
+    write_m3u(path, [
+        ("a", "A", "NL", "http://host/a.ts"),
+        ("b", "B", "NL", "http://host/b.ts"),
+        ("c", "C", "NL", "http://host/c.ts"),
+        ("d", "D", "NL", "http://host/d.ts"),
+    ])
+    store = ProbeInfoList()
+    store.load_m3u_file(path)
+    store.select(tvg_name="A", set_tag="keep", quiet=True)
+    store.select(tvg_name="B", set_tag="keep", quiet=True)
+    (ch_a, ch_b) = store.get_channels(with_tag="keep")
+    ch_b.fhs_dict = {'video': 'h264'}
+
+    write_m3u(path, [
+        ("a", "A", "NL", "http://host/a.ts"),
+        ("b", "B", "NL", "http://host/b2.ts"),
+        ("d", "D", "BE", "http://host/d.ts"),
+        ("e", "E", "NL", "http://host/e.ts"),
+    ])
+    assert store.reload_m3u_file(path) == {'added': 1, 'removed': 1, 'changed': 2, 'unchanged': 1}
+    channels = list(store.get_channels())
+    assert [ch.tvg_name for ch in channels] == ["A", "B", "D", "E"]
+    assert channels[0] is ch_a
+    assert channels[1] is ch_b
+    assert ch_b.tvg_sources == ["http://host/b2.ts"]
+    assert ch_b.has_tag("keep")
+    assert ch_b.get_probe_dict() == {}
+    assert channels[2].tvg_group_title == "BE"
+    assert [ch.tvg_name for ch in store.get_channels(with_tag="keep")] == ["A", "B"]
+    assert [ch.tvg_name for ch in store.get_channels(with_id="e")] == ["E"]
+
+
+def test_reload_unchanged(tmp_path):
+    path = str(tmp_path / "list.m3u")
+    write_m3u(path, [("a", "A", "NL", "http://host/a.ts"), ("a", "A", "NL", "http://host/a.ts")])
+    store = ProbeInfoList()
+    store.load_m3u_file(path)
+    assert store.reload_m3u_file(path) == {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 2}
+
+
+def test_reload_missing_file(tmp_path):
+    store = ProbeInfoList()
+    assert store.reload_m3u_file(str(tmp_path / "missing.m3u")) is None
+
+
+def test_reload_order_like_fresh_load(tmp_path):
+    path = str(tmp_path / "list.m3u")
+    write_m3u(path, [(name.lower(), name, "NL", f"http://host/{name}.ts") for name in "BDF"])
+    store = ProbeInfoList()
+    store.load_m3u_file(path)
+    entries = [(name.lower(), name, "NL", f"http://host/{name}.ts") for name in "ABCDEFG"]
+    write_m3u(path, entries)
+    assert store.reload_m3u_file(path) == {'added': 4, 'removed': 0, 'changed': 0, 'unchanged': 3}
+    fresh = ProbeInfoList()
+    fresh.load_m3u_file(path)
+    assert list(store.get_channels()) == list(fresh.get_channels())
+
+    # a store in another order keeps it, a new entry follows the channel of the entry before it
+    store.sort_channels(keys="tvg_name:desc")
+    entries.insert(2, ("bb", "BB", "NL", "http://host/BB.ts"))
+    write_m3u(path, entries)
+    assert store.reload_m3u_file(path)['added'] == 1
+    assert [ch.tvg_name for ch in store.get_channels()] == ["G", "F", "E", "D", "C", "B", "BB", "A"]
+
+
+def test_reload_clones_only_changed_shared_channels(tmp_path):
+    path = str(tmp_path / "list.m3u")
+    write_m3u(path, [("a", "A", "NL", "http://host/a.ts"), ("b", "B", "NL", "http://host/b.ts"),
+                     ("c", "C", "NL", "http://host/c.ts")])
+    source = ProbeInfoList()
+    source.load_m3u_file(path)
+    store = ProbeInfoList()
+    source.copy_channels(to_store=store, quiet=True)
+    (ch_a, ch_b, ch_c) = source.get_channels()
+
+    write_m3u(path, [("a", "A", "NL", "http://host/a.ts"), ("b", "B", "BE", "http://host/b.ts")])
+    assert store.reload_m3u_file(path) == {'added': 0, 'removed': 1, 'changed': 1, 'unchanged': 1}
+    (new_a, new_b) = store.get_channels()
+    assert new_a is ch_a and ch_a.is_shared()
+    assert new_b is not ch_b and not ch_b.is_shared()
+    assert (ch_b.tvg_group_title, new_b.tvg_group_title) == ("NL", "BE")
+    assert not ch_c.is_shared()
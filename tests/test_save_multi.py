@@ -0,0 +1,53 @@
+"""Fan-out export of several m3u files in one pass."""
+
+import os
+
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+
+
+def make_store():
+    store = ProbeInfoList()
+    for n in range(12):
+        store.add_channel_struct(M3uChannel(f"id{n}", f"name {n}", "", "even" if n % 2 == 0 else "odd",
+                                            vod=n % 3 == 0, tvg_sources=[f"http://host/{n}.ts"]))
+    store.select(tvg_group_title="even", set_tag="even", quiet=True)
+    return store
+
+
+OUTPUTS = [
+    {},
+    {'with_tag': "even"},
+    {'without_tag': "even"},
+    {'with_tag': "even", 'where': "vod"},
+    {'where': 'name ~ "1"'},
+]
+
+
+def test_same_as_single_saves(tmp_path):
+    store = make_store()
+    outputs = [dict(output, file=str(tmp_path / f"multi{n}.m3u")) for (n, output) in enumerate(OUTPUTS)]
+    results = store.save_m3u_files(outputs)
+    assert [result['file'] for result in results] == [output['file'] for output in outputs]
+    for (n, output) in enumerate(OUTPUTS):
+        single = str(tmp_path / f"single{n}.m3u")
+        result = store.save_m3u_file(file=single, **output)
+        assert result['count'] == results[n]['count']
+        with open(single) as expected, open(outputs[n]['file']) as written:
+            assert written.read() == expected.read()
+    assert [result['count'] for result in results] == [12, 6, 6, 2, 3]
+    assert [result['skipped'] for result in store.save_m3u_files(outputs)] == [True] * 5
+
+
+def test_invalid_where(tmp_path):
+    store = make_store()
+    outputs = [{'file': str(tmp_path / "a.m3u")}, {'file': str(tmp_path / "b.m3u"), 'where': "name ~"}]
+    assert store.save_m3u_files(outputs) is False
+    assert os.listdir(tmp_path) == []
+
+
+def test_error_aborts_all(tmp_path):
+    store = make_store()
+    outputs = [{'file': str(tmp_path / "a.m3u")}, {'file': str(tmp_path / "missing" / "b.m3u")}]
+    assert store.save_m3u_files(outputs) is False
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,65 @@
+"""Channel classification and the series index."""
+
+from fhs_iptv_tools.import_m3u import ChannelType, M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+from fhs_iptv_tools.series_index import SeriesIndex
+
+
+def episode(name):
+    return M3uChannel("", name, "", "Series", vod=True, tvg_sources=[f"http://host/{name}.mkv"])
+
+
+def make_channels():
+    return [
+        M3uChannel("one.nl", "NL: One", "", "NL", tvg_sources=["http://host/1.ts"]),
+        M3uChannel("", "Movie (2020)", "", "Movies", vod=True, tvg_sources=["http://host/2.mkv"]),
+        episode("Show S01 E01"),
+        episode("Show S01 E02"),
+        episode("Show S02E01"),
+        episode("Show S02 E03"),
+        episode("Other S03 E01"),
+    ]
+
+
+def test_classify_is_cached():
+    (channel, movie, ep) = make_channels()[:3]
+    assert channel.classify() is ChannelType.CHANNEL
+    assert movie.classify() is ChannelType.MOVIE
+    assert ep.classify() is ChannelType.EPISODE
+    assert (ep.serie_title, ep.season, ep.episode) == ("Show", 1, 1)
+    assert movie.get_serie() is None
+    ep.tvg_name = "Renamed"
+    assert ep.classify() is ChannelType.EPISODE
+    ep.clear_type()
+    assert ep.classify() is ChannelType.MOVIE
+    assert ep.serie_title is None
+
+
+def test_series_index():
+    channels = make_channels()
+    index = SeriesIndex(channels)
+    assert index.titles() == ["Other", "Show"]
+    assert index.titles("Sh") == ["Show"]
+    assert [(season, ep) for (season, ep, _) in index.episodes("Show")] == [(1, 1), (1, 2), (2, 1), (2, 3)]
+    assert index.complete_seasons("Show") == [1]
+    assert index.latest_season("Show") == 2
+    assert index.latest_episode("Show")[:2] == (2, 3)
+    assert index.latest_episode("Missing") is None
+    assert index.count() == (2, 5)
+    index.remove(channels[6])
+    assert index.titles() == ["Show"]
+    assert index.count() == (1, 4)
+
+
+def test_store_series():
+    store = ProbeInfoList()
+    for ch in make_channels():
+        store.add_channel_struct(ch)
+    assert store.list_series() == [("Other", {3: 1}), ("Show", {1: 2, 2: 2})]
+    assert store.select_series(search="Show", mode="latest_season", set_tag="new") == 2
+    assert [ch.tvg_name for ch in store.get_channels(with_tag="new")] == ["Show S02E01", "Show S02 E03"]
+    assert store.select_series(mode="complete_seasons", set_tag="complete") == 3
+    assert store.select_series(mode="unknown", set_tag="x") == -1
+    store.select(tvg_name="Show S02 E03", set_tag="rename", quiet=True)
+    store.modify_channels(with_tag="rename", set_name="Show S03 E01")
+    assert store.list_series("Show") == [("Show", {1: 2, 2: 1, 3: 1})]
@@ -0,0 +1,79 @@
+"""Channels shared between stores (copy on write)."""
+
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+
+
+def make_store(count=10):
+    store = ProbeInfoList()
+    store.add_channels([M3uChannel(f"id{n}", f"name {n}", "", "group a" if n % 2 else "group b",
+                                   tvg_sources=[f"http://host/{n}.ts"]) for n in range(count)])
+    return store
+
+
+def test_select_copy_shares_channels():
+    source = make_store()
+    target = ProbeInfoList()
+    assert source.select_copy(tvg_group_title="group a", to_store=target) == 5
+    copied = list(target.get_channels())
+    originals = list(source.get_channels(where='group == "group a"'))
+    assert len(copied) == len(originals) == 5
+    assert all(a is b for (a, b) in zip(copied, originals))
+    assert all(ch.is_shared() for ch in copied)
+    assert not any(ch.get_tags() for ch in source.get_channels())
+
+
+def test_play_select_copy_shares_channels():
+    from fhs_iptv_tools import config, playyaml
+    from fhs_iptv_tools.playyaml_lib import check_console
+
+    check_console()
+    config.STORE['source'] = make_store()
+    config.STORE['target'] = ProbeInfoList()
+    task = {'store': 'source', 'to_store': 'target', 'with_tag': '', 'without_tag': '', 'group_title': '',
+            'name': 'name 1', 'id': '', 'source': '', 'match': 'substring', 'threshold': '0.8', 'where': ''}
+    assert playyaml.play_command_select_copy(task) is True
+    copied = list(config.STORE['target'].get_channels())
+    assert [ch.tvg_name for ch in copied] == ["name 1"]
+    assert copied[0] is next(config.STORE['source'].get_channels(with_name="name 1"))
+    assert not copied[0].get_tags()
+
+
+def test_tag_clones_shared_channel():
+    source = make_store(2)
+    target = ProbeInfoList()
+    source.copy_channels(to_store=target, quiet=True)
+    target.select(tvg_name="name 0", set_tag="mine", quiet=True)
+    assert list(source.get_channels(with_tag="mine")) == []
+    assert [ch.tvg_name for ch in target.get_channels(with_tag="mine")] == ["name 0"]
+    assert next(target.get_channels(with_name="name 1")) is next(source.get_channels(with_name="name 1"))
+
+
+def test_select_move():
+    source = make_store()
+    target = ProbeInfoList()
+    moved = list(source.get_channels(where='group == "group b"'))
+    assert source.select_move(tvg_group_title="group b", to_store=target) == 5
+    assert len(moved) == 5
+    assert all(a is b for (a, b) in zip(target.get_channels(), moved))
+    assert len(list(source.get_channels())) == 5
+    assert source.select_move(tvg_group_title="group a", to_store=source) == -1
+
+
+def test_modify_clones_shared_channel():
+    source = make_store(2)
+    target = ProbeInfoList()
+    source.copy_channels(to_store=target, quiet=True)
+    assert target.modify_channels(with_id="id0", set_name="renamed") == 1
+    assert [ch.tvg_name for ch in source.get_channels()] == ["name 0", "name 1"]
+    assert [ch.tvg_name for ch in target.get_channels()] == ["renamed", "name 1"]
+    assert not next(target.get_channels(with_id="id0")).is_shared()
+
+
+def test_delete_releases_shared_channel():
+    source = make_store(2)
+    target = ProbeInfoList()
+    source.copy_channels(to_store=target, quiet=True)
+    assert target.delete_channels(with_id="id0") == 1
+    assert not next(source.get_channels(with_id="id0")).is_shared()
+    assert next(source.get_channels(with_id="id1")).is_shared()
@@ -0,0 +1,117 @@
+"""Binary snapshot of channels."""
+
+import pytest
+
+from fhs_iptv_tools.import_m3u import ChannelType, M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+from fhs_iptv_tools.snapshot import HEADER, SnapshotError, SnapshotWriter, load_snapshot, save_snapshot
+
+
+def make_channels():
+    return [
+        M3uChannel("one.nl", "NL: One", "http://host/logo.png", "NL", tvg_sources=["http://host/1.ts"]),
+        M3uChannel("", "Movie é", "", "Movies", vod=True, tvg_sources=["http://a/2.mkv", "http://b/2.mkv"],
+                   tvg_type=ChannelType.MOVIE, fhs_selected=True, fhs_tags={"a", "b"},
+                   fhs_dict={'video': 'h264', 'width': 1920}, fhs_info="1080p",
+                   raw_extinf='#EXTINF:-1 tvg-name="Movie é",Movie é', dirty=True),
+        M3uChannel("", "", "", ""),
+    ]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "store.snapshot")
+    channels = make_channels()
+    assert save_snapshot(path, channels) == 3
+    assert load_snapshot(path) == channels
+    assert [p.name for p in tmp_path.iterdir()] == ["store.snapshot"]
+
+
+def test_empty(tmp_path):
+    path = str(tmp_path / "store.snapshot")
+    assert save_snapshot(path, []) == 0
+    assert load_snapshot(path) == []
+
+
+def test_truncated(tmp_path):
+    path = tmp_path / "store.snapshot"
+    save_snapshot(str(path), make_channels())
+    data = path.read_bytes()
+    for size in range(0, len(data), 7):
+        path.write_bytes(data[:size])
+        with pytest.raises(SnapshotError):
+            load_snapshot(str(path))
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "store.snapshot"
+    path.write_bytes(b"#EXTM3U\n" * 10)
+    with pytest.raises(SnapshotError, match="not a snapshot"):
+        load_snapshot(str(path))
+
+
+def test_corrupt_string_index(tmp_path):
+    path = tmp_path / "store.snapshot"
+    save_snapshot(str(path), make_channels())
+    data = bytearray(path.read_bytes())
+    # first field of the first record is the string index of tvg_id
+    record = HEADER.size + 8
+    data[record:record + 4] = (10 ** 6).to_bytes(4, 'little')
+    path.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError, match="corrupt"):
+        load_snapshot(str(path))
+
+
+def test_writer_abort_on_error(tmp_path):
+    path = tmp_path / "store.snapshot"
+    save_snapshot(str(path), make_channels()[:1])
+    with pytest.raises(RuntimeError):
+        with SnapshotWriter(str(path)) as writer:
+            writer.add(make_channels()[1])
+            raise RuntimeError("stop")
+    assert load_snapshot(str(path)) == make_channels()[:1]
+    assert [p.name for p in tmp_path.iterdir()] == ["store.snapshot"]
+
+
+def test_store_save_and_load(tmp_path):
+    path = str(tmp_path / "store.snapshot")
+    store = ProbeInfoList()
+    for ch in make_channels():
+        store.add_channel_struct(ch)
+    assert store.save_store(path) == 3
+    other = ProbeInfoList()
+    assert other.load_store(path) == make_channels()
+    assert [ch.tvg_name for ch in other.get_channels(with_tag="a")] == ["Movie é"]
+    assert other.load_store(str(tmp_path / "missing.snapshot")) is None
+
+
+def test_m3u_header(tmp_path):
+    path = str(tmp_path / "store.snapshot")
+    save_snapshot(path, make_channels(), header='#EXTM3U url-tvg="http://host/epg.xml"')
+    header = []
+    assert load_snapshot(path, header) == make_channels()
+    assert header == ['#EXTM3U url-tvg="http://host/epg.xml"']
+    save_snapshot(path, make_channels())
+    header = []
+    load_snapshot(path, header)
+    assert header == []
+
+
+def test_store_keeps_m3u_header(tmp_path):
+    m3u_file = tmp_path / "list.m3u"
+    m3u_file.write_text('#EXTM3U url-tvg="http://host/epg.xml"\n'
+                        '#EXTINF:-1 tvg-id="one.nl" tvg-name="NL: One" tvg-logo="" group-title="NL",NL: One\n'
+                        'http://host/live/user/pass/1.ts\n')
+    store = ProbeInfoList()
+    store.load_m3u_file(str(m3u_file), keep_raw=True)
+    path = str(tmp_path / "store.snapshot")
+    assert store.save_store(path) == 1
+    other = ProbeInfoList()
+    other.load_store(path)
+    assert other.save_m3u_file(file=str(tmp_path / "out.m3u"))['count'] == 1
+    assert (tmp_path / "out.m3u").read_text() == m3u_file.read_text()
+
+    # a store without a header doesn't keep the header of the store it replaces
+    ProbeInfoList().save_store(path)
+    other.load_store(path)
+    other.save_m3u_file(file=str(tmp_path / "out.m3u"))
+    assert (tmp_path / "out.m3u").read_text() == "#EXTM3U\n"
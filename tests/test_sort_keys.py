@@ -0,0 +1,97 @@
+"""Multi-key sort with natural ordering and probe keys."""
+
+import random
+
+import pytest
+
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+from fhs_iptv_tools.sort_keys import SortKeyError, natural_key, parse_sort_keys, sort_on_keys
+
+
+def names(channels):
+    return [ch.tvg_name for ch in channels]
+
+
+def test_natural_key():
+    assert sorted(["Ch 10", "ch 2", "Ch 1"], key=natural_key) == ["Ch 1", "ch 2", "Ch 10"]
+    assert natural_key("a2b") == ("a", 2, "b")
+
+
+def test_parse_sort_keys():
+    assert parse_sort_keys("tvg_group_title, tvg_name:natural:desc,probe.video.height:DESC") == [
+        ("tvg_group_title", "plain", False), ("tvg_name", "natural", True), ("probe.video.height", "plain", True)]
+    for text in ("", " , ", "name:sideways", ":desc"):
+        with pytest.raises(SortKeyError):
+            parse_sort_keys(text)
+
+
+def test_modes_and_directions():
+    channels = [M3uChannel("", name, "", "") for name in ("Ch 10", "ch 2", "Ch 1", "b")]
+    sort_on_keys(channels, parse_sort_keys("tvg_name"))
+    assert names(channels) == ["Ch 1", "Ch 10", "b", "ch 2"]
+    sort_on_keys(channels, parse_sort_keys("tvg_name:casefold"))
+    assert names(channels) == ["b", "Ch 1", "Ch 10", "ch 2"]
+    sort_on_keys(channels, parse_sort_keys("name:natural"))
+    assert names(channels) == ["b", "Ch 1", "ch 2", "Ch 10"]
+    sort_on_keys(channels, parse_sort_keys("name:natural:desc"))
+    assert names(channels) == ["Ch 10", "ch 2", "Ch 1", "b"]
+
+
+def test_multiple_keys_equal_python_sort():
+    rng = random.Random(22)
+    channels = [M3uChannel(f"id{n}", f"name {rng.randrange(5)}", "", f"group {rng.randrange(3)}",
+                           vod=rng.random() < 0.5) for n in range(200)]
+    expected = sorted(channels, key=lambda ch: ch.tvg_name, reverse=True)
+    expected = sorted(expected, key=lambda ch: (ch.tvg_group_title, ch.vod))
+    sort_on_keys(channels, parse_sort_keys("group,vod,tvg_name:desc"))
+    assert channels == expected
+    # stable, equal keys keep their order
+    sort_on_keys(channels, parse_sort_keys("vod"))
+    assert channels == sorted(expected, key=lambda ch: ch.vod)
+
+
+def test_probe_keys_missing_last():
+    channels = [M3uChannel("", name, "", "", fhs_dict={'video': {'height': height}} if height else None)
+                for (name, height) in (("none", None), ("720", 720), ("1080", 1080), ("576", 576))]
+    sort_on_keys(channels, parse_sort_keys("probe.video.height"))
+    assert names(channels) == ["576", "720", "1080", "none"]
+    sort_on_keys(channels, parse_sort_keys("probe.video.height:desc"))
+    assert names(channels) == ["1080", "720", "576", "none"]
+
+
+def test_series_keys():
+    channels = [M3uChannel("", name, "", "", vod=True) for name in ("Show S02 E01", "Show S01 E10", "Movie",
+                                                                    "Show S01 E02")]
+    sort_on_keys(channels, parse_sort_keys("season,episode"))
+    assert names(channels) == ["Show S01 E02", "Show S01 E10", "Show S02 E01", "Movie"]
+
+
+def test_errors():
+    channels = [M3uChannel("", "a", "", ""), M3uChannel("", "b", "", "", fhs_dict={'video': {'height': "x"}}),
+                M3uChannel("", "c", "", "", fhs_dict={'video': {'height': 1}})]
+    for keys in ("unknown", "_shared", "probe.video.height", "tvg_sources"):
+        with pytest.raises(SortKeyError):
+            sort_on_keys(channels, parse_sort_keys(keys))
+    assert names(channels) == ["a", "b", "c"]
+
+
+def test_store_sort_channels():
+    store = ProbeInfoList()
+    store.add_channels([M3uChannel(f"id{n}", f"Ch {n}", "", f"group {n % 2}") for n in (10, 2, 1, 3)])
+    assert store.sort_channels(sort_key1="tvg_group_title", sort_key2="tvg_name") is True
+    assert names(store.get_channels()) == ["Ch 10", "Ch 2", "Ch 1", "Ch 3"]
+    assert store.sort_channels(keys="tvg_group_title,tvg_name:natural") is True
+    assert names(store.get_channels()) == ["Ch 2", "Ch 10", "Ch 1", "Ch 3"]
+    assert names(store.get_channels(with_id="id10")) == ["Ch 10"]
+    assert store.sort_channels(keys="unknown") is False
+    assert names(store.get_channels()) == ["Ch 2", "Ch 10", "Ch 1", "Ch 3"]
+
+
+def test_store_sort_empty():
+    store = ProbeInfoList()
+    assert store.sort_channels() is True
+    assert store.sort_channels(sort_key1="tvg_group_title", sort_key2="tvg_name") is True
+    assert store.sort_channels(keys="unknown") is True
+    assert store.sort_channels(keys="tvg_name:sideways") is False
+    assert store.count_channels() == 0
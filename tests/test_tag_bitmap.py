@@ -0,0 +1,103 @@
+"""Tag bitmaps stay consistent with the tags of the channels."""
+
+import random
+
+from fhs_iptv_tools.import_m3u import M3uChannel
+from fhs_iptv_tools.probe_list import ProbeInfoList
+from fhs_iptv_tools.tag_bitmap import TagBitmaps, bits_to_positions, delete_bits, positions_to_bits
+
+TAGS = ("a", "b", "c")
+
+
+def test_bits():
+    assert positions_to_bits([]) == 0
+    assert positions_to_bits([0, 3, 64]) == (1 << 0) | (1 << 3) | (1 << 64)
+    assert bits_to_positions(0) == []
+    assert bits_to_positions(positions_to_bits([0, 3, 64])) == [0, 3, 64]
+    assert delete_bits(positions_to_bits([0, 3, 64]), [1, 3]) == positions_to_bits([0, 62])
+
+
+def test_delete_bits_many():
+    rng = random.Random(14)
+    positions = sorted(rng.sample(range(1000), 300))
+    deleted = sorted(rng.sample(range(1200), 200))
+    expected = []
+    for pos in positions:
+        if pos not in deleted:
+            expected.append(pos - sum(1 for d in deleted if d < pos))
+    assert bits_to_positions(delete_bits(positions_to_bits(positions), deleted)) == expected
+
+
+def test_bitmaps_against_sets():
+    rng = random.Random(14)
+    size = 200
+    reference = [set(rng.sample(TAGS, rng.randrange(3))) for _ in range(size)]
+    bitmaps = TagBitmaps([M3uChannel("", "", "", "", fhs_tags=set(tags)) for tags in reference])
+    for _ in range(200):
+        action = rng.randrange(4)
+        tag = rng.choice(TAGS)
+        positions = sorted(rng.sample(range(len(reference)), rng.randrange(min(len(reference), 80) + 1)))
+        if action == 0:
+            bitmaps.set(tag, positions)
+            for p in positions:
+                reference[p].add(tag)
+        elif action == 1:
+            bitmaps.clear(tag, positions)
+            for p in positions:
+                reference[p].discard(tag)
+        elif action == 2 and len(reference) > 100:
+            bitmaps.delete(positions)
+            for p in reversed(positions):
+                del reference[p]
+        else:
+            tags = set(rng.sample(TAGS, rng.randrange(3)))
+            bitmaps.append(M3uChannel("", "", "", "", fhs_tags=set(tags)))
+            reference.append(tags)
+        for tag in TAGS:
+            assert bitmaps.positions(with_tag=tag) == [p for (p, tags) in enumerate(reference) if tag in tags]
+            assert bitmaps.count(tag) == sum(1 for tags in reference if tag in tags)
+        assert bitmaps.positions(without_tag="a") == [p for (p, tags) in enumerate(reference) if "a" not in tags]
+        assert (bitmaps.positions(with_tag="a", without_tag="b")
+                == [p for (p, tags) in enumerate(reference) if "a" in tags and "b" not in tags])
+    assert sorted(bitmaps.tags()) == sorted({tag for tags in reference for tag in tags})
+
+
+def check_tags(store):
+    channels = list(store.get_channels())
+    for tag in TAGS + ("missing",):
+        assert list(store.get_channels(with_tag=tag)) == [ch for ch in channels if ch.has_tag(tag)]
+        assert list(store.get_channels(without_tag=tag)) == [ch for ch in channels if not ch.has_tag(tag)]
+        assert list(store.get_channels(where=f'tag == "{tag}"')) == [ch for ch in channels if ch.has_tag(tag)]
+
+
+def test_store_tags_after_changes():
+    rng = random.Random(14)
+    store = ProbeInfoList()
+    store.add_channels([M3uChannel(f"id{n}", f"name {n % 13}", "", f"group {n % 3}") for n in range(300)])
+    other = ProbeInfoList()
+    check_tags(store)
+    for step in range(40):
+        action = step % 7
+        tag = rng.choice(TAGS)
+        if action == 0:
+            store.select(tvg_name=f"name {rng.randrange(13)}", set_tag=tag, quiet=True)
+        elif action == 1:
+            store.select(tvg_group_title=f"group {rng.randrange(3)}", clear_tag=tag, quiet=True)
+        elif action == 2:
+            store.delete_channels(with_tag=tag)
+        elif action == 3:
+            store.move_channels(with_tag=tag, without_tag=rng.choice(TAGS), to_store=other)
+        elif action == 4:
+            store.sort_channels(keys=rng.choice(["tvg_name", "tvg_id:desc"]))
+        elif action == 5:
+            store.copy_channels(to_store=other, with_name=f"name {rng.randrange(13)}", quiet=True)
+            other.select(tvg_name="name", set_tag=tag, quiet=True)
+        else:
+            store.add_channels([M3uChannel("new", f"name {rng.randrange(13)}", "", "group 9",
+                                           fhs_tags={tag}) for _ in range(rng.randrange(1, 80))])
+        check_tags(store)
+        check_tags(other)
+    tagged = sum(1 for ch in store.get_channels() if ch.has_tag("a"))
+    assert store.clear_tag(tag="a") == tagged
+    assert list(store.get_channels(with_tag="a")) == []
+    check_tags(store)
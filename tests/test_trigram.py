@@ -0,0 +1,70 @@
+"""Trigram index for select on name and group title."""
+
+from fhs_iptv_tools.benchmark import generate_m3u_lines
+from fhs_iptv_tools.import_m3u import M3uChannel, iter_m3u_stream
+from fhs_iptv_tools.probe_list import ProbeInfoList
+from fhs_iptv_tools.trigram_index import TrigramIndex, get_trigrams
+
+SELECTIONS = [
+    {'tvg_name': "Channel 12"},
+    {'tvg_name': "channel 12", 'match': "icase"},
+    {'tvg_name': "CHANNEL", 'match': "icase", 'tvg_group_title': "Group 1"},
+    {'tvg_name': "S0"},
+    {'tvg_name': "ab"},
+    {'tvg_name': "xyz"},
+    {'tvg_group_title': "Group 12"},
+    {'tvg_group_title': "group 12", 'match': "icase"},
+    {'tvg_name': "Movie", 'with_tag': "even"},
+]
+
+
+def selected(store, **kwargs):
+    store.select(set_tag="selected", quiet=True, **kwargs)
+    names = [ch.tvg_name for ch in store.get_channels(with_tag="selected")]
+    store.clear_tag(tag="selected")
+    return names
+
+
+def make_stores():
+    stores = []
+    for trigram in (False, True):
+        store = ProbeInfoList(trigram=trigram)
+        store.add_channels(list(iter_m3u_stream(generate_m3u_lines(600))))
+        store.select(tvg_name="2", set_tag="even", quiet=True)
+        stores.append(store)
+    assert stores[1].is_trigram()
+    return stores
+
+
+def test_get_trigrams():
+    assert get_trigrams("abcd") == {"abc", "bcd"}
+    assert get_trigrams("ab") == set()
+
+
+def test_candidates():
+    channels = [M3uChannel("", name, "", "") for name in ("Abcde", "xbcdx", "bc", "ABC")]
+    index = TrigramIndex(channels)
+    assert index.candidates("bcd") == [0, 1]
+    assert index.candidates("ABC") == [0, 3]
+    assert index.candidates("bc") is None
+    assert index.candidates("zzz") == []
+
+
+def test_select_equals_scan():
+    (plain, trigram) = make_stores()
+    for selection in SELECTIONS:
+        assert selected(trigram, **selection) == selected(plain, **selection)
+
+
+def test_select_after_changes():
+    stores = make_stores()
+    for store in stores:
+        store.delete_channels(where='name ~ "Channel 1"')
+        store.modify_channels(with_id="id2.nl", set_name="Renamed Channel 12")
+        store.add_channel(tvg_id="new", tvg_name="Channel 12 new", tvg_logo="", tvg_group_title="NL| Group 12",
+                          tvg_source="http://host/new.ts")
+        store.sort_channels(keys="tvg_name:natural")
+    (plain, trigram) = stores
+    for selection in SELECTIONS + [{'tvg_name': "renamed", 'match': "icase"}]:
+        assert selected(trigram, **selection) == selected(plain, **selection)
+    assert selected(trigram, tvg_name="Channel 12") == ["Channel 12 new", "Renamed Channel 12"]